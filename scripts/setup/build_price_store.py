@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+离线行情存储构建脚本
+把 {data_dir}/market_data/price_data 下的 YFin CSV 一次性转换为内存映射的二进制存储，
+供离线的 get_YFin_data、get_YFin_data_window 和 get_stock_stats 使用
+
+用法:
+    python scripts/setup/build_price_store.py                 # 转换全部股票
+    python scripts/setup/build_price_store.py AAPL TSLA       # 只转换指定股票
+    python scripts/setup/build_price_store.py --force         # 忽略已有存储，全部重新转换
+"""
+
+import argparse
+import os
+import sys
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把离线YFin CSV转换为内存映射的二进制行情存储")
+    parser.add_argument("symbols", nargs="*", help="要转换的股票代码，默认全部")
+    parser.add_argument("--data-dir", help="数据目录，默认使用配置中的 data_dir")
+    parser.add_argument("--force", action="store_true", help="重新转换已是最新的股票")
+    args = parser.parse_args()
+
+    from tradingagents.dataflows.config import get_data_dir
+    from tradingagents.dataflows.price_store import get_offline_price_store
+
+    data_dir = args.data_dir or get_data_dir()
+    store = get_offline_price_store(os.path.join(data_dir, "market_data", "price_data"))
+    print(f"📁 源CSV目录: {store.price_data_dir}")
+    print(f"📦 存储目录: {store.store_dir}")
+
+    results = store.convert_all(args.symbols or None, force=args.force)
+    if not results:
+        print("⚠️ 没有找到可转换的离线行情CSV")
+        return False
+
+    failed = 0
+    for symbol, result in results.items():
+        failed += result.startswith("失败")
+        print(f"  {'❌' if result.startswith('失败') else '✅'} {symbol}: {result}")
+    print(f"\n📋 共 {len(results)} 只股票，失败 {failed} 只")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
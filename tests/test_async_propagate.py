@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+测试异步分析接口 apropagate
+使用真实的图节点和工具，LLM 替换为只支持异步调用的桩模型，
+验证节点走 ainvoke/tool.ainvoke，且多只股票在同一事件循环中并发执行
+"""
+
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import Counter
+from unittest.mock import patch
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+CALLS = Counter()
+# 同时在等待 LLM 的调用数及其峰值
+IN_FLIGHT = {"now": 0, "peak": 0}
+# 前几个调用在此等待，直到 GATE_SIZE 个调用同时在运行才一起放行；
+# 若各股票串行执行，等待会超时并让测试失败
+GATE = {"event": None, "size": 0}
+
+
+class _StubAsyncChatModel(BaseChatModel):
+    """只实现异步接口的桩模型：同步调用直接报错"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-async"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise AssertionError("apropagate 不应走同步 LLM 调用")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        CALLS["llm"] += 1
+        IN_FLIGHT["now"] += 1
+        IN_FLIGHT["peak"] = max(IN_FLIGHT["peak"], IN_FLIGHT["now"])
+        try:
+            gate = GATE["event"]
+            if not gate.is_set():
+                if IN_FLIGHT["now"] >= GATE["size"]:
+                    gate.set()
+                else:
+                    await asyncio.wait_for(gate.wait(), timeout=10)
+            await asyncio.sleep(0)
+            return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+        finally:
+            IN_FLIGHT["now"] -= 1
+
+    @staticmethod
+    def _reply(messages):
+        text = "\n".join(str(m.content) for m in messages)
+        tool_results = [m.content for m in messages if isinstance(m, ToolMessage)]
+        if "股票技术分析师" in text and not tool_results:
+            # 市场分析师第一次调用：请求统一市场数据工具
+            ticker = re.search(r"我们要分析的公司是(\w+)", text).group(1)
+            return AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": "get_stock_market_data_unified",
+                    "args": {"ticker": ticker, "start_date": "2024-12-01", "end_date": "2025-01-02"},
+                    "id": f"call_{ticker}",
+                }],
+            )
+        if tool_results:
+            return AIMessage(content=f"技术分析报告：{tool_results[-1]}")
+        return AIMessage(content="最终交易建议：持有")
+
+
+class _FakeSignalProcessor:
+    def process_signal(self, full_signal, stock_symbol=None):
+        return {"action": "持有", "stock_symbol": stock_symbol}
+
+
+async def _aget_price_data(symbol, start_date, end_date):
+    CALLS["async_tool"] += 1
+    await asyncio.sleep(0)
+    return f"price data for {symbol}"
+
+
+def _sync_price_data(*args, **kwargs):
+    raise AssertionError("apropagate 不应走同步数据接口")
+
+
+def _fundamentals_data(ticker, curr_date):
+    CALLS["fundamentals_tool"] += 1
+    return f"fundamentals for {ticker}"
+
+
+def _make_graph():
+    from tradingagents.agents.utils.agent_utils import Toolkit
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+    from tradingagents.graph.propagation import Propagator
+    from tradingagents.graph.setup import GraphSetup
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    llm = _StubAsyncChatModel()
+    toolkit = Toolkit()
+
+    ta = TradingAgentsGraph.__new__(TradingAgentsGraph)
+    ta.toolkit = toolkit
+    graph_setup = GraphSetup(
+        quick_thinking_llm=llm,
+        deep_thinking_llm=llm,
+        toolkit=toolkit,
+        tool_nodes=ta._create_tool_nodes(),
+        bull_memory=None,
+        bear_memory=None,
+        trader_memory=None,
+        invest_judge_memory=None,
+        risk_manager_memory=None,
+        conditional_logic=ConditionalLogic(),
+        config={"online_tools": True},
+    )
+    ta.debug = False
+    ta.checkpointer = None
+    ta.graph = graph_setup.setup_graph(["market", "fundamentals"])
+    ta.propagator = Propagator()
+    ta.signal_processor = _FakeSignalProcessor()
+    ta.ticker = None
+    ta.curr_state = None
+    ta._state_logs = {}
+    ta._log_lock = threading.Lock()
+    return ta
+
+
+def test_apropagate_gather():
+    """真实节点通过 asyncio.gather 并发运行多只股票"""
+    print("⚡ 测试异步分析...")
+    import tradingagents.dataflows.interface as interface
+
+    CALLS.clear()
+    IN_FLIGHT.update(now=0, peak=0)
+    tickers = ["AAPL", "MSFT", "NVDA"]
+    ta = _make_graph()
+
+    async def run_all():
+        GATE.update(event=asyncio.Event(), size=len(tickers))
+        return await asyncio.gather(*(ta.apropagate(t, "2025-01-02") for t in tickers))
+
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            with patch.multiple(
+                interface,
+                aget_YFin_data_online=_aget_price_data,
+                get_YFin_data_online=_sync_price_data,
+                get_fundamentals_openai=_fundamentals_data,
+            ):
+                results = asyncio.run(run_all())
+            print(f"  LLM调用: {CALLS['llm']}, 最大并发: {IN_FLIGHT['peak']}")
+
+            assert IN_FLIGHT["peak"] >= len(tickers)
+            assert CALLS["async_tool"] == len(tickers)
+            assert CALLS["fundamentals_tool"] == len(tickers)
+            for ticker, (final_state, decision) in zip(tickers, results):
+                assert f"price data for {ticker}" in final_state["market_report"]
+                assert final_state["fundamentals_report"] == "最终交易建议：持有"
+                assert final_state["final_trade_decision"] == "最终交易建议：持有"
+                assert decision["stock_symbol"] == ticker
+                log_file = os.path.join(
+                    "eval_results", ticker, "TradingAgentsStrategy_logs", "full_states_log.jsonl"
+                )
+                assert os.path.exists(log_file)
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ 异步分析测试通过")
+
+
+if __name__ == "__main__":
+    test_apropagate_gather()
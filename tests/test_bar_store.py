@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+测试区间感知的行情存储
+验证已覆盖的子区间直接从本地返回，扩展区间时只请求缺失部分并合并
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _fake_source(calls, date_column=None):
+    """按工作日生成收盘价为日期序号的行情"""
+    def fetch(start_date, end_date):
+        calls.append((start_date, end_date))
+        dates = pd.bdate_range(start_date, end_date)
+        data = pd.DataFrame({'Close': [float(d.toordinal()) for d in dates]})
+        if date_column is None:
+            data.index = dates.tz_localize('America/New_York')
+        else:
+            data[date_column] = dates.strftime('%Y%m%d')
+        return data
+    return fetch
+
+
+def test_sub_range_served_locally():
+    """包含在已缓存区间内的请求不访问数据源，扩展区间只请求缺口"""
+    print("📊 测试区间感知行情存储...")
+    from tradingagents.dataflows.bar_store import BarStore
+
+    calls = []
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = BarStore(store_dir)
+        fetch = _fake_source(calls)
+
+        full = store.get_bars("AAPL", "yfinance", "2023-01-01", "2024-06-30", fetch)
+        assert calls == [("2023-01-01", "2024-06-30")]
+        assert len(full) == len(pd.bdate_range("2023-01-01", "2024-06-30"))
+
+        sub = store.get_bars("AAPL", "yfinance", "2024-01-01", "2024-06-30", fetch)
+        assert len(calls) == 1
+        assert sub.index[0] == pd.Timestamp("2024-01-01")
+        assert sub.index[-1] == pd.Timestamp("2024-06-28")
+
+        # 新的存储实例（模拟次日重新运行）只请求最新的缺口
+        restarted = BarStore(store_dir)
+        extended = restarted.get_bars("AAPL", "yfinance", "2024-01-01", "2024-07-10", fetch)
+        assert calls[1:] == [("2024-07-01", "2024-07-10")]
+        assert extended.index.is_monotonic_increasing
+        assert not extended.index.duplicated().any()
+        assert extended.index[-1] == pd.Timestamp("2024-07-10")
+
+        # 前后两端都缺失时分别请求
+        restarted.get_bars("AAPL", "yfinance", "2022-12-20", "2024-07-15", fetch)
+        assert calls[2:] == [("2022-12-20", "2022-12-31"), ("2024-07-11", "2024-07-15")]
+        assert restarted.covered_intervals("AAPL", "yfinance") == [("2022-12-20", "2024-07-15")]
+
+    print("✅ 区间感知行情存储正常")
+
+
+def _frozen_now(at):
+    """替换 bar_store 中的 datetime，使 now() 固定为给定时刻"""
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return at if tz is None else at.astimezone(tz)
+    return FrozenDatetime
+
+
+def test_date_column_and_live_tail():
+    """日期在列中的数据源同样可用；未收盘的交易日按市场时区判断，不记为已覆盖"""
+    from tradingagents.dataflows import bar_store
+    from tradingagents.dataflows.bar_store import BarStore
+
+    # 上海时间 2024-07-09 23:00：A股当日已收盘，美股（纽约 11:00）仍在交易
+    original_datetime = bar_store.datetime
+    bar_store.datetime = _frozen_now(datetime(2024, 7, 9, 23, 0, tzinfo=ZoneInfo('Asia/Shanghai')))
+    try:
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = BarStore(store_dir)
+            calls = []
+            fetch = _fake_source(calls, date_column='trade_date')
+            first = store.get_bars("000001.SZ", "tushare", "2024-06-20", "2024-07-09", fetch, date_column='trade_date')
+            assert list(first.columns) == ['Close', 'trade_date']
+            store.get_bars("000001.SZ", "tushare", "2024-06-20", "2024-07-09", fetch, date_column='trade_date')
+            assert len(calls) == 1
+
+            calls = []
+            fetch = _fake_source(calls)
+            store.get_bars("AAPL", "yfinance", "2024-06-20", "2024-07-09", fetch)
+            store.get_bars("AAPL", "yfinance", "2024-06-20", "2024-07-09", fetch)
+            # 第二次只重新请求美股仍在交易的当天
+            assert calls[1] == ("2024-07-09", "2024-07-09")
+            assert store.covered_intervals("AAPL", "yfinance") == [("2024-06-20", "2024-07-08")]
+    finally:
+        bar_store.datetime = original_datetime
+
+
+def test_weekend_gap_marked_covered():
+    """没有交易日的缺口不请求数据源，直接记为已覆盖"""
+    from tradingagents.dataflows.bar_store import BarStore
+
+    calls = []
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = BarStore(store_dir)
+        fetch = _fake_source(calls)
+        store.get_bars("AAPL", "yfinance", "2024-07-01", "2024-07-05", fetch)
+        # 2024-07-06/07 为周末
+        weekend = store.get_bars("AAPL", "yfinance", "2024-07-01", "2024-07-07", fetch)
+        store.get_bars("AAPL", "yfinance", "2024-07-01", "2024-07-07", fetch)
+        assert calls == [("2024-07-01", "2024-07-05")]
+        assert len(weekend) == 5
+        assert store.covered_intervals("AAPL", "yfinance") == [("2024-07-01", "2024-07-07")]
+
+
+def test_failed_gap_not_marked_covered():
+    """数据源返回空结果时不记为已覆盖，下次重试"""
+    from tradingagents.dataflows.bar_store import BarStore
+
+    calls = []
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = BarStore(store_dir)
+
+        def failing(start_date, end_date):
+            calls.append((start_date, end_date))
+            return pd.DataFrame()
+
+        assert store.get_bars("600519", "tdx", "2024-01-01", "2024-01-31", failing).empty
+        store.get_bars("600519", "tdx", "2024-01-01", "2024-01-31", failing)
+        assert len(calls) == 2
+
+
+def test_adjusted_history_refetched_on_split():
+    """复权价格变化（拆股/分红）时丢弃本地数据并重新获取完整区间，否则只请求新K线"""
+    from tradingagents.dataflows.bar_store import BarStore
+
+    calls = []
+    factor = {'value': 1.0}
+
+    def adjusted_source(start_date, end_date):
+        calls.append((start_date, end_date))
+        dates = pd.bdate_range(start_date, end_date)
+        return pd.DataFrame({'Close': [d.toordinal() * factor['value'] for d in dates]}, index=dates)
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = BarStore(store_dir)
+        store.get_bars("AAPL", "yfinance_adjusted", "2024-01-01", "2024-03-29", adjusted_source, verify_column='Close')
+
+        # 次日增量：多请求一根已保存的K线用于比对
+        store.get_bars("AAPL", "yfinance_adjusted", "2024-01-01", "2024-04-01", adjusted_source, verify_column='Close')
+        assert calls[1] == ("2024-03-29", "2024-04-01")
+
+        factor['value'] = 0.5  # 发生拆股，历史复权价格整体变化
+        bars = store.get_bars("AAPL", "yfinance_adjusted", "2024-01-01", "2024-04-02",
+                              adjusted_source, verify_column='Close')
+        assert calls[2:] == [("2024-04-01", "2024-04-02"), ("2024-01-01", "2024-04-02")]
+        assert bars['Close'].iloc[0] == pd.Timestamp("2024-01-01").toordinal() * 0.5
+        assert len(bars) == len(pd.bdate_range("2024-01-01", "2024-04-02"))
+
+
+def test_stockstats_online_only_fetches_new_bars():
+    """在线指标按股票代码保存历史，次日只下载新增的K线"""
+    from tradingagents.dataflows import stockstats_utils
+    from tradingagents.dataflows.bar_store import BarStore
+
+    downloads = []
+
+    def fake_download(symbol, start, end, **kwargs):
+        downloads.append((start, end))
+        dates = pd.bdate_range(start, pd.Timestamp(end) - timedelta(days=1))
+        close = [100.0 + d.toordinal() % 7 for d in dates]
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000.0},
+                            index=pd.DatetimeIndex(dates, name='Date'))
+
+    original_download = stockstats_utils.yf.download
+    original_get_bar_store = stockstats_utils.get_bar_store
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = BarStore(store_dir)
+        stockstats_utils.yf.download = fake_download
+        stockstats_utils.get_bar_store = lambda: store
+        try:
+            data = stockstats_utils.StockstatsUtils.get_price_data("AAPL", "", online=True)
+            assert len(downloads) == 1
+            assert list(data.columns[:2]) == ['Date', 'Open']
+
+            # 模拟上次运行停在两天前：只补齐最近的缺口（加一根用于复权比对的K线）
+            name = store._entry_name("AAPL", "yfinance_adjusted")
+            bars, intervals = store._load(name)
+            cutoff = intervals[-1][1] - timedelta(days=2)
+            store._save(name, bars[bars.index <= cutoff], [(intervals[0][0], cutoff)])
+
+            stockstats_utils.StockstatsUtils.get_price_data("AAPL", "", online=True)
+            start, end = downloads[1]
+            assert (pd.Timestamp(end) - pd.Timestamp(start)).days <= 7
+        finally:
+            stockstats_utils.yf.download = original_download
+            stockstats_utils.get_bar_store = original_get_bar_store
+
+
+def test_stockstats_online_ends_at_settled_session():
+    """在线请求截止到该市场最近已收盘的交易日，与本地时区的日期无关"""
+    from tradingagents.dataflows import bar_store, stockstats_utils
+    from tradingagents.dataflows.bar_store import BarStore
+
+    downloads = []
+
+    def fake_download(symbol, start, end, **kwargs):
+        downloads.append((start, end))
+        dates = pd.bdate_range(start, pd.Timestamp(end) - timedelta(days=1))
+        return pd.DataFrame({'Close': [100.0] * len(dates)}, index=pd.DatetimeIndex(dates, name='Date'))
+
+    # 上海周一上午 = 纽约周日晚上：美股最近已收盘的交易日是上周五
+    frozen = _frozen_now(datetime(2024, 7, 8, 9, 0, tzinfo=ZoneInfo('Asia/Shanghai')))
+    original_datetimes = bar_store.datetime, stockstats_utils.datetime
+    original_download = stockstats_utils.yf.download
+    original_get_bar_store = stockstats_utils.get_bar_store
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = BarStore(store_dir)
+        bar_store.datetime = stockstats_utils.datetime = frozen
+        stockstats_utils.yf.download = fake_download
+        stockstats_utils.get_bar_store = lambda: store
+        try:
+            data = stockstats_utils.StockstatsUtils.get_price_data("AAPL", "", online=True)
+            assert downloads == [("2009-07-05", "2024-07-06")]
+            assert data['Date'].iloc[-1] == "2024-07-05"
+        finally:
+            bar_store.datetime, stockstats_utils.datetime = original_datetimes
+            stockstats_utils.yf.download = original_download
+            stockstats_utils.get_bar_store = original_get_bar_store
+
+
+if __name__ == "__main__":
+    test_sub_range_served_locally()
+    test_date_column_and_live_tail()
+    test_weekend_gap_marked_covered()
+    test_failed_gap_not_marked_covered()
+    test_adjusted_history_refetched_on_split()
+    test_stockstats_online_only_fetches_new_bars()
+    test_stockstats_online_ends_at_settled_session()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+测试文件缓存容量限制
+验证写入时按类别的 max_files / max_size_mb 增量淘汰，以及LRU/LFU淘汰顺序
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _fill(cache, symbols):
+    return {
+        symbol: cache.save_stock_data(symbol, f"{symbol} data", "2020-01-01", "2020-01-31", "yfinance")
+        for symbol in symbols
+    }
+
+
+def test_lru_evicts_least_recently_used():
+    """超出 max_files 时淘汰最久未访问的条目"""
+    print("🧹 测试LRU缓存淘汰...")
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        cache.cache_config['us_stock_data']['max_files'] = 3
+
+        keys = _fill(cache, ["AAA", "BBB", "CCC"])
+        cache.load_stock_data(keys["AAA"])  # AAA 最近被访问
+        evicted_path = Path(cache.metadata_index.get(keys["BBB"])['file_path'])
+
+        keys.update(_fill(cache, ["DDD"]))
+        assert cache.load_stock_data(keys["BBB"]) is None
+        assert not evicted_path.exists()
+        for symbol in ["AAA", "CCC", "DDD"]:
+            assert cache.load_stock_data(keys[symbol]) == f"{symbol} data"
+        assert cache.metadata_index.category_usage('stock_data', 'us')['count'] == 3
+
+        # 其他类别不受影响
+        cache.save_stock_data("600519", "a股数据", "2020-01-01", "2020-01-31", "tdx")
+        assert cache.metadata_index.category_usage('stock_data', 'china')['count'] == 1
+        assert cache.metadata_index.category_usage('stock_data', 'us')['count'] == 3
+    print("✅ LRU缓存淘汰正常")
+
+
+def test_lfu_and_byte_limit():
+    """LFU按访问次数淘汰；超出字节上限时同样淘汰"""
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir, eviction_policy="lfu")
+        keys = _fill(cache, ["AAA", "BBB"])
+        for _ in range(3):
+            cache.load_stock_data(keys["AAA"])
+        cache.load_stock_data(keys["BBB"])
+
+        # 字节上限只够保留两条
+        entry_size = cache.metadata_index.get(keys["AAA"])['size_bytes']
+        cache.cache_config['us_stock_data']['max_size_mb'] = (entry_size * 2.5) / (1024 * 1024)
+        keys.update(_fill(cache, ["CCC"]))
+
+        assert cache.load_stock_data(keys["BBB"]) is None
+        assert cache.load_stock_data(keys["AAA"]) == "AAA data"
+        assert cache.load_stock_data(keys["CCC"]) == "CCC data"
+
+
+def test_memory_hits_batch_access_updates():
+    """内存层命中不逐次写SQLite，访问记录在选择淘汰条目前批量写入"""
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        keys = _fill(cache, ["AAA"])
+        cache.load_stock_data(keys["AAA"])  # 文件层读取后放入内存
+
+        updates = []
+        cache.metadata_index._conn.set_trace_callback(
+            lambda sql: updates.append(sql) if sql.startswith("UPDATE") else None)
+        for _ in range(10):
+            assert cache.load_stock_data(keys["AAA"]) == "AAA data"
+        assert updates == []
+
+        cache.metadata_index.eviction_candidates('stock_data', 'us')
+        assert len(updates) == 1
+        assert cache.metadata_index.get(keys["AAA"])['access_count'] == 11
+
+
+def test_legacy_index_gets_access_columns():
+    """旧版索引打开时补齐访问记录列"""
+    import sqlite3
+    from tradingagents.dataflows.cache_index import CacheMetadataIndex
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        db_path = Path(cache_dir) / "cache_index.sqlite"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE cache_entries (cache_key TEXT PRIMARY KEY, symbol TEXT, data_type TEXT, "
+            "market_type TEXT, data_source TEXT, start_date TEXT, end_date TEXT, file_path TEXT, "
+            "file_format TEXT, cached_at TEXT, size_bytes INTEGER DEFAULT 0, extra TEXT)"
+        )
+        conn.execute("INSERT INTO cache_entries (cache_key, data_type, market_type, cached_at) "
+                     "VALUES ('k', 'stock_data', 'us', '2024-01-01T00:00:00')")
+        conn.commit()
+        conn.close()
+
+        index = CacheMetadataIndex(db_path)
+        index.touch('k')
+        assert index.get('k')['access_count'] == 1
+
+
+if __name__ == "__main__":
+    test_lru_evicts_least_recently_used()
+    test_lfu_and_byte_limit()
+    test_memory_hits_batch_access_updates()
+    test_legacy_index_gets_access_columns()
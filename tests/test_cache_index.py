@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+测试缓存元数据索引
+验证 StockDataCache 通过SQLite索引查找缓存、统计和清理，
+以及旧版 *_meta.json 元数据的自动导入
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def test_indexed_lookup_stats_and_cleanup():
+    """查找、统计、清理均通过索引完成"""
+    print("📇 测试缓存元数据索引...")
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        df = pd.DataFrame({'close': [1.0, 2.0]}, index=['2024-01-02', '2024-01-03'])
+        key = cache.save_stock_data("AAPL", df, "2024-01-01", "2024-01-31", "yfinance")
+        cache.save_stock_data("000001", "平安银行数据", "2024-01-01", "2024-01-31", "tdx")
+        cache.save_fundamentals_data("AAPL", "fundamentals report", "openai")
+
+        # 不再生成逐文件的元数据
+        assert not list(cache.metadata_dir.glob("*_meta.json"))
+
+        assert cache.find_cached_stock_data("AAPL", "2024-01-01", "2024-01-31", "yfinance") == key
+        # 日期范围不同时按 (symbol, data_type, market, source) 部分匹配，缓存区间须包含请求区间
+        assert cache.find_cached_stock_data("AAPL", "2024-01-05", "2024-01-20", "yfinance") == key
+        assert cache.find_cached_stock_data("AAPL", "2024-05-01", "2024-05-31", "yfinance") is None
+        assert cache.find_cached_stock_data("AAPL", "2023-12-20", "2024-01-20", "yfinance") is None
+        assert cache.find_cached_stock_data("AAPL", data_source="tdx") is None
+        assert cache.find_cached_fundamentals_data("AAPL", "openai") is not None
+        assert list(cache.load_stock_data(key)['close']) == [1.0, 2.0]
+
+        stats = cache.get_cache_stats()
+        assert stats['total_files'] == 3
+        assert stats['stock_data_count'] == 2
+        assert stats['fundamentals_count'] == 1
+
+        # 将一条记录改为10天前，只清理这一条
+        metadata = cache.metadata_index.get(key)
+        metadata['cached_at'] = (datetime.now() - timedelta(days=10)).isoformat()
+        cache.metadata_index.put(key, metadata)
+        cache.clear_old_cache(max_age_days=7)
+
+        assert cache.load_stock_data(key) is None
+        assert not Path(metadata['file_path']).exists()
+        assert cache.get_cache_stats()['total_files'] == 2
+
+    print("✅ 缓存元数据索引正常")
+
+
+def test_legacy_metadata_imported():
+    """旧版 *_meta.json 文件在首次打开时导入索引"""
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        metadata_dir = Path(cache_dir) / "metadata"
+        metadata_dir.mkdir()
+        data_file = Path(cache_dir) / "legacy.txt"
+        data_file.write_text("legacy data", encoding='utf-8')
+        legacy = {
+            'symbol': 'MSFT',
+            'data_type': 'stock_data',
+            'market_type': 'us',
+            'data_source': 'yfinance',
+            'file_path': str(data_file),
+            'file_format': 'txt',
+            'cached_at': datetime.now().isoformat(),
+        }
+        with open(metadata_dir / "MSFT_stock_data_abc_meta.json", 'w', encoding='utf-8') as f:
+            json.dump(legacy, f)
+
+        cache = StockDataCache(cache_dir)
+        assert cache.find_cached_stock_data("MSFT", data_source="yfinance") == "MSFT_stock_data_abc"
+        assert cache.load_stock_data("MSFT_stock_data_abc") == "legacy data"
+        assert not list(metadata_dir.glob("*_meta.json"))
+    print("✅ 旧版元数据导入正常")
+
+
+if __name__ == "__main__":
+    test_indexed_lookup_stats_and_cleanup()
+    test_legacy_metadata_imported()
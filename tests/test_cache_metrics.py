@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+测试缓存指标
+验证各缓存层的命中/未命中/过期计数、读写字节数、延迟直方图，
+以及多进程快照文件的合并
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _row(snapshot, tier, **labels):
+    for row in snapshot['summary']:
+        if row['tier'] == tier and all(row[k] == v for k, v in labels.items()):
+            return row
+    return None
+
+
+def test_file_and_memory_tiers_are_instrumented():
+    """保存、首次读取（文件）、再次读取（内存）、过期检查都有记录"""
+    print("📈 测试缓存指标...")
+    from tradingagents.dataflows.cache_manager import StockDataCache
+    from tradingagents.dataflows.cache_metrics import CacheMetrics
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        cache.metrics = CacheMetrics()
+
+        key = cache.save_stock_data("AAPL", "history", "2020-01-01", "2020-01-31", "yfinance")
+        cache.load_stock_data(key)
+        cache.load_stock_data(key)
+        cache.load_stock_data("AAPL_stock_data_missing")
+
+        news_key = cache.save_news_data("AAPL", "news", data_source="finnhub")
+        metadata = cache.metadata_index.get(news_key)
+        metadata['cached_at'] = (datetime.now() - timedelta(days=2)).isoformat()
+        cache.metadata_index.put(news_key, metadata)
+        assert not cache.is_cache_valid(news_key)
+
+        snapshot = cache.metrics.snapshot()
+        labels = {'data_type': 'stock_data', 'market': 'us'}
+        file_row = _row(snapshot, 'file', source='yfinance', **labels)
+        assert file_row['writes'] == 1 and file_row['hits'] == 1
+        assert file_row['bytes_written'] == len("history") and file_row['bytes_read'] == len("history")
+        assert file_row['latency_avg_ms'] is not None
+
+        memory_hit = _row(snapshot, 'memory', source='yfinance', **labels)
+        assert memory_hit['hits'] == 1
+        assert _row(snapshot, 'memory', source='', **labels)['misses'] == 2
+        assert _row(snapshot, 'file', source='', **labels)['misses'] == 1
+        assert _row(snapshot, 'file', data_type='news', source='finnhub')['stale'] == 1
+    print("✅ 缓存层指标正常")
+
+
+def test_source_calls_and_histogram():
+    from tradingagents.dataflows.cache_metrics import CacheMetrics, LATENCY_BUCKETS_MS
+
+    metrics = CacheMetrics()
+    with metrics.source_call("tushare", "stock_data", "china"):
+        pass
+    try:
+        with metrics.source_call("tushare", "stock_data", "china"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    metrics.record('redis', 'hit', 'stock_data', 'us', 'yfinance', latency=0.2, bytes_read=100)
+    metrics.record('redis', 'miss', 'stock_data', 'us', 'yfinance', latency=0.003)
+
+    snapshot = metrics.snapshot()
+    source_row = _row(snapshot, 'source', source='tushare')
+    assert source_row['calls'] == 1 and source_row['errors'] == 1
+    redis_row = _row(snapshot, 'redis')
+    assert redis_row['hit_rate'] == 0.5
+    assert redis_row['latency_buckets'][LATENCY_BUCKETS_MS.index(250)] == 1
+    assert redis_row['latency_p95_ms'] == 250
+
+
+def test_snapshot_files_are_merged():
+    """每个进程写自己的快照文件，页面读取时合并"""
+    from tradingagents.dataflows.cache_metrics import CacheMetrics, load_metrics_snapshot
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        first, second = CacheMetrics(snapshot_dir), CacheMetrics(snapshot_dir)
+        first.record('file', 'hit', 'stock_data', 'us', 'yfinance', latency=0.001, bytes_read=10)
+        second.record('file', 'miss', 'stock_data', 'us', 'yfinance', latency=0.001)
+        first.write_snapshot(os.path.join(snapshot_dir, "cache_metrics_1.json"))
+        second.write_snapshot(os.path.join(snapshot_dir, "cache_metrics_2.json"))
+
+        merged = load_metrics_snapshot(snapshot_dir)
+        assert merged['processes'] == 2
+        row = _row(merged, 'file')
+        assert row['hits'] == 1 and row['misses'] == 1 and row['bytes_read'] == 10
+        assert row['hit_rate'] == 0.5
+
+        # 已退出进程的快照并入归档文件，指标仍计入汇总
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        with open(os.path.join(snapshot_dir, "cache_metrics_1.json"), 'r', encoding='utf-8') as f:
+            stale = json.load(f)
+        stale['pid'] = dead.pid
+        stale_path = os.path.join(snapshot_dir, f"cache_metrics_{dead.pid}.json")
+        with open(stale_path, 'w', encoding='utf-8') as f:
+            json.dump(stale, f)
+        merged = load_metrics_snapshot(snapshot_dir)
+        assert merged['processes'] == 3 and merged['archived_processes'] == 1
+        assert _row(merged, 'file')['hits'] == 2
+        assert not os.path.exists(stale_path)
+
+        # 再次读取时归档不会重复计入
+        merged = load_metrics_snapshot(snapshot_dir)
+        assert merged['processes'] == 3 and _row(merged, 'file')['hits'] == 2
+
+        # 记录事件时按间隔自动写入快照
+        auto = CacheMetrics(os.path.join(snapshot_dir, "auto"), snapshot_interval=0)
+        auto.record('memory', 'hit')
+        assert list((auto.snapshot_dir).glob("cache_metrics_*.json"))
+
+
+if __name__ == "__main__":
+    test_file_and_memory_tiers_are_instrumented()
+    test_source_calls_and_histogram()
+    test_snapshot_files_are_merged()
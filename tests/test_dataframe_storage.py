@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+测试DataFrame列式缓存存储
+验证 StockDataCache 使用Arrow IPC保存DataFrame并保留类型，
+旧版CSV缓存在读取时自动迁移，以及数据库缓存的序列化往返
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+pytest.importorskip("pyarrow")
+
+
+def _sample_frame():
+    index = pd.date_range("2024-01-02", periods=3, freq="D", name="Date")
+    return pd.DataFrame({
+        'Open': [10.0, 10.5, 11.0],
+        'Volume': [1000, 1200, 900],
+        'Symbol': ['AAPL', 'AAPL', 'AAPL'],
+    }, index=index)
+
+
+def test_arrow_roundtrip_keeps_types():
+    """DataFrame以Arrow格式缓存，读取后索引和列类型不变"""
+    print("🏹 测试Arrow缓存存储...")
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        df = _sample_frame()
+        key = cache.save_stock_data("AAPL", df, "2024-01-01", "2024-01-31", "yfinance")
+
+        metadata = cache.metadata_index.get(key)
+        assert metadata['file_format'] == 'arrow'
+        assert metadata['file_path'].endswith('.arrow')
+
+        loaded = cache.load_stock_data(key)
+        pd.testing.assert_frame_equal(loaded, df, check_freq=False)
+        assert str(loaded['Volume'].dtype) == 'int64'
+    print("✅ Arrow缓存存储正常")
+
+
+def test_csv_entry_migrated_on_read():
+    """旧版CSV缓存读取一次后转换为Arrow格式"""
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        df = _sample_frame()
+        key = "AAPL_stock_data_legacy"
+        csv_path = cache.us_stock_dir / f"{key}.csv"
+        df.to_csv(csv_path, index=True)
+        cache._save_metadata(key, {
+            'symbol': 'AAPL', 'data_type': 'stock_data', 'market_type': 'us',
+            'data_source': 'yfinance', 'file_path': str(csv_path), 'file_format': 'csv',
+        })
+
+        first = cache.load_stock_data(key)
+        assert list(first['Open']) == [10.0, 10.5, 11.0]
+        assert not csv_path.exists()
+
+        metadata = cache.metadata_index.get(key)
+        assert metadata['file_format'] == 'arrow'
+        assert Path(metadata['file_path']).exists()
+        pd.testing.assert_frame_equal(cache.load_stock_data(key), first)
+    print("✅ CSV缓存自动迁移正常")
+
+
+class _FakeRedis:
+    """只实现 get/setex 的Redis客户端（decode_responses=True 的行为：值为str）"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+
+def test_database_cache_encoding():
+    """远程缓存层使用Arrow字节串，Redis中以base64保存"""
+    from tradingagents.dataflows.tiered_cache import RedisTier, deserialize, serialize
+
+    df = _sample_frame()
+    data_format, payload = serialize(df)
+    assert data_format == "arrow"
+    pd.testing.assert_frame_equal(deserialize(data_format, payload), df, check_freq=False)
+
+    tier = RedisTier(_FakeRedis())
+    tier.put("AAPL_stock_data_x", {'format': data_format, 'payload': payload, 'metadata': {}, 'expires_at': None})
+    assert isinstance(tier.client.values["tradingagents:cache:AAPL_stock_data_x"], str)
+    record = tier.get("AAPL_stock_data_x")
+    pd.testing.assert_frame_equal(deserialize(record['format'], record['payload']), df, check_freq=False)
+    print("✅ 数据库缓存序列化正常")
+
+
+if __name__ == "__main__":
+    test_arrow_roundtrip_keeps_types()
+    test_csv_entry_migrated_on_read()
+    test_database_cache_encoding()
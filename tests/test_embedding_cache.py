@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+测试嵌入缓存
+验证多个 FinancialSituationMemory 实例对同一文本只请求一次嵌入接口，
+磁盘缓存可跨实例复用，以及 add_situations 的批量嵌入请求
+"""
+
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _fake_fetch(calls):
+    def fetch(self, text):
+        calls.append(text)
+        return [float(len(text)), 1.0, 0.5]
+    return fetch
+
+
+def test_shared_cache_across_memories():
+    """五个记忆实例共享缓存，同一情境只嵌入一次"""
+    print("📚 测试共享嵌入缓存...")
+    import tradingagents.agents.utils.memory as memory_module
+    from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+    os.environ.setdefault("OPENAI_API_KEY", "test-key")
+    memory_module._embedding_cache = None
+    config = {"llm_provider": "openai", "backend_url": "https://api.openai.com/v1"}
+    calls = []
+
+    with patch.object(FinancialSituationMemory, "_fetch_embedding", _fake_fetch(calls)):
+        memories = [
+            FinancialSituationMemory(f"embedding_cache_test_{name}", config)
+            for name in ["bull", "bear", "trader", "judge", "risk"]
+        ]
+        curr_situation = "market report\n\nsentiment\n\nnews\n\nfundamentals"
+        for memory in memories:
+            memory.get_memories(curr_situation, n_matches=2)
+
+    print(f"  嵌入请求次数: {len(calls)}")
+    assert len(calls) == 1
+    assert memories[0].embedding_cache is memories[-1].embedding_cache
+    assert memories[0].embedding_cache.get_stats()["hits"] == 4
+    memory_module._embedding_cache = None
+    print("✅ 共享嵌入缓存正常")
+
+
+def test_disk_cache_survives_restart():
+    """磁盘缓存在新缓存实例中仍可命中"""
+    print("💾 测试磁盘嵌入缓存...")
+    from tradingagents.agents.utils.memory import EmbeddingCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = EmbeddingCache(max_entries=2, cache_dir=cache_dir)
+        key = EmbeddingCache.make_key("dashscope:text-embedding-v3", "同一段文本")
+        cache.put(key, [0.1, 0.2, 0.3])
+
+        restarted = EmbeddingCache(max_entries=2, cache_dir=cache_dir)
+        assert restarted.get(key) == [0.1, 0.2, 0.3]
+        assert restarted.get(EmbeddingCache.make_key("other-model", "同一段文本")) is None
+
+    print("✅ 磁盘嵌入缓存正常")
+
+
+def test_lru_eviction():
+    """进程内缓存按LRU淘汰"""
+    from tradingagents.agents.utils.memory import EmbeddingCache
+
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+    print("✅ LRU淘汰正常")
+
+
+def test_add_situations_batched():
+    """add_situations 按批次并发请求嵌入，而不是逐条请求"""
+    print("📦 测试批量嵌入...")
+    import threading
+    import tradingagents.agents.utils.memory as memory_module
+    from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+    os.environ.setdefault("OPENAI_API_KEY", "test-key")
+    memory_module._embedding_cache = None
+    config = {
+        "llm_provider": "openai",
+        "backend_url": "https://api.openai.com/v1",
+        "embedding_batch_size": 25,
+    }
+    batches = []
+    lock = threading.Lock()
+
+    def fake_fetch_many(self, texts):
+        with lock:
+            batches.append(len(texts))
+        return [[float(text.count("x")), 1.0, 0.0] for text in texts]
+
+    with patch.object(FinancialSituationMemory, "_fetch_embeddings", fake_fetch_many):
+        memory = FinancialSituationMemory("embedding_batch_test", config)
+        situations = [("x" * (i + 1), f"advice {i}") for i in range(100)]
+        memory.add_situations(situations)
+        assert memory.situation_collection.count() == 100
+
+        # 已缓存的文本不再请求，重复文本只请求一次
+        embeddings = memory.get_embeddings(["x", "new", "new"])
+        assert embeddings[0] == [1.0, 1.0, 0.0]
+        assert embeddings[1] == embeddings[2]
+
+    print(f"  批次大小: {batches}")
+    assert sorted(batches) == [1, 25, 25, 25, 25]
+    memory_module._embedding_cache = None
+    print("✅ 批量嵌入正常")
+
+
+if __name__ == "__main__":
+    test_shared_cache_across_memories()
+    test_disk_cache_survives_restart()
+    test_lru_eviction()
+    test_add_situations_batched()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+测试图运行检查点
+验证风险裁判失败后，使用相同 (ticker, trade_date, run_id) 重新运行会从断点恢复，
+已完成的分析师和辩论节点不会重复执行
+"""
+
+import os
+import sys
+import tempfile
+from collections import Counter
+from unittest.mock import patch
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+CALLS = Counter()
+
+
+def _counted(name, **updates):
+    def factory(*args, **kwargs):
+        def node(state):
+            CALLS[name] += 1
+            return dict(updates)
+        return node
+    return factory
+
+
+def _fake_analyst(report_key):
+    from langchain_core.messages import AIMessage
+
+    def factory(llm, toolkit):
+        def node(state):
+            CALLS[report_key] += 1
+            return {"messages": [AIMessage(content=report_key)], report_key: f"{report_key} ok"}
+        return node
+    return factory
+
+
+def _flaky_risk_judge(*args, **kwargs):
+    def node(state):
+        CALLS["risk_judge"] += 1
+        if CALLS["risk_judge"] == 1:
+            raise RuntimeError("provider 429")
+        return {"final_trade_decision": "BUY"}
+    return node
+
+
+def _build_ta(checkpointer):
+    import tradingagents.graph.setup as setup_module
+    from tradingagents.graph.setup import GraphSetup
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+    from tradingagents.graph.propagation import Propagator
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    patches = {
+        "create_market_analyst": _fake_analyst("market_report"),
+        "create_news_analyst": _fake_analyst("news_report"),
+        "create_bull_researcher": _counted(
+            "bull", investment_debate_state={"count": 2, "current_response": "Bull", "history": ""}
+        ),
+        "create_bear_researcher": _counted("bear"),
+        "create_research_manager": _counted("research_manager", investment_plan="plan"),
+        "create_trader": _counted("trader", trader_investment_plan="trade"),
+        "create_risky_debator": _counted(
+            "risky", risk_debate_state={"count": 3, "latest_speaker": "Risky", "history": ""}
+        ),
+        "create_safe_debator": _counted("safe"),
+        "create_neutral_debator": _counted("neutral"),
+        "create_risk_manager": _flaky_risk_judge,
+    }
+
+    with patch.multiple(setup_module, **patches):
+        graph_setup = GraphSetup(
+            quick_thinking_llm=None,
+            deep_thinking_llm=None,
+            toolkit=None,
+            tool_nodes={name: (lambda state: {}) for name in ["market", "social", "news", "fundamentals"]},
+            bull_memory=None,
+            bear_memory=None,
+            trader_memory=None,
+            invest_judge_memory=None,
+            risk_manager_memory=None,
+            conditional_logic=ConditionalLogic(),
+            config={},
+        )
+        graph = graph_setup.setup_graph(["market", "news"], checkpointer=checkpointer)
+
+    ta = TradingAgentsGraph.__new__(TradingAgentsGraph)
+    ta.debug = False
+    ta.checkpointer = checkpointer
+    ta.graph = graph
+    ta.propagator = Propagator()
+    return ta
+
+
+def test_resume_after_failure():
+    """风险裁判失败后从断点恢复"""
+    print("💾 测试检查点恢复...")
+    from tradingagents.graph.checkpointer import SqliteCheckpointSaver
+
+    CALLS.clear()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "checkpoints.sqlite")
+
+        ta = _build_ta(SqliteCheckpointSaver(db_path))
+        try:
+            ta._run_graph("AAPL", "2025-01-02", run_id="r1")
+            assert False, "首次运行应在风险裁判处失败"
+        except RuntimeError as e:
+            assert "429" in str(e)
+        ta.checkpointer.close()
+        assert CALLS["market_report"] == 1 and CALLS["trader"] == 1
+
+        # 模拟新进程：重新打开检查点文件
+        ta = _build_ta(SqliteCheckpointSaver(db_path))
+        final_state = ta._run_graph("AAPL", "2025-01-02", run_id="r1")
+        print(f"  调用次数: {dict(CALLS)}")
+
+        assert final_state["final_trade_decision"] == "BUY"
+        assert final_state["market_report"] == "market_report ok"
+        assert CALLS["market_report"] == 1
+        assert CALLS["news_report"] == 1
+        assert CALLS["trader"] == 1
+        assert CALLS["risk_judge"] == 2
+
+        # 已完成的运行再次调用时重新开始
+        ta._run_graph("AAPL", "2025-01-02", run_id="r1")
+        assert CALLS["market_report"] == 2
+        ta.checkpointer.close()
+
+    print("✅ 检查点恢复测试通过")
+
+
+if __name__ == "__main__":
+    test_resume_after_failure()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+测试NumPy技术指标引擎
+验证批量计算（股票数 × 时间）与 stockstats 逐只计算结果一致，
+以及新K线到达时的增量更新与全量重算一致
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows import indicator_engine as engine
+
+INDICATORS = list(engine.DEFAULT_INDICATORS) + ["close_5_sma", "rsi_6", "boll_10", "boll_ub_10"]
+
+
+def _make_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return pd.DataFrame({
+        'Date': pd.bdate_range("2020-01-01", periods=n).strftime("%Y-%m-%d"),
+        'Open': close + 0.1,
+        'High': close + rng.random(n),
+        'Low': close - rng.random(n),
+        'Close': close,
+        'Volume': rng.integers(0, 5_000, n).astype(float),
+    })
+
+
+def test_watchlist_matches_stockstats():
+    print("🧮 测试NumPy技术指标引擎...")
+    from stockstats import wrap
+
+    frames = {'AAPL': _make_frame(300, 1), 'TSM': _make_frame(40, 2), 'NEW': _make_frame(5, 3)}
+    results = engine.compute_watchlist(frames, INDICATORS)
+
+    for symbol, df in frames.items():
+        expected = wrap(df.copy())
+        assert results[symbol].index.equals(df.index)
+        for name in INDICATORS:
+            np.testing.assert_allclose(results[symbol][name].to_numpy(), expected[name].to_numpy(dtype=float),
+                                       rtol=1e-9, atol=1e-9, err_msg=f"{symbol} {name}")
+    print("✅ 批量计算与stockstats一致")
+
+
+def test_incremental_update_matches_full_recompute():
+    frames = [_make_frame(260, 4), _make_frame(30, 5), _make_frame(12, 6)]
+    arrays = {field: engine.stack_series([df[field.capitalize()].to_numpy() for df in frames])
+              for field in ('close', 'high', 'low', 'volume')}
+    full = engine.compute_indicators(arrays['close'], arrays['high'], arrays['low'], arrays['volume'], INDICATORS)
+
+    history = {field: values[:, :-2] for field, values in arrays.items()}
+    state = engine.IndicatorState.from_history(history['close'], history['high'], history['low'],
+                                               history['volume'], INDICATORS)
+    for t in (-2, -1):
+        latest = state.update(*(arrays[field][:, t] for field in ('close', 'high', 'low', 'volume')))
+        for name in INDICATORS:
+            np.testing.assert_allclose(latest[name], full[name][:, t], rtol=1e-9, atol=1e-9, err_msg=name)
+
+    # 没有新K线的股票传 NaN，指标保持不变
+    bar = [arrays[field][:, -1] + 1 for field in ('close', 'high', 'low', 'volume')]
+    bar[0][1] = np.nan
+    latest = state.update(*bar)
+    for name in INDICATORS:
+        np.testing.assert_allclose(latest[name][1], full[name][1, -1], rtol=1e-9, atol=1e-9, err_msg=name)
+
+
+def test_indicator_names():
+    assert engine.parse_indicator("close_50_sma") == ('sma', 50)
+    assert engine.parse_indicator("boll_ub") == ('boll_ub', 20)
+    assert engine.parse_indicator("mfi") == ('mfi', 14)
+    assert not engine.is_supported("kdjk")
+    try:
+        engine.compute_indicators(np.arange(10.0), indicators=["atr"])
+        assert False, "ATR without high/low should raise"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_watchlist_matches_stockstats()
+    test_incremental_update_matches_full_recompute()
+    test_indicator_names()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+测试技术指标窗口
+验证价格序列只读取一次、指标只计算一次后按日期窗口截取的结果与逐日查询一致，
+以及一次请求多个指标
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows import interface
+from tradingagents.dataflows.stockstats_utils import StockstatsUtils
+
+
+def _write_price_csv(data_dir, symbol):
+    price_dir = os.path.join(data_dir, "market_data", "price_data")
+    os.makedirs(price_dir, exist_ok=True)
+    dates = pd.bdate_range("2024-01-01", periods=120)
+    rng = np.random.default_rng(7)
+    close = 100 + rng.normal(0, 1, len(dates)).cumsum()
+    pd.DataFrame({
+        'Date': dates.strftime("%Y-%m-%d"),
+        'Open': close + 0.2,
+        'High': close + 1.0,
+        'Low': close - 1.0,
+        'Close': close,
+        'Adj Close': close,
+        'Volume': rng.integers(1_000, 5_000, len(dates)),
+    }).to_csv(os.path.join(price_dir, f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv"), index=False)
+
+
+def _window_lines(report):
+    return [line.split(": ", 1) for line in report.splitlines() if line[:4] == "2024"]
+
+
+def test_window_matches_per_day_lookup():
+    print("📐 测试技术指标窗口...")
+    original_data_dir = interface.DATA_DIR
+    with tempfile.TemporaryDirectory() as data_dir:
+        _write_price_csv(data_dir, "TEST")
+        interface.DATA_DIR = data_dir
+        try:
+            report = interface.get_stock_stats_indicators_window("TEST", "rsi", "2024-05-10", 14, False)
+            lines = _window_lines(report)
+
+            # 离线模式只列出交易日，日期降序
+            expected_dates = pd.bdate_range("2024-04-26", "2024-05-10").strftime("%Y-%m-%d")[::-1]
+            assert [date for date, _ in lines] == list(expected_dates)
+            for date, value in lines:
+                assert value == interface.get_stockstats_indicator("TEST", "rsi", date, False)
+            assert report.startswith("## rsi values from 2024-04-26 to 2024-05-10:")
+        finally:
+            interface.DATA_DIR = original_data_dir
+    print("✅ 窗口结果与逐日查询一致")
+
+
+def test_multiple_indicators_load_prices_once():
+    calls = []
+    original_data_dir = interface.DATA_DIR
+    original_get_price_data = StockstatsUtils.get_price_data
+
+    def counting_get_price_data(*args, **kwargs):
+        calls.append(args)
+        return original_get_price_data(*args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        _write_price_csv(data_dir, "TEST")
+        interface.DATA_DIR = data_dir
+        StockstatsUtils.get_price_data = staticmethod(counting_get_price_data)
+        try:
+            report = interface.get_stock_stats_indicators_window("TEST", "rsi, macd,boll_ub", "2024-05-10", 7, False)
+            assert len(calls) == 1
+            for ind in ("rsi", "macd", "boll_ub"):
+                assert f"## {ind} values from 2024-05-03 to 2024-05-10:" in report
+
+            single = interface.get_stock_stats_indicators_window("TEST", "macd", "2024-05-10", 7, False)
+            assert single in report
+
+            try:
+                interface.get_stock_stats_indicators_window("TEST", "rsi,unknown", "2024-05-10", 7, False)
+                assert False, "unsupported indicator should raise"
+            except ValueError:
+                pass
+        finally:
+            interface.DATA_DIR = original_data_dir
+            StockstatsUtils.get_price_data = original_get_price_data
+
+
+def test_online_window_marks_non_trading_days():
+    """在线模式逐个自然日列出，周末标注N/A"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        _write_price_csv(data_dir, "TEST")
+        prices = pd.read_csv(os.path.join(data_dir, "market_data", "price_data",
+                                          "TEST-YFin-data-2015-01-01-2025-03-25.csv"))
+    original_get_price_data = StockstatsUtils.get_price_data
+    StockstatsUtils.get_price_data = staticmethod(lambda *args, **kwargs: prices.copy())
+    try:
+        report = interface.get_stock_stats_indicators_window("TEST", "close_10_ema", "2024-05-13", 3, True)
+    finally:
+        StockstatsUtils.get_price_data = original_get_price_data
+
+    lines = _window_lines(report)
+    assert [date for date, _ in lines] == ["2024-05-13", "2024-05-12", "2024-05-11", "2024-05-10"]
+    assert lines[1][1] == lines[2][1] == "N/A: Not a trading day (weekend or holiday)"
+    float(lines[0][1])
+    float(lines[3][1])
+
+
+if __name__ == "__main__":
+    test_window_matches_per_day_lookup()
+    test_multiple_indicators_load_prices_once()
+    test_online_window_marks_non_trading_days()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+测试行情缓存TTL策略
+验证已收盘的历史行情永久有效，包含未收盘交易日的数据按交易日历在下一个收盘时失效
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _local(tz_name, *args):
+    """把交易所当地时间转换为本机时间（与缓存元数据一致）"""
+    return datetime(*args, tzinfo=ZoneInfo(tz_name)).astimezone().replace(tzinfo=None)
+
+
+def _shanghai(*args):
+    return _local('Asia/Shanghai', *args)
+
+
+def test_expiry_follows_trading_calendar():
+    """A股：收盘后缓存的当日数据永久有效，盘中缓存受短TTL和收盘时间限制"""
+    print("📅 测试交易日历TTL...")
+    from tradingagents.dataflows.market_calendar import market_data_expires_at
+
+    # 2024-06-14 为周五
+    assert market_data_expires_at("000001", "2024-06-14", _shanghai(2024, 6, 14, 16, 0), 3600) is None
+    assert market_data_expires_at("000001", "2024-06-13", _shanghai(2024, 6, 14, 10, 0), 3600) is None
+
+    # 盘中：短TTL
+    assert market_data_expires_at("000001", "2024-06-14", _shanghai(2024, 6, 14, 10, 0), 3600) \
+        == _shanghai(2024, 6, 14, 11, 0)
+    # 临近收盘：在收盘时失效
+    assert market_data_expires_at("000001", "2024-06-14", _shanghai(2024, 6, 14, 14, 30), 3600) \
+        == _shanghai(2024, 6, 14, 15, 0)
+    # 周末缓存的、包含周末日期的数据：到下周一收盘失效
+    assert market_data_expires_at("000001", "2024-06-15", _shanghai(2024, 6, 15, 10, 0), 3600) \
+        == _shanghai(2024, 6, 17, 15, 0)
+    # 未指定结束日期：到下一个收盘
+    assert market_data_expires_at("000001", None, _shanghai(2024, 6, 14, 16, 0), 3600) \
+        == _shanghai(2024, 6, 17, 15, 0)
+
+    # 美股按纽约时间判断
+    assert market_data_expires_at("AAPL", "2024-06-14", _local('America/New_York', 2024, 6, 14, 17, 0)) is None
+    assert market_data_expires_at("AAPL", "2024-06-14", _local('America/New_York', 2024, 6, 14, 12, 0)) \
+        == _local('America/New_York', 2024, 6, 14, 16, 0)
+    print("✅ 交易日历TTL正常")
+
+
+def test_market_detection_and_ttl_seconds():
+    from tradingagents.dataflows.market_calendar import (
+        IMMUTABLE_TTL_SECONDS, market_data_ttl_seconds, market_for_symbol
+    )
+
+    assert market_for_symbol("600519") == "china"
+    assert market_for_symbol("000001.SZ") == "china"
+    assert market_for_symbol("0700.HK") == "hk"
+    assert market_for_symbol("AAPL") == "us"
+
+    assert market_data_ttl_seconds("AAPL", "2020-01-31") == IMMUTABLE_TTL_SECONDS
+    assert market_data_ttl_seconds("000001", "2024-06-14", _shanghai(2024, 6, 14, 10, 0), 3600) == 3600
+
+
+def test_stock_cache_keeps_settled_history():
+    """StockDataCache：历史区间的缓存不因平铺TTL过期，新闻仍按平铺TTL"""
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        history_key = cache.save_stock_data("AAPL", "history", "2019-01-01", "2020-01-31", "yfinance")
+        news_key = cache.save_news_data("AAPL", "news", "2020-01-01", "2020-01-31", "finnhub")
+
+        # 将缓存时间改为10天前
+        for key in (history_key, news_key):
+            metadata = cache.metadata_index.get(key)
+            metadata['cached_at'] = (datetime.now() - timedelta(days=10)).isoformat()
+            cache.metadata_index.put(key, metadata)
+
+        assert cache.find_cached_stock_data("AAPL", "2019-01-01", "2020-01-31", "yfinance") == history_key
+        assert cache.is_cache_valid(history_key, max_age_hours=6)
+        assert not cache.is_cache_valid(news_key)
+
+        # 包含未来日期（未收盘）的数据按TTL过期
+        live_key = cache.save_stock_data("AAPL", "live", "2024-01-01", "2099-01-01", "yfinance")
+        metadata = cache.metadata_index.get(live_key)
+        metadata['cached_at'] = (datetime.now() - timedelta(days=10)).isoformat()
+        cache.metadata_index.put(live_key, metadata)
+        assert not cache.is_cache_valid(live_key)
+    print("✅ 历史行情缓存不过期")
+
+
+if __name__ == "__main__":
+    test_expiry_follows_trading_calendar()
+    test_market_detection_and_ttl_seconds()
+    test_stock_cache_keeps_settled_history()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+测试进程内内存缓存层
+验证重复读取同一缓存时直接从内存返回，按字节数淘汰，
+以及内存条目随底层缓存过期、覆盖和删除同步失效
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def test_repeated_loads_served_from_memory():
+    """同一缓存的第二次读取不再读盘"""
+    print("🧠 测试内存缓存层...")
+    from tradingagents.dataflows.cache_manager import StockDataCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        key = cache.save_stock_data("AAPL", "history text", "2020-01-01", "2020-01-31", "yfinance")
+        assert cache.load_stock_data(key) == "history text"
+
+        # 直接改写磁盘文件，内存层仍返回已加载的内容
+        data_file = Path(cache.metadata_index.get(key)['file_path'])
+        data_file.write_text("changed on disk", encoding='utf-8')
+        assert cache.load_stock_data(key) == "history text"
+        assert cache.memory_cache.get_stats()['hits'] == 1
+
+        # 重新保存同一缓存键时内存条目失效
+        cache.save_stock_data("AAPL", "refreshed", "2020-01-01", "2020-01-31", "yfinance")
+        assert cache.load_stock_data(key) == "refreshed"
+
+        # 清理后内存条目同步删除
+        metadata = cache.metadata_index.get(key)
+        metadata['cached_at'] = (datetime.now() - timedelta(days=30)).isoformat()
+        cache.metadata_index.put(key, metadata)
+        cache.clear_old_cache(max_age_days=7)
+        assert cache.load_stock_data(key) is None
+    print("✅ 内存缓存层命中正常")
+
+
+def test_memory_entry_follows_disk_expiry():
+    """已过期的底层条目不会放入内存；内存条目到期后失效"""
+    from tradingagents.dataflows.cache_manager import StockDataCache
+    from tradingagents.dataflows.memory_cache import MemoryLRUCache
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = StockDataCache(cache_dir)
+        key = cache.save_news_data("AAPL", "old news", "2020-01-01", "2020-01-31", "finnhub")
+        metadata = cache.metadata_index.get(key)
+        metadata['cached_at'] = (datetime.now() - timedelta(days=2)).isoformat()
+        cache.metadata_index.put(key, metadata)
+
+        assert cache.load_fundamentals_data(key) == "old news"
+        assert len(cache.memory_cache) == 0
+
+    memory = MemoryLRUCache(1024)
+    memory.put("soon", "value", datetime.now() + timedelta(milliseconds=1))
+    import time
+    time.sleep(0.01)
+    assert memory.get("soon") is None
+
+
+def test_byte_bound_and_dataframe_copies():
+    """超出字节上限时淘汰最久未用的条目；DataFrame返回副本"""
+    from tradingagents.dataflows.memory_cache import MemoryLRUCache
+
+    memory = MemoryLRUCache(max_bytes=25)
+    memory.put("a", "x" * 10)
+    memory.put("b", "y" * 10)
+    memory.get("a")
+    memory.put("c", "z" * 10)
+    assert memory.get("b") is None
+    assert memory.get("a") == "x" * 10
+    assert memory.current_bytes <= 25
+
+    memory = MemoryLRUCache(max_bytes=1024 * 1024)
+    df = pd.DataFrame({'Close': [1.0, 2.0]})
+    memory.put("df", df)
+    first = memory.get("df")
+    first['Close'] = 0.0
+    assert list(memory.get("df")['Close']) == [1.0, 2.0]
+
+
+if __name__ == "__main__":
+    test_repeated_loads_served_from_memory()
+    test_memory_entry_follows_disk_expiry()
+    test_byte_bound_and_dataframe_copies()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+测试NumPy向量索引记忆后端
+验证top-k余弦检索、增量追加（含扩容）、持久化重载以及通过配置选择后端
+"""
+
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _add(store, vectors, start):
+    store.add(
+        documents=[f"situation {start + i}" for i in range(len(vectors))],
+        metadatas=[{"recommendation": f"advice {start + i}"} for i in range(len(vectors))],
+        embeddings=vectors.tolist(),
+        ids=[str(start + i) for i in range(len(vectors))],
+    )
+
+
+def test_topk_matches_bruteforce_and_persists():
+    """增量追加后检索结果与暴力计算一致，并可从磁盘重新加载"""
+    print("🔢 测试NumPy向量索引...")
+    from tradingagents.agents.utils.vector_store import NumpyVectorStore
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+    query = rng.normal(size=16).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as persist_dir, \
+            patch.object(NumpyVectorStore, "INITIAL_CAPACITY", 8):
+        store = NumpyVectorStore("bull_memory", persist_dir)
+        for start in range(0, 300, 50):
+            _add(store, vectors[start:start + 50], start)
+        assert store.count() == 300
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+
+        result = store.query([query.tolist()], n_results=5)
+        assert result["ids"][0] == [str(i) for i in expected]
+        assert result["metadatas"][0][0]["recommendation"] == f"advice {expected[0]}"
+
+        reloaded = NumpyVectorStore("bull_memory", persist_dir)
+        assert reloaded.count() == 300
+        assert reloaded.query([query.tolist()], n_results=5)["ids"][0] == result["ids"][0]
+
+        # 另一个实例追加后，已打开的实例可以看到新记录
+        _add(reloaded, vectors[:1] * -1, 300)
+        assert store.count() == 301
+
+    print("✅ NumPy向量索引正常")
+
+
+def test_memory_backend_selected_by_config():
+    """memory_backend=numpy 时 FinancialSituationMemory 使用NumPy索引"""
+    print("📚 测试记忆后端选择...")
+    from tradingagents.agents.utils.memory import FinancialSituationMemory
+    from tradingagents.agents.utils.vector_store import NumpyVectorStore
+
+    def fake_fetch_many(self, texts):
+        return [[1.0 if "inflation" in t else 0.0, 1.0 if "tech" in t else 0.0, 0.1] for t in texts]
+
+    os.environ.setdefault("OPENAI_API_KEY", "test-key")
+    config = {
+        "llm_provider": "openai",
+        "backend_url": "https://api.openai.com/v1",
+        "memory_backend": "numpy",
+    }
+    with patch.object(FinancialSituationMemory, "_fetch_embeddings", fake_fetch_many):
+        memory = FinancialSituationMemory("numpy_backend_test", config)
+        assert memory.chroma_manager is None
+        memory.add_situations([
+            ("high inflation and rising rates", "buy staples"),
+            ("tech selloff", "reduce growth exposure"),
+        ])
+        assert isinstance(memory.situation_collection, NumpyVectorStore)
+
+        matches = memory.get_memories("tech weakness", n_matches=2)
+        assert matches[0]["recommendation"] == "reduce growth exposure"
+        assert matches[0]["similarity_score"] > matches[1]["similarity_score"]
+
+    print("✅ 记忆后端选择正常")
+
+
+if __name__ == "__main__":
+    test_topk_matches_bruteforce_and_persists()
+    test_memory_backend_selected_by_config()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+测试分析师并行执行拓扑
+验证 parallel_analysts 配置下各分析师分支并发运行，并在看涨研究员前汇合
+"""
+
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# 同时在运行的分析师数量及其峰值
+IN_FLIGHT = {"now": 0, "peak": 0}
+_in_flight_lock = threading.Lock()
+# 设置后分析师在此等待，只有全部分析师同时在运行时才会一起放行
+ANALYST_BARRIER = None
+
+
+def _fake_analyst(report_key, text):
+    """模拟分析师：记录并发数后直接输出报告（无工具调用）"""
+    from langchain_core.messages import AIMessage
+
+    def node(state):
+        with _in_flight_lock:
+            IN_FLIGHT["now"] += 1
+            IN_FLIGHT["peak"] = max(IN_FLIGHT["peak"], IN_FLIGHT["now"])
+        try:
+            if ANALYST_BARRIER is not None:
+                ANALYST_BARRIER.wait()
+        finally:
+            with _in_flight_lock:
+                IN_FLIGHT["now"] -= 1
+        return {"messages": [AIMessage(content=text)], report_key: text}
+
+    return lambda llm, toolkit: node
+
+
+def _fake_debate_node(**updates):
+    return lambda *args, **kwargs: (lambda state: dict(updates))
+
+
+def _build_graph(parallel, selected_analysts):
+    import tradingagents.graph.setup as setup_module
+    from tradingagents.graph.setup import GraphSetup
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+
+    patches = {
+        "create_market_analyst": _fake_analyst("market_report", "market ok"),
+        "create_social_media_analyst": _fake_analyst("sentiment_report", "social ok"),
+        "create_news_analyst": _fake_analyst("news_report", "news ok"),
+        "create_fundamentals_analyst": _fake_analyst("fundamentals_report", "fundamentals ok"),
+        "create_bull_researcher": _fake_debate_node(
+            investment_debate_state={"count": 2, "current_response": "Bull", "history": ""}
+        ),
+        "create_bear_researcher": _fake_debate_node(),
+        "create_research_manager": _fake_debate_node(investment_plan="plan"),
+        "create_trader": _fake_debate_node(trader_investment_plan="trade"),
+        "create_risky_debator": _fake_debate_node(
+            risk_debate_state={"count": 3, "latest_speaker": "Risky", "history": ""}
+        ),
+        "create_safe_debator": _fake_debate_node(),
+        "create_neutral_debator": _fake_debate_node(),
+        "create_risk_manager": _fake_debate_node(final_trade_decision="HOLD"),
+    }
+
+    with patch.multiple(setup_module, **patches):
+        graph_setup = GraphSetup(
+            quick_thinking_llm=None,
+            deep_thinking_llm=None,
+            toolkit=None,
+            tool_nodes={name: (lambda state: {}) for name in ["market", "social", "news", "fundamentals"]},
+            bull_memory=None,
+            bear_memory=None,
+            trader_memory=None,
+            invest_judge_memory=None,
+            risk_manager_memory=None,
+            conditional_logic=ConditionalLogic(),
+            config={"parallel_analysts": parallel},
+        )
+        return graph_setup.setup_graph(selected_analysts)
+
+
+def test_parallel_analysts_topology():
+    """并行模式下START应直接连接到所有分析师"""
+    print("🔧 测试并行分析师拓扑...")
+    selected = ["market", "social", "news", "fundamentals"]
+    graph = _build_graph(True, selected)
+
+    edges = graph.get_graph().edges
+    start_targets = {edge.target for edge in edges if edge.source == "__start__"}
+    expected = {f"{a.capitalize()} Analyst" for a in selected}
+    print(f"  START -> {sorted(start_targets)}")
+    assert start_targets == expected
+    print("✅ 并行拓扑正确")
+
+
+def test_parallel_analysts_run_concurrently():
+    """并行模式应同时运行全部分析师，并保留每份报告"""
+    print("⚡ 测试并行分析师执行...")
+    global ANALYST_BARRIER
+    from tradingagents.graph.propagation import Propagator
+
+    selected = ["market", "social", "news", "fundamentals"]
+    graph = _build_graph(True, selected)
+    init_state = Propagator().create_initial_state("AAPL", "2025-01-02")
+
+    # 串行执行时第一个分析师会在屏障处等待超时（BrokenBarrierError）
+    ANALYST_BARRIER = threading.Barrier(len(selected), timeout=30)
+    IN_FLIGHT["peak"] = 0
+    try:
+        final_state = graph.invoke(init_state, config={"recursion_limit": 100})
+    finally:
+        ANALYST_BARRIER = None
+    print(f"  同时运行的分析师: {IN_FLIGHT['peak']}")
+
+    assert final_state["market_report"] == "market ok"
+    assert final_state["sentiment_report"] == "social ok"
+    assert final_state["news_report"] == "news ok"
+    assert final_state["fundamentals_report"] == "fundamentals ok"
+    assert final_state["final_trade_decision"] == "HOLD"
+    assert IN_FLIGHT["peak"] == len(selected)
+    print("✅ 分析师并行执行成功")
+
+
+def test_sequential_analysts_unchanged():
+    """默认配置仍保持串行拓扑"""
+    print("🔗 测试默认串行拓扑...")
+    graph = _build_graph(False, ["market", "news"])
+
+    edges = graph.get_graph().edges
+    start_targets = {edge.target for edge in edges if edge.source == "__start__"}
+    assert start_targets == {"Market Analyst"}
+    print("✅ 串行拓扑保持不变")
+
+
+if __name__ == "__main__":
+    test_parallel_analysts_topology()
+    test_parallel_analysts_run_concurrently()
+    test_sequential_analysts_unchanged()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+测试ChromaDB持久化记忆
+验证一个进程写入的反思记忆可被另一个进程直接检索（无需重新嵌入），
+以及只读工作进程不会写入
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+from unittest.mock import patch
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+FAKE_FETCH = textwrap.dedent("""
+    def fake_fetch_many(self, texts):
+        return [[1.0 if "inflation" in t else 0.0, 1.0 if "tech" in t else 0.0, 0.1] for t in texts]
+""")
+
+
+def _config(persist_dir, read_only=False):
+    return {
+        "llm_provider": "openai",
+        "backend_url": "https://api.openai.com/v1",
+        "memory_persist_dir": persist_dir,
+        "memory_read_only": read_only,
+    }
+
+
+def test_memories_survive_process_restart():
+    """写入进程退出后，只读进程仍能检索到记忆"""
+    print("📚 测试持久化记忆...")
+    from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+    os.environ.setdefault("OPENAI_API_KEY", "test-key")
+    with tempfile.TemporaryDirectory() as persist_dir:
+        writer = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {project_root!r})
+            from tradingagents.agents.utils.memory import FinancialSituationMemory
+        """) + FAKE_FETCH + textwrap.dedent(f"""
+            FinancialSituationMemory._fetch_embeddings = fake_fetch_many
+            memory = FinancialSituationMemory("persist_test", {_config(persist_dir)!r})
+            memory.add_situations([
+                ("high inflation and rising rates", "buy staples"),
+                ("tech selloff", "reduce growth exposure"),
+            ])
+        """)
+        subprocess.run([sys.executable, "-c", writer], check=True, env=dict(os.environ))
+
+        calls = []
+        namespace = {}
+        exec(FAKE_FETCH, namespace)
+
+        def counting_fetch(self, texts):
+            calls.append(list(texts))
+            return namespace["fake_fetch_many"](self, texts)
+
+        with patch.object(FinancialSituationMemory, "_fetch_embeddings", counting_fetch):
+            reader = FinancialSituationMemory("persist_test", _config(persist_dir, read_only=True))
+            matches = reader.get_memories("inflation surprise", n_matches=1)
+            assert matches[0]["recommendation"] == "buy staples"
+
+            # 只读进程不写入
+            reader.add_situations([("new situation", "new advice")])
+            assert reader.situation_collection.count() == 2
+
+            # 不存在的集合在只读模式下返回空结果
+            missing = FinancialSituationMemory("missing_collection", _config(persist_dir, read_only=True))
+            assert missing.get_memories("anything") == []
+
+        # 只为查询文本请求了嵌入，已存储的记忆没有被重新嵌入
+        assert calls == [["inflation surprise"]]
+
+    print("✅ 持久化记忆正常")
+
+
+if __name__ == "__main__":
+    test_memories_survive_process_restart()
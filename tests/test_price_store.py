@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试离线行情二进制存储
+验证转换后的区间读取与原先按字符串过滤CSV的结果一致、列视图为内存映射，
+以及源CSV更新后自动重新转换
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows.price_store import OfflinePriceStore
+
+
+def _write_csv(price_dir, symbol, periods=600):
+    os.makedirs(price_dir, exist_ok=True)
+    dates = pd.bdate_range("2015-01-01", periods=periods)
+    close = 100 + np.arange(periods) * 0.5
+    path = os.path.join(price_dir, f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv")
+    pd.DataFrame({
+        'Date': dates.strftime("%Y-%m-%d"),
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Adj Close': close,
+        'Volume': np.arange(periods) * 100,
+    }).to_csv(path, index=False)
+    return path
+
+
+def _csv_filter(path, start_date, end_date):
+    """原先的实现：读取整个CSV后按日期字符串过滤"""
+    data = pd.read_csv(path)
+    data["DateOnly"] = data["Date"].str[:10]
+    return data[(data["DateOnly"] >= start_date) & (data["DateOnly"] <= end_date)].drop("DateOnly", axis=1)
+
+
+def test_range_reads_match_csv_filter():
+    print("🗄️ 测试离线行情二进制存储...")
+    with tempfile.TemporaryDirectory() as data_dir:
+        price_dir = os.path.join(data_dir, "market_data", "price_data")
+        csv_path = _write_csv(price_dir, "AAPL")
+        store = OfflinePriceStore(price_dir)
+
+        for start, end in [("2015-03-01", "2015-04-15"), ("2014-01-01", "2015-01-05"),
+                           ("2017-01-01", "2018-01-01"), ("2015-02-07", "2015-02-08")]:
+            expected = _csv_filter(csv_path, start, end)
+            pd.testing.assert_frame_equal(store.get_range("AAPL", start, end), expected, check_index_type=False)
+
+        assert os.path.exists(os.path.join(data_dir, "market_data", "price_store", "AAPL", "meta.json"))
+        close = store.get_column("AAPL", "Close", "2015-03-02", "2015-03-06")
+        assert isinstance(close.base, np.memmap) or isinstance(close, np.memmap)
+        assert len(close) == 5
+    print("✅ 区间读取与CSV过滤一致")
+
+
+def test_offline_interface_uses_store():
+    from tradingagents.dataflows import interface
+
+    original_data_dir = interface.DATA_DIR
+    with tempfile.TemporaryDirectory() as data_dir:
+        csv_path = _write_csv(os.path.join(data_dir, "market_data", "price_data"), "TSLA")
+        interface.DATA_DIR = data_dir
+        try:
+            data = interface.get_YFin_data("TSLA", "2015-02-01", "2015-02-28")
+            pd.testing.assert_frame_equal(
+                data, _csv_filter(csv_path, "2015-02-01", "2015-02-28").reset_index(drop=True))
+
+            report = interface.get_YFin_data_window("TSLA", "2015-02-28", 10)
+            assert report.startswith("## Raw Market Data for TSLA from 2015-02-18 to 2015-02-28:")
+            assert "2015-02-27" in report and "2015-02-17" not in report
+        finally:
+            interface.DATA_DIR = original_data_dir
+
+
+def test_updated_csv_is_reconverted():
+    with tempfile.TemporaryDirectory() as data_dir:
+        price_dir = os.path.join(data_dir, "market_data", "price_data")
+        csv_path = _write_csv(price_dir, "MSFT", periods=50)
+        store = OfflinePriceStore(price_dir)
+        assert store.convert_all() == {"MSFT": "已转换"}
+        assert store.convert_all() == {"MSFT": "已是最新"}
+        assert len(store.get_range("MSFT")) == 50
+
+        _write_csv(price_dir, "MSFT", periods=80)
+        os.utime(csv_path, (time.time() + 10, time.time() + 10))
+        assert len(store.get_range("MSFT")) == 80
+
+        try:
+            store.get_range("NOPE")
+            assert False, "missing symbol should raise"
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    test_range_reads_match_csv_filter()
+    test_offline_interface_uses_store()
+    test_updated_csv_is_reconverted()
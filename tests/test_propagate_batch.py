@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+测试批量分析接口 propagate_batch
+验证多只股票并发执行、结果逐个返回以及单只股票失败隔离
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+class _FakeGraph:
+    """模拟已编译的图：每只股票耗时固定，FAIL股票抛出异常"""
+
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, state, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if state["company_of_interest"] == "FAIL":
+                raise RuntimeError("provider 429")
+            return dict(
+                state,
+                investment_debate_state={
+                    "bull_history": "", "bear_history": "", "history": "",
+                    "current_response": "", "judge_decision": "",
+                },
+                risk_debate_state={
+                    "risky_history": "", "safe_history": "", "neutral_history": "",
+                    "history": "", "judge_decision": "",
+                },
+                trader_investment_plan="",
+                investment_plan="",
+                final_trade_decision=f"BUY {state['company_of_interest']}",
+            )
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class _FakeSignalProcessor:
+    def process_signal(self, full_signal, stock_symbol=None):
+        return {"action": "买入", "stock_symbol": stock_symbol}
+
+
+def _make_graph(fake_graph):
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+    from tradingagents.graph.propagation import Propagator
+
+    ta = TradingAgentsGraph.__new__(TradingAgentsGraph)
+    ta.debug = False
+    ta.checkpointer = None
+    ta.graph = fake_graph
+    ta.propagator = Propagator()
+    ta.signal_processor = _FakeSignalProcessor()
+    ta.ticker = None
+    ta.curr_state = None
+    ta._state_logs = {}
+    ta._log_lock = threading.Lock()
+    return ta
+
+
+def test_propagate_batch_concurrency_and_isolation():
+    """批量分析应并发执行，并且失败只影响对应股票"""
+    print("📦 测试批量分析...")
+    fake_graph = _FakeGraph()
+    ta = _make_graph(fake_graph)
+    tickers = ["AAPL", "MSFT", "FAIL", "NVDA"]
+
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            start = time.time()
+            results = list(ta.propagate_batch(tickers, "2025-01-02", max_concurrency=2))
+            elapsed = time.time() - start
+
+            by_ticker = {r["ticker"]: r for r in results}
+            print(f"  耗时: {elapsed:.2f}s, 最大并发: {fake_graph.max_active}")
+
+            assert set(by_ticker) == set(tickers)
+            assert fake_graph.max_active == 2
+            assert elapsed < fake_graph.delay * len(tickers)
+
+            assert not by_ticker["FAIL"]["success"]
+            assert "429" in by_ticker["FAIL"]["error"]
+            for ticker in ["AAPL", "MSFT", "NVDA"]:
+                assert by_ticker[ticker]["success"]
+                assert by_ticker[ticker]["decision"]["stock_symbol"] == ticker
+                log_file = os.path.join(
+                    "eval_results", ticker, "TradingAgentsStrategy_logs", "full_states_log.jsonl"
+                )
+                assert os.path.exists(log_file)
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ 批量分析测试通过")
+
+
+if __name__ == "__main__":
+    test_propagate_batch_concurrency_and_isolation()
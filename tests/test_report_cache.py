@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+测试分析师报告缓存
+验证相同 (股票, 日期, 分析师, 模型, 提示词版本) 的重复运行直接复用报告，
+以及工具集变化时缓存失效
+"""
+
+import os
+import sys
+import tempfile
+from collections import Counter
+from unittest.mock import patch
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+CALLS = Counter()
+
+
+def _fake_analyst(report_key):
+    from langchain_core.messages import AIMessage
+
+    def factory(llm, toolkit):
+        def node(state):
+            CALLS[report_key] += 1
+            text = f"{report_key} for {state['company_of_interest']}"
+            return {"messages": [AIMessage(content=text)], report_key: text}
+        return node
+    return factory
+
+
+def _fake_debate_node(**updates):
+    return lambda *args, **kwargs: (lambda state: dict(updates))
+
+
+def _build_graph(cache_dir, **config):
+    import tradingagents.graph.setup as setup_module
+    from tradingagents.graph.setup import GraphSetup
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+
+    patches = {
+        "create_market_analyst": _fake_analyst("market_report"),
+        "create_news_analyst": _fake_analyst("news_report"),
+        "create_bull_researcher": _fake_debate_node(
+            investment_debate_state={"count": 2, "current_response": "Bull", "history": ""}
+        ),
+        "create_bear_researcher": _fake_debate_node(),
+        "create_research_manager": _fake_debate_node(investment_plan="plan"),
+        "create_trader": _fake_debate_node(trader_investment_plan="trade"),
+        "create_risky_debator": _fake_debate_node(
+            risk_debate_state={"count": 3, "latest_speaker": "Risky", "history": ""}
+        ),
+        "create_safe_debator": _fake_debate_node(),
+        "create_neutral_debator": _fake_debate_node(),
+        "create_risk_manager": _fake_debate_node(final_trade_decision="HOLD"),
+    }
+
+    with patch.multiple(setup_module, **patches):
+        graph_setup = GraphSetup(
+            quick_thinking_llm=None,
+            deep_thinking_llm=None,
+            toolkit=None,
+            tool_nodes={name: (lambda state: {}) for name in ["market", "social", "news", "fundamentals"]},
+            bull_memory=None,
+            bear_memory=None,
+            trader_memory=None,
+            invest_judge_memory=None,
+            risk_manager_memory=None,
+            conditional_logic=ConditionalLogic(),
+            config={"analyst_report_cache": True, "analyst_report_cache_dir": cache_dir, **config},
+        )
+        return graph_setup.setup_graph(["market", "news"])
+
+
+def test_reports_reused_on_rerun():
+    """重复运行同一股票同一日期时分析师不再执行"""
+    print("⚡ 测试分析师报告缓存...")
+    from tradingagents.graph.propagation import Propagator
+
+    CALLS.clear()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        propagator = Propagator()
+        for _ in range(2):
+            graph = _build_graph(cache_dir)
+            final_state = graph.invoke(
+                propagator.create_initial_state("AAPL", "2025-01-02"),
+                config={"recursion_limit": 100},
+            )
+            assert final_state["market_report"] == "market_report for AAPL"
+            assert final_state["news_report"] == "news_report for AAPL"
+        assert CALLS["market_report"] == 1
+        assert CALLS["news_report"] == 1
+
+        # 不同日期不命中缓存
+        graph.invoke(
+            propagator.create_initial_state("AAPL", "2025-01-03"),
+            config={"recursion_limit": 100},
+        )
+        assert CALLS["market_report"] == 2
+
+        # 切换在线/离线工具后不复用之前的报告
+        _build_graph(cache_dir, online_tools=False).invoke(
+            propagator.create_initial_state("AAPL", "2025-01-02"),
+            config={"recursion_limit": 100},
+        )
+        assert CALLS["market_report"] == 3
+
+    print("✅ 分析师报告缓存命中正常")
+
+
+def test_fingerprint_tracks_tool_set():
+    """工具集变化时提示词指纹变化"""
+    from tradingagents.graph.report_cache import prompt_fingerprint
+
+    factory = _fake_analyst("market_report")
+    assert prompt_fingerprint(factory, ["a", "b"]) == prompt_fingerprint(factory, ["b", "a"])
+    assert prompt_fingerprint(factory, ["a", "b"]) != prompt_fingerprint(factory, ["a"])
+    print("✅ 工具集变化会使缓存失效")
+
+    # 在线/离线工具、数据源等配置变化时同样失效
+    online = prompt_fingerprint(factory, ["a"], {"online_tools": True, "DEFAULT_CHINA_DATA_SOURCE": "tushare"})
+    assert online == prompt_fingerprint(factory, ["a"], {"DEFAULT_CHINA_DATA_SOURCE": "tushare", "online_tools": True})
+    assert online != prompt_fingerprint(factory, ["a"], {"online_tools": False, "DEFAULT_CHINA_DATA_SOURCE": "tushare"})
+    assert online != prompt_fingerprint(factory, ["a"], {"online_tools": True, "DEFAULT_CHINA_DATA_SOURCE": "akshare"})
+
+
+if __name__ == "__main__":
+    test_reports_reused_on_rerun()
+    test_fingerprint_tracks_tool_set()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+测试SimFin财报索引存储
+验证按股票和发布日期查询的结果与原先扫描完整CSV的结果一致，
+以及常用股票保留在内存中、源CSV更新后自动重新预处理
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows.simfin_store import SimFinStore
+
+
+def _write_csv(simfin_dir, tickers=("AAPL", "MSFT", "TSLA"), reports=8):
+    path = os.path.join(simfin_dir, "balance_sheet", "companies", "us", "us-balance-quarterly.csv")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows = []
+    for i in range(reports):
+        for j, ticker in enumerate(tickers):
+            report_date = pd.Timestamp("2020-03-31") + pd.offsets.QuarterEnd(i)
+            rows.append({
+                'Ticker': ticker, 'SimFinId': 100 + j, 'Currency': 'USD', 'Fiscal Year': report_date.year,
+                'Fiscal Period': f"Q{report_date.quarter}", 'Report Date': report_date.strftime("%Y-%m-%d"),
+                'Publish Date': (report_date + pd.Timedelta(days=30 + j)).strftime("%Y-%m-%d"),
+                'Total Assets': float(1000 * (i + 1) + j), 'Total Liabilities': np.nan if i % 3 == 0 else 10.0 * i,
+            })
+    # 同一天发布两期（重述），原实现取CSV中先出现的那一行
+    rows.append({**rows[0], 'Total Assets': -1.0})
+    rows.reverse()
+    pd.DataFrame(rows).to_csv(path, sep=";", index=False)
+    return path
+
+
+def _csv_scan(path, ticker, curr_date):
+    """原先的实现：读取整个CSV后过滤，取发布日期最新的一行"""
+    df = pd.read_csv(path, sep=";")
+    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
+    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
+    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
+    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    if filtered_df.empty:
+        return None
+    return filtered_df.loc[filtered_df["Publish Date"].idxmax()]
+
+
+def test_point_in_time_lookup_matches_csv_scan():
+    print("📚 测试SimFin财报索引存储...")
+    with tempfile.TemporaryDirectory() as data_dir:
+        simfin_dir = os.path.join(data_dir, "fundamental_data", "simfin_data_all")
+        csv_path = _write_csv(simfin_dir)
+        store = SimFinStore(simfin_dir)
+
+        for ticker in ("AAPL", "MSFT", "TSLA", "NOPE"):
+            for curr_date in ("2020-01-01", "2020-04-30", "2020-05-01", "2020-05-02", "2021-06-15", "2030-01-01"):
+                expected = _csv_scan(csv_path, ticker, curr_date)
+                actual = store.latest_as_of(ticker, "balance_sheet", "quarterly", curr_date)
+                if expected is None:
+                    assert actual is None, (ticker, curr_date)
+                else:
+                    pd.testing.assert_series_equal(actual, expected)
+                    assert str(actual.drop("SimFinId")) == str(expected.drop("SimFinId"))
+        stats = store.get_stats()
+        assert stats['builds'] == 1 and stats['loads'] == 4 and stats['hot_hits'] > 0
+    print("✅ 截至日期的最新报表与扫描完整CSV一致")
+
+
+def test_interface_uses_store():
+    from tradingagents.dataflows import interface
+
+    original_data_dir = interface.DATA_DIR
+    with tempfile.TemporaryDirectory() as data_dir:
+        _write_csv(os.path.join(data_dir, "fundamental_data", "simfin_data_all"))
+        interface.DATA_DIR = data_dir
+        try:
+            report = interface.get_simfin_balance_sheet("MSFT", "quarterly", "2020-12-31")
+            assert report.startswith("## quarterly balance sheet for MSFT released on 2020-10-31: \n")
+            assert "SimFinId" not in report and "Total Assets" in report
+            assert interface.get_simfin_balance_sheet("MSFT", "quarterly", "2019-12-31") == ""
+        finally:
+            interface.DATA_DIR = original_data_dir
+
+
+def test_updated_csv_is_rebuilt():
+    with tempfile.TemporaryDirectory() as data_dir:
+        simfin_dir = os.path.join(data_dir, "fundamental_data", "simfin_data_all")
+        csv_path = _write_csv(simfin_dir, reports=2)
+        store = SimFinStore(simfin_dir, max_hot_tickers=2)
+        assert len(store.get_ticker("AAPL", "balance_sheet", "quarterly")) == 3
+        store.get_ticker("MSFT", "balance_sheet", "quarterly")
+        store.get_ticker("TSLA", "balance_sheet", "quarterly")
+        assert store.get_stats()['hot_tickers'] == 2
+
+        _write_csv(simfin_dir, reports=5)
+        os.utime(csv_path, (time.time() + 10, time.time() + 10))
+        assert len(store.get_ticker("AAPL", "balance_sheet", "quarterly")) == 6
+        assert store.get_stats()['builds'] == 2
+
+        # 另一个进程中的实例直接复用已预处理的存储
+        other = SimFinStore(simfin_dir)
+        assert len(other.get_ticker("TSLA", "balance_sheet", "quarterly")) == 5
+        assert other.get_stats()['builds'] == 0
+
+        try:
+            store.latest_as_of("AAPL", "cash_flow", "quarterly", "2021-01-01")
+            assert False, "missing csv should raise"
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == "__main__":
+    test_point_in_time_lookup_matches_csv_scan()
+    test_interface_uses_store()
+    test_updated_csv_is_rebuilt()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+测试请求合并（single-flight）
+验证并发的相同请求只执行一次，异常同样共享，以及跨进程共享首个进程的结果
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _run_concurrently(target, count=8):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_identical_requests_share_one_fetch():
+    """8个线程同时请求同一数据，只触发一次获取"""
+    print("🔀 测试请求合并...")
+    from tradingagents.dataflows.single_flight import SingleFlight
+
+    with tempfile.TemporaryDirectory() as lock_dir:
+        flight = SingleFlight(lock_dir)
+        calls = []
+
+        def slow_fetch(symbol):
+            calls.append(symbol)
+            time.sleep(0.2)
+            return f"{symbol} data"
+
+        results = _run_concurrently(lambda: flight.do("stock:AAPL", slow_fetch, "AAPL"))
+        assert results == ["AAPL data"] * 8
+        assert len(calls) == 1
+        assert flight.get_stats()['shared'] == 7
+        assert flight.in_flight() == 0
+
+        # 不同请求互不合并
+        flight.do("stock:MSFT", slow_fetch, "MSFT")
+        assert calls == ["AAPL", "MSFT"]
+    print("✅ 并发请求只获取一次")
+
+
+def test_errors_are_shared_and_not_cached():
+    from tradingagents.dataflows.single_flight import SingleFlight
+
+    flight = SingleFlight()
+    attempts = []
+
+    def failing():
+        attempts.append(1)
+        time.sleep(0.2)
+        raise ValueError("upstream down")
+
+    results = _run_concurrently(lambda: flight.do("k", failing), count=4)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(attempts) == 1
+
+    # 失败结果不会保留，下一次调用重新执行
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_decorator_keys_on_arguments():
+    from tradingagents.dataflows import single_flight as sf
+
+    with tempfile.TemporaryDirectory() as lock_dir:
+        original = sf._single_flight
+        sf._single_flight = sf.SingleFlight(lock_dir)
+        try:
+            calls = []
+
+            @sf.single_flight("demo")
+            def fetch(symbol, start_date=None):
+                calls.append((symbol, start_date))
+                time.sleep(0.2)
+                return symbol
+
+            results = _run_concurrently(lambda: fetch("600519", start_date="2024-01-01"), count=4)
+            assert results == ["600519"] * 4
+            assert calls == [("600519", "2024-01-01")]
+            assert fetch.__name__ == "fetch"
+        finally:
+            sf._single_flight = original
+
+
+def test_follower_stops_waiting_for_hung_leader():
+    """首个线程卡住时，后到的线程等待超时后直接执行"""
+    from tradingagents.dataflows.single_flight import SingleFlight
+
+    flight = SingleFlight(wait_timeout=0.2)
+    started, release = threading.Event(), threading.Event()
+
+    def hung_fetch():
+        started.set()
+        release.wait(10)
+        return "leader data"
+
+    leader = threading.Thread(target=lambda: flight.do("k", hung_fetch))
+    leader.start()
+    try:
+        assert started.wait(5)
+        assert flight.do("k", lambda: "follower data") == "follower data"
+        assert flight.get_stats()['wait_timeouts'] == 1
+    finally:
+        release.set()
+        leader.join()
+
+
+def test_expired_result_files_are_swept():
+    """锁文件目录中的共享结果与Redis结果有相同的有效期，过期后被清理"""
+    from tradingagents.dataflows.single_flight import FCNTL_AVAILABLE, MSVCRT_AVAILABLE, SingleFlight
+    if not (FCNTL_AVAILABLE or MSVCRT_AVAILABLE):
+        return
+
+    with tempfile.TemporaryDirectory() as lock_dir:
+        flight = SingleFlight(lock_dir, result_ttl=60)
+        flight.do("stock:AAPL", lambda: "AAPL data")
+        results = [name for name in os.listdir(lock_dir) if name.endswith(".result")]
+        assert len(results) == 1
+        old = time.time() - 120
+        os.utime(os.path.join(lock_dir, results[0]), (old, old))
+
+        flight._last_sweep = 0
+        flight.do("stock:MSFT", lambda: "MSFT data")
+        assert results[0] not in os.listdir(lock_dir)
+        assert len([name for name in os.listdir(lock_dir) if name.endswith(".result")]) == 1
+
+
+_CHILD_SCRIPT = """
+import os, sys, time
+sys.path.insert(0, {root!r})
+from tradingagents.dataflows.single_flight import SingleFlight
+
+def fetch():
+    with open({log!r}, 'a') as f:
+        f.write('start %f\\n' % time.time())
+    # 等测试放行，保证后到的进程在获取期间开始等待
+    while not os.path.exists({go!r}):
+        time.sleep(0.02)
+    with open({log!r}, 'a') as f:
+        f.write('end %f\\n' % time.time())
+    return 'data from %s' % sys.argv[1]
+
+flight = SingleFlight({lock_dir!r})
+open({ready!r} + sys.argv[1], 'w').close()
+print(flight.do('stock:000001', fetch))
+print(flight.get_stats()['shared_across_processes'])
+"""
+
+
+def test_lock_file_shares_result_across_processes():
+    """后到的进程等待锁释放后直接使用首个进程的结果，不重复获取；之后的新请求重新执行"""
+    from tradingagents.dataflows.single_flight import FCNTL_AVAILABLE, MSVCRT_AVAILABLE
+    if not (FCNTL_AVAILABLE or MSVCRT_AVAILABLE):
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "fetch.log")
+        go, ready = os.path.join(tmp, "go"), os.path.join(tmp, "ready-")
+        script = _CHILD_SCRIPT.format(root=project_root, log=log, lock_dir=os.path.join(tmp, "locks"),
+                                      go=go, ready=ready)
+
+        def wait_for(path):
+            deadline = time.time() + 60
+            while not os.path.exists(path) and time.time() < deadline:
+                time.sleep(0.02)
+
+        def run(name):
+            return subprocess.Popen([sys.executable, "-c", script, name], stdout=subprocess.PIPE, text=True)
+
+        leader = run("leader")
+        wait_for(log)
+        follower = run("follower")
+        wait_for(ready + "follower")
+        time.sleep(0.3)
+        open(go, 'w').close()
+        outputs = [p.communicate(timeout=60)[0].split() for p in (leader, follower)]
+        assert outputs[0] == ["data", "from", "leader", "0"]
+        assert outputs[1] == ["data", "from", "leader", "1"]
+        with open(log) as f:
+            assert [line.split()[0] for line in f.read().splitlines()] == ["start", "end"]
+
+        # 没有并发时重新执行
+        later = run("later")
+        assert later.communicate(timeout=60)[0].split() == ["data", "from", "later", "0"]
+    print("✅ 跨进程共享请求结果正常")
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_requests_share_one_fetch()
+    test_errors_are_shared_and_not_cached()
+    test_decorator_keys_on_arguments()
+    test_follower_stops_waiting_for_hung_leader()
+    test_expired_result_files_are_swept()
+    test_lock_file_shares_result_across_processes()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+测试 stale-while-revalidate
+验证过期不久的行情缓存立即返回并在后台刷新，过期太久的缓存不再先行返回
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _age_entry(cache, key, days):
+    metadata = cache.metadata_index.get(key)
+    metadata['cached_at'] = (datetime.now() - timedelta(days=days)).isoformat()
+    cache.metadata_index.put(key, metadata)
+    if cache.memory_cache is not None:
+        cache.memory_cache.clear()
+
+
+def _make_provider(cache_dir, max_stale_hours):
+    from tradingagents.dataflows.cache_manager import StockDataCache
+    from tradingagents.dataflows.optimized_us_data import OptimizedUSDataProvider
+
+    provider = OptimizedUSDataProvider()
+    provider.cache = StockDataCache(cache_dir)
+    provider.config = {"stale_while_revalidate": True, "max_stale_hours": max_stale_hours}
+    provider.min_api_interval = 0
+    return provider
+
+
+def test_stale_entry_served_and_refreshed_in_background():
+    """过期缓存立即返回，数据源在后台调用后缓存被更新"""
+    print("🕰️ 测试 stale-while-revalidate...")
+    from tradingagents.dataflows.background_refresh import get_background_refresher
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        provider = _make_provider(cache_dir, max_stale_hours=24 * 30)
+        key = provider.cache.save_stock_data("AAPL", "old data", "2024-01-01", "2099-01-01", "finnhub")
+        _age_entry(provider.cache, key, days=10)
+
+        fetched = threading.Event()
+
+        def slow_finnhub(symbol, start_date, end_date):
+            time.sleep(0.3)
+            fetched.set()
+            return "fresh data"
+
+        provider._get_data_from_finnhub = slow_finnhub
+
+        started = time.time()
+        assert provider.get_stock_data("AAPL", "2024-01-01", "2099-01-01") == "old data"
+        assert time.time() - started < 0.3
+
+        assert fetched.wait(5)
+        deadline = time.time() + 5
+        while get_background_refresher().is_pending("us_stock_data:AAPL:2024-01-01:2099-01-01"):
+            assert time.time() < deadline
+            time.sleep(0.05)
+        assert provider.get_stock_data("AAPL", "2024-01-01", "2099-01-01") == "fresh data"
+    print("✅ 过期缓存先行返回，后台刷新成功")
+
+
+def test_entries_beyond_max_staleness_fetch_synchronously():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        provider = _make_provider(cache_dir, max_stale_hours=1)
+        key = provider.cache.save_stock_data("MSFT", "very old", "2024-01-01", "2099-01-01", "finnhub")
+        _age_entry(provider.cache, key, days=10)
+        provider._get_data_from_finnhub = lambda symbol, start_date, end_date: "synchronous data"
+
+        assert provider.get_stock_data("MSFT", "2024-01-01", "2099-01-01") == "synchronous data"
+
+        # 关闭开关后同样同步获取
+        provider.config["max_stale_hours"] = 24 * 30
+        provider.config["stale_while_revalidate"] = False
+        _age_entry(provider.cache, key, days=10)
+        assert provider.cache.find_stale_stock_data("MSFT", "2024-01-01", "2099-01-01", "finnhub", 24 * 30) == key
+        provider._get_data_from_finnhub = lambda symbol, start_date, end_date: "switched off"
+        assert provider.get_stock_data("MSFT", "2024-01-01", "2099-01-01") == "switched off"
+
+        # 未配置时默认关闭
+        provider.config = {"max_stale_hours": 24 * 30}
+        _age_entry(provider.cache, key, days=10)
+        provider._get_data_from_finnhub = lambda symbol, start_date, end_date: "default off"
+        assert provider.get_stock_data("MSFT", "2024-01-01", "2099-01-01") == "default off"
+
+
+def test_refresher_deduplicates_keys():
+    from tradingagents.dataflows.background_refresh import BackgroundRefresher
+
+    refresher = BackgroundRefresher(max_workers=1)
+    release = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        release.wait(5)
+
+    first = refresher.schedule("k", refresh)
+    assert refresher.schedule("k", refresh) is None
+    release.set()
+    first.result(timeout=5)
+    assert calls == [1]
+    assert refresher.get_stats()['skipped'] == 1
+
+
+if __name__ == "__main__":
+    test_stale_entry_served_and_refreshed_in_background()
+    test_entries_beyond_max_staleness_fetch_synchronously()
+    test_refresher_deduplicates_keys()
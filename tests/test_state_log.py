@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+测试追加式状态日志 StateLog
+验证按日期读取、重复日期覆盖、索引重建以及旧版JSON日志迁移
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def _entry(trade_date, decision):
+    return {"trade_date": trade_date, "final_trade_decision": decision}
+
+
+def test_append_and_read_single_date():
+    """追加写入后可单独读取任意日期"""
+    print("📝 测试状态日志追加与读取...")
+    from tradingagents.graph.state_log import StateLog
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = StateLog(tmp_dir)
+        for day in range(1, 6):
+            date = f"2025-01-0{day}"
+            log.append(date, _entry(date, f"决策{day}"))
+        log.append("2025-01-03", _entry("2025-01-03", "重新运行"))
+
+        assert len(log) == 5
+        assert log.read("2025-01-02")["final_trade_decision"] == "决策2"
+        assert log.read("2025-01-03")["final_trade_decision"] == "重新运行"
+        assert log.read("2025-02-01") is None
+
+        # 每次运行只追加一行
+        with open(os.path.join(tmp_dir, StateLog.DATA_FILE), encoding="utf-8") as f:
+            assert len(f.readlines()) == 6
+
+        # 重新打开后索引仍可用
+        reopened = StateLog(tmp_dir)
+        assert reopened.dates() == [f"2025-01-0{day}" for day in range(1, 6)]
+        assert reopened.read("2025-01-05")["final_trade_decision"] == "决策5"
+
+    print("✅ 状态日志读写正常")
+
+
+def test_rebuild_missing_index():
+    """索引文件丢失时从数据文件重建"""
+    print("🔧 测试索引重建...")
+    from tradingagents.graph.state_log import StateLog
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = StateLog(tmp_dir)
+        log.append("2025-01-02", _entry("2025-01-02", "BUY"))
+        log.append("2025-01-03", _entry("2025-01-03", "SELL"))
+        os.remove(os.path.join(tmp_dir, StateLog.INDEX_FILE))
+
+        rebuilt = StateLog(tmp_dir)
+        assert rebuilt.read("2025-01-03")["final_trade_decision"] == "SELL"
+        assert os.path.exists(os.path.join(tmp_dir, StateLog.INDEX_FILE))
+
+    print("✅ 索引重建正常")
+
+
+def test_migrate_legacy_json():
+    """旧版 full_states_log.json 会被导入"""
+    print("📦 测试旧版日志迁移...")
+    from tradingagents.graph.state_log import StateLog
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy = {"2024-12-30": _entry("2024-12-30", "HOLD")}
+        with open(os.path.join(tmp_dir, StateLog.LEGACY_FILE), "w", encoding="utf-8") as f:
+            json.dump(legacy, f, indent=4)
+
+        log = StateLog(tmp_dir)
+        assert log.read("2024-12-30")["final_trade_decision"] == "HOLD"
+
+    print("✅ 旧版日志迁移正常")
+
+
+if __name__ == "__main__":
+    test_append_and_read_single_date()
+    test_rebuild_missing_index()
+    test_migrate_legacy_json()
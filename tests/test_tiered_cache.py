@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+测试统一分层缓存
+验证各缓存管理器共用同一套缓存键，远程层后台写入、本地未命中时读取回填，
+以及可插拔的序列化器
+"""
+
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from tradingagents.dataflows.tiered_cache import CacheTier
+
+
+class DictTier(CacheTier):
+    """基于字典的缓存层，用于模拟同一台Redis/MongoDB被多个进程共享"""
+
+    def __init__(self, name):
+        self.name = name
+        self.records = {}
+
+    def get(self, cache_key):
+        return self.records.get(cache_key)
+
+    def put(self, cache_key, record):
+        self.records[cache_key] = record
+
+    def delete(self, cache_key):
+        self.records.pop(cache_key, None)
+
+
+def test_single_key_schema():
+    """文件缓存、数据库缓存和自适应缓存入口读写同一个缓存，生成相同的行情缓存键"""
+    from tradingagents.dataflows import adaptive_cache, cache_manager, db_cache_manager
+    from tradingagents.dataflows.tiered_cache import make_cache_key
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = cache_manager.StockDataCache(cache_dir)
+        original_get_cache = (adaptive_cache.get_cache, db_cache_manager.get_cache)
+        adaptive_cache.get_cache = db_cache_manager.get_cache = lambda: cache
+        try:
+            adaptive = adaptive_cache.AdaptiveCacheSystem()
+            db = db_cache_manager.DatabaseCacheManager()
+            file_key = cache.save_stock_data("AAPL", "x", "2024-01-01", "2024-01-31", "yfinance")
+            assert adaptive.find_cached_data("AAPL", "2024-01-01", "2024-01-31", "yfinance") == file_key
+            assert db.find_cached_stock_data("AAPL", "2024-01-01", "2024-01-31", "yfinance") == file_key
+            assert adaptive.load_data(file_key) == "x"
+
+            db_key = db.save_stock_data("MSFT", "y", "2024-01-01", "2024-01-31", "yfinance")
+            assert adaptive.save_data("MSFT", "y", "2024-01-01", "2024-01-31", "yfinance") == db_key
+            assert cache.load_stock_data(db_key) == "y"
+        finally:
+            adaptive_cache.get_cache, db_cache_manager.get_cache = original_get_cache
+    assert make_cache_key("news_data", "AAPL", source="x") == make_cache_key("news", "AAPL", source="x")
+
+
+def test_write_behind_and_read_through():
+    """一个进程写入后，另一个进程从远程层读取并回填本地，保留原缓存时间"""
+    print("🏗️ 测试统一分层缓存...")
+    from tradingagents.dataflows.cache_manager import StockDataCache
+    from tradingagents.dataflows.tiered_cache import RemoteCacheTiers
+
+    redis_tier, mongo_tier = DictTier("redis"), DictTier("mongodb")
+    df = pd.DataFrame({'Close': [1.0, 2.0, 3.0]}, index=pd.date_range("2020-01-01", periods=3))
+
+    with tempfile.TemporaryDirectory() as dir_a, tempfile.TemporaryDirectory() as dir_b:
+        writer = StockDataCache(dir_a, remote_tiers=RemoteCacheTiers([redis_tier, mongo_tier]))
+        key = writer.save_stock_data("AAPL", df, "2020-01-01", "2020-01-03", "yfinance")
+        writer.remote_tiers.flush(timeout=5)
+        assert key in redis_tier.records and key in mongo_tier.records
+        assert redis_tier.records[key]['format'] == "arrow"
+
+        reader = StockDataCache(dir_b, remote_tiers=RemoteCacheTiers([redis_tier, mongo_tier]))
+        assert reader.find_cached_stock_data("AAPL", "2020-01-01", "2020-01-03", "yfinance") == key
+        pd.testing.assert_frame_equal(reader.load_stock_data(key), df, check_freq=False)
+        assert reader.metadata_index.get(key)['cached_at'] == writer.metadata_index.get(key)['cached_at']
+        assert reader.remote_tiers.get_stats()['hits']['redis'] == 1
+
+        # 之后的读取由本地层完成
+        reader.load_stock_data(key)
+        assert reader.remote_tiers.get_stats()['hits']['redis'] == 1
+    print("✅ 远程层后台写入和回填正常")
+
+
+def test_slower_tier_hit_promotes_to_faster_tier():
+    from tradingagents.dataflows.cache_manager import StockDataCache
+    from tradingagents.dataflows.tiered_cache import RemoteCacheTiers
+
+    redis_tier, mongo_tier = DictTier("redis"), DictTier("mongodb")
+    with tempfile.TemporaryDirectory() as dir_a, tempfile.TemporaryDirectory() as dir_b:
+        writer = StockDataCache(dir_a, remote_tiers=RemoteCacheTiers([redis_tier, mongo_tier]))
+        key = writer.save_fundamentals_data("AAPL", "fundamentals report", "openai")
+        writer.remote_tiers.flush(timeout=5)
+        redis_tier.records.clear()  # 模拟Redis条目已被驱逐
+
+        reader = StockDataCache(dir_b, remote_tiers=RemoteCacheTiers([redis_tier, mongo_tier]))
+        assert reader.find_cached_fundamentals_data("AAPL", data_source="openai") == key
+        assert reader.load_fundamentals_data(key) == "fundamentals report"
+        reader.remote_tiers.flush(timeout=5)
+        assert key in redis_tier.records
+
+
+def test_custom_serializer():
+    from tradingagents.dataflows import tiered_cache
+
+    class UpperSerializer(tiered_cache.Serializer):
+        name = "upper"
+
+        def can_serialize(self, value):
+            return isinstance(value, str) and value.startswith("!")
+
+        def dumps(self, value):
+            return value.upper().encode('utf-8')
+
+        def loads(self, payload):
+            return payload.decode('utf-8').lower()
+
+    original = list(tiered_cache._serializers)
+    try:
+        tiered_cache.register_serializer(UpperSerializer())
+        assert tiered_cache.serialize("!abc") == ("upper", b"!ABC")
+        assert tiered_cache.serialize("abc") == ("text", b"abc")
+        assert tiered_cache.deserialize("upper", b"!ABC") == "!abc"
+    finally:
+        tiered_cache._serializers = original
+
+
+def test_incomplete_tier_fails_on_instantiation():
+    class NoDeleteTier(CacheTier):
+        name = "broken"
+
+        def get(self, cache_key):
+            return None
+
+        def put(self, cache_key, record):
+            pass
+
+    try:
+        NoDeleteTier()
+        assert False, "tier without delete() should not be instantiable"
+    except TypeError:
+        pass
+
+
+if __name__ == "__main__":
+    test_single_key_schema()
+    test_write_behind_and_read_through()
+    test_slower_tier_hit_promotes_to_faster_tier()
+    test_custom_serializer()
+    test_incomplete_tier_fails_on_instantiation()
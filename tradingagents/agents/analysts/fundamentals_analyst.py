@@ -5,10 +5,11 @@
 
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import AIMessage
+from tradingagents.agents.utils.agent_utils import AgentNode
 
 
 def create_fundamentals_analyst(llm, toolkit):
-    def fundamentals_analyst_node(state):
+    def build_chain(state):
         print(f"📊 [DEBUG] ===== 基本面分析师节点开始 =====")
 
         current_date = state["trade_date"]
@@ -164,10 +165,9 @@ def create_fundamentals_analyst(llm, toolkit):
             print(f"📊 [DEBUG] ❌ 工具绑定失败: {e}")
             raise e
 
-        print(f"📊 [DEBUG] 调用LLM链...")
-        result = chain.invoke(state["messages"])
-        print(f"📊 [DEBUG] LLM调用完成")
+        return chain, tools, fresh_llm
 
+    def inspect_result(tools, result):
         print(f"📊 [DEBUG] 结果类型: {type(result)}")
         print(f"📊 [DEBUG] 工具调用数量: {len(result.tool_calls) if hasattr(result, 'tool_calls') else 0}")
         print(f"📊 [DEBUG] 内容长度: {len(result.content) if hasattr(result, 'content') else 0}")
@@ -187,57 +187,83 @@ def create_fundamentals_analyst(llm, toolkit):
         print(f"📊 [DEBUG] 期望的工具: {expected_tools}")
         print(f"📊 [DEBUG] 实际调用的工具: {actual_tools}")
 
-        # 处理基本面分析报告
-        if hasattr(result, 'tool_calls') and len(result.tool_calls) > 0:
-            # 有工具调用，记录工具调用信息
-            tool_calls_info = []
-            for tc in result.tool_calls:
-                tool_calls_info.append(tc['name'])
-                print(f"📊 [DEBUG] 工具调用 {len(tool_calls_info)}: {tc}")
-            
-            print(f"📊 [基本面分析师] 工具调用: {tool_calls_info}")
-            
-            # 返回状态，让工具执行
-            return {"messages": [result]}
-        
-        else:
-            # 没有工具调用，使用阿里百炼强制工具调用修复
-            print(f"📊 [DEBUG] 检测到模型未调用工具，启用强制工具调用模式")
-            
-            # 强制调用统一基本面分析工具
-            try:
-                print(f"📊 [DEBUG] 强制调用 get_stock_fundamentals_unified...")
-                # 安全地查找统一基本面分析工具
-                unified_tool = None
-                for tool in tools:
-                    tool_name = None
-                    if hasattr(tool, 'name'):
-                        tool_name = tool.name
-                    elif hasattr(tool, '__name__'):
-                        tool_name = tool.__name__
-
-                    if tool_name == 'get_stock_fundamentals_unified':
-                        unified_tool = tool
-                        break
-                if unified_tool:
-                    combined_data = unified_tool.invoke({
-                        'ticker': ticker,
-                        'start_date': start_date,
-                        'end_date': current_date,
-                        'curr_date': current_date
-                    })
-                    print(f"📊 [DEBUG] 统一工具数据获取成功，长度: {len(combined_data)}字符")
-                else:
-                    combined_data = "统一基本面分析工具不可用"
-                    print(f"📊 [DEBUG] 统一工具未找到")
-            except Exception as e:
-                combined_data = f"统一基本面分析工具调用失败: {e}"
-                print(f"📊 [DEBUG] 统一工具调用异常: {e}")
-            
-            currency_info = f"{market_info['currency_name']}（{market_info['currency_symbol']}）"
-            
-            # 生成基于真实数据的分析报告
-            analysis_prompt = f"""基于以下真实数据，对股票{ticker}进行详细的基本面分析：
+        return hasattr(result, 'tool_calls') and len(result.tool_calls) > 0
+
+    def build_tool_call_update(result):
+        # 有工具调用，记录工具调用信息
+        tool_calls_info = []
+        for tc in result.tool_calls:
+            tool_calls_info.append(tc['name'])
+            print(f"📊 [DEBUG] 工具调用 {len(tool_calls_info)}: {tc}")
+
+        print(f"📊 [基本面分析师] 工具调用: {tool_calls_info}")
+
+        # 返回状态，让工具执行
+        return {"messages": [result]}
+
+    def find_unified_tool(tools):
+        # 安全地查找统一基本面分析工具
+        for tool in tools:
+            tool_name = None
+            if hasattr(tool, 'name'):
+                tool_name = tool.name
+            elif hasattr(tool, '__name__'):
+                tool_name = tool.__name__
+
+            if tool_name == 'get_stock_fundamentals_unified':
+                return tool
+        return None
+
+    def unified_tool_args(state):
+        current_date = state["trade_date"]
+        return {
+            'ticker': state["company_of_interest"],
+            'start_date': '2025-05-28',
+            'end_date': current_date,
+            'curr_date': current_date
+        }
+
+    def fetch_unified_data(state, tools):
+        # 强制调用统一基本面分析工具
+        try:
+            print(f"📊 [DEBUG] 强制调用 get_stock_fundamentals_unified...")
+            unified_tool = find_unified_tool(tools)
+            if unified_tool:
+                combined_data = unified_tool.invoke(unified_tool_args(state))
+                print(f"📊 [DEBUG] 统一工具数据获取成功，长度: {len(combined_data)}字符")
+            else:
+                combined_data = "统一基本面分析工具不可用"
+                print(f"📊 [DEBUG] 统一工具未找到")
+        except Exception as e:
+            combined_data = f"统一基本面分析工具调用失败: {e}"
+            print(f"📊 [DEBUG] 统一工具调用异常: {e}")
+        return combined_data
+
+    async def afetch_unified_data(state, tools):
+        # 强制调用统一基本面分析工具
+        try:
+            print(f"📊 [DEBUG] 强制调用 get_stock_fundamentals_unified...")
+            unified_tool = find_unified_tool(tools)
+            if unified_tool:
+                combined_data = await unified_tool.ainvoke(unified_tool_args(state))
+                print(f"📊 [DEBUG] 统一工具数据获取成功，长度: {len(combined_data)}字符")
+            else:
+                combined_data = "统一基本面分析工具不可用"
+                print(f"📊 [DEBUG] 统一工具未找到")
+        except Exception as e:
+            combined_data = f"统一基本面分析工具调用失败: {e}"
+            print(f"📊 [DEBUG] 统一工具调用异常: {e}")
+        return combined_data
+
+    def build_analysis_input(state, combined_data):
+        from tradingagents.utils.stock_utils import StockUtils
+
+        ticker = state["company_of_interest"]
+        market_info = StockUtils.get_market_info(ticker)
+        currency_info = f"{market_info['currency_name']}（{market_info['currency_symbol']}）"
+
+        # 生成基于真实数据的分析报告
+        analysis_prompt = f"""基于以下真实数据，对股票{ticker}进行详细的基本面分析：
 
 {combined_data}
 
@@ -254,31 +280,71 @@ def create_fundamentals_analyst(llm, toolkit):
 - 投资建议使用中文
 - 分析要详细且专业"""
 
-            try:
-                # 创建简单的分析链
-                analysis_prompt_template = ChatPromptTemplate.from_messages([
-                    ("system", "你是专业的股票基本面分析师，基于提供的真实数据进行分析。"),
-                    ("human", "{analysis_request}")
-                ])
-                
-                analysis_chain = analysis_prompt_template | fresh_llm
-                analysis_result = analysis_chain.invoke({"analysis_request": analysis_prompt})
-                
-                if hasattr(analysis_result, 'content'):
-                    report = analysis_result.content
-                else:
-                    report = str(analysis_result)
-                    
-                print(f"📊 [基本面分析师] 强制工具调用完成，报告长度: {len(report)}")
-                
-            except Exception as e:
-                print(f"❌ [DEBUG] 强制工具调用分析失败: {e}")
-                report = f"基本面分析失败：{str(e)}"
-            
-            return {"fundamentals_report": report}
-
-        # 这里不应该到达，但作为备用
-        print(f"📊 [DEBUG] 返回状态: fundamentals_report长度={len(result.content) if hasattr(result, 'content') else 0}")
-        return {"messages": [result]}
+        return {"analysis_request": analysis_prompt}
+
+    def build_analysis_chain(fresh_llm):
+        # 创建简单的分析链
+        analysis_prompt_template = ChatPromptTemplate.from_messages([
+            ("system", "你是专业的股票基本面分析师，基于提供的真实数据进行分析。"),
+            ("human", "{analysis_request}")
+        ])
+        return analysis_prompt_template | fresh_llm
+
+    def build_report_update(analysis_result):
+        if hasattr(analysis_result, 'content'):
+            report = analysis_result.content
+        else:
+            report = str(analysis_result)
+
+        print(f"📊 [基本面分析师] 强制工具调用完成，报告长度: {len(report)}")
+        return {"fundamentals_report": report}
+
+    def build_failure_update(error):
+        print(f"❌ [DEBUG] 强制工具调用分析失败: {error}")
+        return {"fundamentals_report": f"基本面分析失败：{str(error)}"}
+
+    def fundamentals_analyst_node(state):
+        chain, tools, fresh_llm = build_chain(state)
+
+        print(f"📊 [DEBUG] 调用LLM链...")
+        result = chain.invoke(state["messages"])
+        print(f"📊 [DEBUG] LLM调用完成")
+
+        # 处理基本面分析报告
+        if inspect_result(tools, result):
+            return build_tool_call_update(result)
+
+        # 没有工具调用，使用阿里百炼强制工具调用修复
+        print(f"📊 [DEBUG] 检测到模型未调用工具，启用强制工具调用模式")
+        combined_data = fetch_unified_data(state, tools)
+
+        try:
+            analysis_chain = build_analysis_chain(fresh_llm)
+            analysis_result = analysis_chain.invoke(build_analysis_input(state, combined_data))
+            return build_report_update(analysis_result)
+        except Exception as e:
+            return build_failure_update(e)
+
+    async def afundamentals_analyst_node(state):
+        chain, tools, fresh_llm = build_chain(state)
+
+        print(f"📊 [DEBUG] 调用LLM链...")
+        result = await chain.ainvoke(state["messages"])
+        print(f"📊 [DEBUG] LLM调用完成")
+
+        # 处理基本面分析报告
+        if inspect_result(tools, result):
+            return build_tool_call_update(result)
+
+        # 没有工具调用，使用阿里百炼强制工具调用修复
+        print(f"📊 [DEBUG] 检测到模型未调用工具，启用强制工具调用模式")
+        combined_data = await afetch_unified_data(state, tools)
+
+        try:
+            analysis_chain = build_analysis_chain(fresh_llm)
+            analysis_result = await analysis_chain.ainvoke(build_analysis_input(state, combined_data))
+            return build_report_update(analysis_result)
+        except Exception as e:
+            return build_failure_update(e)
 
-    return fundamentals_analyst_node
+    return AgentNode(fundamentals_analyst_node, afunc=afundamentals_analyst_node)
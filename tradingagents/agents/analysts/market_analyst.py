@@ -1,9 +1,12 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain import hub
+import asyncio
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import AgentNode
+
 
 def create_market_analyst_react(llm, toolkit):
     """使用ReAct Agent模式的市场分析师（适用于通义千问）"""
@@ -189,7 +192,7 @@ def create_market_analyst_react(llm, toolkit):
 
 def create_market_analyst(llm, toolkit):
 
-    def market_analyst_node(state):
+    def build_chain(state):
         print(f"📈 [DEBUG] ===== 市场分析师节点开始 =====")
 
         current_date = state["trade_date"]
@@ -289,67 +292,68 @@ def create_market_analyst(llm, toolkit):
         prompt = prompt.partial(current_date=current_date)
         prompt = prompt.partial(ticker=ticker)
 
-        chain = prompt | llm.bind_tools(tools)
+        return prompt | llm.bind_tools(tools), tools
 
-        result = chain.invoke(state["messages"])
+    def find_tool(tools, tool_name):
+        for tool in tools:
+            # 安全地获取工具名称进行比较
+            current_tool_name = None
+            if hasattr(tool, 'name'):
+                current_tool_name = tool.name
+            elif hasattr(tool, '__name__'):
+                current_tool_name = tool.__name__
+
+            if current_tool_name == tool_name:
+                return tool
+        return None
+
+    def run_tool_call(tools, tool_call):
+        tool_name = tool_call.get('name')
+        tool_args = tool_call.get('args', {})
+        print(f"📊 [DEBUG] 执行工具: {tool_name}, 参数: {tool_args}")
+
+        tool = find_tool(tools, tool_name)
+        if tool is None:
+            return f"未找到工具: {tool_name}"
+        try:
+            tool_result = tool.invoke(tool_args)
+            print(f"📊 [DEBUG] 工具执行成功，结果长度: {len(str(tool_result))}")
+            return tool_result
+        except Exception as tool_error:
+            print(f"❌ [DEBUG] 工具执行失败: {tool_error}")
+            return f"工具执行失败: {str(tool_error)}"
+
+    async def arun_tool_call(tools, tool_call):
+        tool_name = tool_call.get('name')
+        tool_args = tool_call.get('args', {})
+        print(f"📊 [DEBUG] 执行工具: {tool_name}, 参数: {tool_args}")
+
+        tool = find_tool(tools, tool_name)
+        if tool is None:
+            return f"未找到工具: {tool_name}"
+        try:
+            tool_result = await tool.ainvoke(tool_args)
+            print(f"📊 [DEBUG] 工具执行成功，结果长度: {len(str(tool_result))}")
+            return tool_result
+        except Exception as tool_error:
+            print(f"❌ [DEBUG] 工具执行失败: {tool_error}")
+            return f"工具执行失败: {str(tool_error)}"
+
+    def build_tool_message(tool_call, tool_result):
+        from langchain_core.messages import ToolMessage
+
+        return ToolMessage(
+            content=str(tool_result),
+            tool_call_id=tool_call.get('id')
+        )
 
-        # 处理市场分析报告
-        if len(result.tool_calls) == 0:
-            # 没有工具调用，直接使用LLM的回复
-            report = result.content
-            print(f"📊 [市场分析师] 直接回复，长度: {len(report)}")
-        else:
-            # 有工具调用，执行工具并生成完整分析报告
-            print(f"📊 [市场分析师] 工具调用: {[call.get('name', 'unknown') for call in result.tool_calls]}")
+    def build_analysis_messages(state, result, tool_messages):
+        from langchain_core.messages import HumanMessage
 
-            try:
-                # 执行工具调用
-                from langchain_core.messages import ToolMessage, HumanMessage
-
-                tool_messages = []
-                for tool_call in result.tool_calls:
-                    tool_name = tool_call.get('name')
-                    tool_args = tool_call.get('args', {})
-                    tool_id = tool_call.get('id')
-
-                    print(f"📊 [DEBUG] 执行工具: {tool_name}, 参数: {tool_args}")
-
-                    # 找到对应的工具并执行
-                    tool_result = None
-                    for tool in tools:
-                        # 安全地获取工具名称进行比较
-                        current_tool_name = None
-                        if hasattr(tool, 'name'):
-                            current_tool_name = tool.name
-                        elif hasattr(tool, '__name__'):
-                            current_tool_name = tool.__name__
-
-                        if current_tool_name == tool_name:
-                            try:
-                                if tool_name == "get_china_stock_data":
-                                    # 中国股票数据工具
-                                    tool_result = tool.invoke(tool_args)
-                                else:
-                                    # 其他工具
-                                    tool_result = tool.invoke(tool_args)
-                                print(f"📊 [DEBUG] 工具执行成功，结果长度: {len(str(tool_result))}")
-                                break
-                            except Exception as tool_error:
-                                print(f"❌ [DEBUG] 工具执行失败: {tool_error}")
-                                tool_result = f"工具执行失败: {str(tool_error)}"
-
-                    if tool_result is None:
-                        tool_result = f"未找到工具: {tool_name}"
-
-                    # 创建工具消息
-                    tool_message = ToolMessage(
-                        content=str(tool_result),
-                        tool_call_id=tool_id
-                    )
-                    tool_messages.append(tool_message)
-
-                # 基于工具结果生成完整分析报告
-                analysis_prompt = f"""现在请基于上述工具获取的数据，生成详细的技术分析报告。
+        ticker = state["company_of_interest"]
+
+        # 基于工具结果生成完整分析报告
+        analysis_prompt = f"""现在请基于上述工具获取的数据，生成详细的技术分析报告。
 
 要求：
 1. 报告必须基于工具返回的真实数据进行分析
@@ -365,37 +369,93 @@ def create_market_analyst(llm, toolkit):
 - 成交量分析
 - 投资建议"""
 
-                # 构建完整的消息序列
-                messages = state["messages"] + [result] + tool_messages + [HumanMessage(content=analysis_prompt)]
+        # 构建完整的消息序列
+        return state["messages"] + [result] + tool_messages + [HumanMessage(content=analysis_prompt)]
 
-                # 生成最终分析报告
-                final_result = llm.invoke(messages)
-                report = final_result.content
+    def build_report_update(result, tool_messages, final_result):
+        report = final_result.content
 
-                print(f"📊 [市场分析师] 生成完整分析报告，长度: {len(report)}")
+        print(f"📊 [市场分析师] 生成完整分析报告，长度: {len(report)}")
 
-                # 返回包含工具调用和最终分析的完整消息序列
-                return {
-                    "messages": [result] + tool_messages + [final_result],
-                    "market_report": report,
-                }
+        # 返回包含工具调用和最终分析的完整消息序列
+        return {
+            "messages": [result] + tool_messages + [final_result],
+            "market_report": report,
+        }
 
-            except Exception as e:
-                print(f"❌ [市场分析师] 工具执行或分析生成失败: {e}")
-                import traceback
-                traceback.print_exc()
+    def build_failure_update(result, error):
+        print(f"❌ [市场分析师] 工具执行或分析生成失败: {error}")
+        import traceback
+        traceback.print_exc()
 
-                # 降级处理：返回工具调用信息
-                report = f"市场分析师调用了工具但分析生成失败: {[call.get('name', 'unknown') for call in result.tool_calls]}"
+        # 降级处理：返回工具调用信息
+        report = f"市场分析师调用了工具但分析生成失败: {[call.get('name', 'unknown') for call in result.tool_calls]}"
 
-                return {
-                    "messages": [result],
-                    "market_report": report,
-                }
+        return {
+            "messages": [result],
+            "market_report": report,
+        }
+
+    def build_direct_update(result):
+        # 没有工具调用，直接使用LLM的回复
+        report = result.content
+        print(f"📊 [市场分析师] 直接回复，长度: {len(report)}")
 
         return {
             "messages": [result],
             "market_report": report,
         }
 
-    return market_analyst_node
+    def market_analyst_node(state):
+        chain, tools = build_chain(state)
+        result = chain.invoke(state["messages"])
+
+        # 处理市场分析报告
+        if len(result.tool_calls) == 0:
+            return build_direct_update(result)
+
+        # 有工具调用，执行工具并生成完整分析报告
+        print(f"📊 [市场分析师] 工具调用: {[call.get('name', 'unknown') for call in result.tool_calls]}")
+
+        try:
+            tool_messages = [
+                build_tool_message(tool_call, run_tool_call(tools, tool_call))
+                for tool_call in result.tool_calls
+            ]
+
+            # 生成最终分析报告
+            final_result = llm.invoke(build_analysis_messages(state, result, tool_messages))
+            return build_report_update(result, tool_messages, final_result)
+
+        except Exception as e:
+            return build_failure_update(result, e)
+
+    async def amarket_analyst_node(state):
+        chain, tools = build_chain(state)
+        result = await chain.ainvoke(state["messages"])
+
+        # 处理市场分析报告
+        if len(result.tool_calls) == 0:
+            return build_direct_update(result)
+
+        # 有工具调用，执行工具并生成完整分析报告
+        print(f"📊 [市场分析师] 工具调用: {[call.get('name', 'unknown') for call in result.tool_calls]}")
+
+        try:
+            # 多个工具调用互不依赖，并发执行
+            tool_results = await asyncio.gather(
+                *(arun_tool_call(tools, tool_call) for tool_call in result.tool_calls)
+            )
+            tool_messages = [
+                build_tool_message(tool_call, tool_result)
+                for tool_call, tool_result in zip(result.tool_calls, tool_results)
+            ]
+
+            # 生成最终分析报告
+            final_result = await llm.ainvoke(build_analysis_messages(state, result, tool_messages))
+            return build_report_update(result, tool_messages, final_result)
+
+        except Exception as e:
+            return build_failure_update(result, e)
+
+    return AgentNode(market_analyst_node, afunc=amarket_analyst_node)
@@ -2,9 +2,11 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import AgentNode
+
 
 def create_news_analyst(llm, toolkit):
-    def news_analyst_node(state):
+    def build_chain(state):
         current_date = state["trade_date"]
         ticker = state["company_of_interest"]
 
@@ -88,9 +90,9 @@ def create_news_analyst(llm, toolkit):
         prompt = prompt.partial(current_date=current_date)
         prompt = prompt.partial(ticker=ticker)
 
-        chain = prompt | llm.bind_tools(tools)
-        result = chain.invoke(state["messages"])
+        return prompt | llm.bind_tools(tools)
 
+    def build_update(result) -> dict:
         report = ""
 
         if len(result.tool_calls) == 0:
@@ -101,4 +103,10 @@ def create_news_analyst(llm, toolkit):
             "news_report": report,
         }
 
-    return news_analyst_node
+    def news_analyst_node(state):
+        return build_update(build_chain(state).invoke(state["messages"]))
+
+    async def anews_analyst_node(state):
+        return build_update(await build_chain(state).ainvoke(state["messages"]))
+
+    return AgentNode(news_analyst_node, afunc=anews_analyst_node)
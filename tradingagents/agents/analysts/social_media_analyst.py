@@ -2,9 +2,11 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import AgentNode
+
 
 def create_social_media_analyst(llm, toolkit):
-    def social_media_analyst_node(state):
+    def build_chain(state):
         current_date = state["trade_date"]
         ticker = state["company_of_interest"]
         company_name = state["company_of_interest"]
@@ -92,10 +94,9 @@ def create_social_media_analyst(llm, toolkit):
         prompt = prompt.partial(current_date=current_date)
         prompt = prompt.partial(ticker=ticker)
 
-        chain = prompt | llm.bind_tools(tools)
-
-        result = chain.invoke(state["messages"])
+        return prompt | llm.bind_tools(tools)
 
+    def build_update(result) -> dict:
         report = ""
 
         if len(result.tool_calls) == 0:
@@ -106,4 +107,10 @@ def create_social_media_analyst(llm, toolkit):
             "sentiment_report": report,
         }
 
-    return social_media_analyst_node
+    def social_media_analyst_node(state):
+        return build_update(build_chain(state).invoke(state["messages"]))
+
+    async def asocial_media_analyst_node(state):
+        return build_update(await build_chain(state).ainvoke(state["messages"]))
+
+    return AgentNode(social_media_analyst_node, afunc=asocial_media_analyst_node)
@@ -1,9 +1,14 @@
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import AgentNode
+
 
 def create_research_manager(llm, memory):
-    def research_manager_node(state) -> dict:
+    def current_situation(state) -> str:
+        return f"{state['market_report']}\n\n{state['sentiment_report']}\n\n{state['news_report']}\n\n{state['fundamentals_report']}"
+
+    def build_prompt(state, past_memories) -> str:
         history = state["investment_debate_state"].get("history", "")
         market_research_report = state["market_report"]
         sentiment_report = state["sentiment_report"]
@@ -12,14 +17,8 @@ def create_research_manager(llm, memory):
 
         investment_debate_state = state["investment_debate_state"]
 
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-
-        # 安全检查：确保memory不为None
-        if memory is not None:
-            past_memories = memory.get_memories(curr_situation, n_matches=2)
-        else:
+        if memory is None:
             print("⚠️ [DEBUG] memory为None，跳过历史记忆检索")
-            past_memories = []
 
         past_memory_str = ""
         for i, rec in enumerate(past_memories, 1):
@@ -62,7 +61,10 @@ def create_research_manager(llm, memory):
 {history}
 
 请用中文撰写所有分析内容和建议。"""
-        response = llm.invoke(prompt)
+        return prompt
+
+    def build_update(state, response) -> dict:
+        investment_debate_state = state["investment_debate_state"]
 
         new_investment_debate_state = {
             "judge_decision": response.content,
@@ -78,4 +80,16 @@ def create_research_manager(llm, memory):
             "investment_plan": response.content,
         }
 
-    return research_manager_node
+    def research_manager_node(state) -> dict:
+        past_memories = []
+        if memory is not None:
+            past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        return build_update(state, llm.invoke(build_prompt(state, past_memories)))
+
+    async def aresearch_manager_node(state) -> dict:
+        past_memories = []
+        if memory is not None:
+            past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        return build_update(state, await llm.ainvoke(build_prompt(state, past_memories)))
+
+    return AgentNode(research_manager_node, afunc=aresearch_manager_node)
@@ -1,10 +1,15 @@
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import AgentNode
+
 
 def create_risk_manager(llm, memory):
-    def risk_manager_node(state) -> dict:
+    def current_situation(state) -> str:
+        fundamentals_report = state["news_report"]
+        return f"{state['market_report']}\n\n{state['sentiment_report']}\n\n{state['news_report']}\n\n{fundamentals_report}"
 
+    def build_prompt(state, past_memories) -> str:
         company_name = state["company_of_interest"]
 
         history = state["risk_debate_state"]["history"]
@@ -15,14 +20,8 @@ def create_risk_manager(llm, memory):
         sentiment_report = state["sentiment_report"]
         trader_plan = state["investment_plan"]
 
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-
-        # 安全检查：确保memory不为None
-        if memory is not None:
-            past_memories = memory.get_memories(curr_situation, n_matches=2)
-        else:
+        if memory is None:
             print("⚠️ [DEBUG] memory为None，跳过历史记忆检索")
-            past_memories = []
 
         past_memory_str = ""
         for i, rec in enumerate(past_memories, 1):
@@ -48,8 +47,10 @@ def create_risk_manager(llm, memory):
 ---
 
 专注于可操作的见解和持续改进。建立在过去经验教训的基础上，批判性地评估所有观点，确保每个决策都能带来更好的结果。请用中文撰写所有分析内容和建议。"""
+        return prompt
 
-        response = llm.invoke(prompt)
+    def build_update(state, response) -> dict:
+        risk_debate_state = state["risk_debate_state"]
 
         new_risk_debate_state = {
             "judge_decision": response.content,
@@ -69,4 +70,16 @@ def create_risk_manager(llm, memory):
             "final_trade_decision": response.content,
         }
 
-    return risk_manager_node
+    def risk_manager_node(state) -> dict:
+        past_memories = []
+        if memory is not None:
+            past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        return build_update(state, llm.invoke(build_prompt(state, past_memories)))
+
+    async def arisk_manager_node(state) -> dict:
+        past_memories = []
+        if memory is not None:
+            past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        return build_update(state, await llm.ainvoke(build_prompt(state, past_memories)))
+
+    return AgentNode(risk_manager_node, afunc=arisk_manager_node)
@@ -2,9 +2,14 @@ from langchain_core.messages import AIMessage
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import AgentNode
+
 
 def create_bear_researcher(llm, memory):
-    def bear_node(state) -> dict:
+    def current_situation(state) -> str:
+        return f"{state['market_report']}\n\n{state['sentiment_report']}\n\n{state['news_report']}\n\n{state['fundamentals_report']}"
+
+    def build_prompt(state, past_memories) -> str:
         investment_debate_state = state["investment_debate_state"]
         history = investment_debate_state.get("history", "")
         bear_history = investment_debate_state.get("bear_history", "")
@@ -27,14 +32,8 @@ def create_bear_researcher(llm, memory):
         currency = market_info['currency_name']
         currency_symbol = market_info['currency_symbol']
 
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-
-        # 安全检查：确保memory不为None
-        if memory is not None:
-            past_memories = memory.get_memories(curr_situation, n_matches=2)
-        else:
+        if memory is None:
             print("⚠️ [DEBUG] memory为None，跳过历史记忆检索")
-            past_memories = []
 
         past_memory_str = ""
         for i, rec in enumerate(past_memories, 1):
@@ -68,8 +67,12 @@ def create_bear_researcher(llm, memory):
 
 请确保所有回答都使用中文。
 """
+        return prompt
 
-        response = llm.invoke(prompt)
+    def build_update(state, response) -> dict:
+        investment_debate_state = state["investment_debate_state"]
+        history = investment_debate_state.get("history", "")
+        bear_history = investment_debate_state.get("bear_history", "")
 
         argument = f"Bear Analyst: {response.content}"
 
@@ -83,4 +86,16 @@ def create_bear_researcher(llm, memory):
 
         return {"investment_debate_state": new_investment_debate_state}
 
-    return bear_node
+    def bear_node(state) -> dict:
+        past_memories = []
+        if memory is not None:
+            past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        return build_update(state, llm.invoke(build_prompt(state, past_memories)))
+
+    async def abear_node(state) -> dict:
+        past_memories = []
+        if memory is not None:
+            past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        return build_update(state, await llm.ainvoke(build_prompt(state, past_memories)))
+
+    return AgentNode(bear_node, afunc=abear_node)
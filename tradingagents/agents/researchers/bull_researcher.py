@@ -2,9 +2,14 @@ from langchain_core.messages import AIMessage
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import AgentNode
+
 
 def create_bull_researcher(llm, memory):
-    def bull_node(state) -> dict:
+    def current_situation(state) -> str:
+        return f"{state['market_report']}\n\n{state['sentiment_report']}\n\n{state['news_report']}\n\n{state['fundamentals_report']}"
+
+    def build_prompt(state, past_memories) -> str:
         print(f"🐂 [DEBUG] ===== 看涨研究员节点开始 =====")
 
         investment_debate_state = state["investment_debate_state"]
@@ -38,14 +43,8 @@ def create_bull_researcher(llm, memory):
         print(f"🐂 [DEBUG] - 股票代码: {company_name}, 类型: {market_info['market_name']}, 货币: {currency}")
         print(f"🐂 [DEBUG] - 市场详情: 中国A股={is_china}, 港股={is_hk}, 美股={is_us}")
 
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-
-        # 安全检查：确保memory不为None
-        if memory is not None:
-            past_memories = memory.get_memories(curr_situation, n_matches=2)
-        else:
+        if memory is None:
             print("⚠️ [DEBUG] memory为None，跳过历史记忆检索")
-            past_memories = []
 
         past_memory_str = ""
         for i, rec in enumerate(past_memories, 1):
@@ -77,8 +76,12 @@ def create_bull_researcher(llm, memory):
 
 请确保所有回答都使用中文。
 """
+        return prompt
 
-        response = llm.invoke(prompt)
+    def build_update(state, response) -> dict:
+        investment_debate_state = state["investment_debate_state"]
+        history = investment_debate_state.get("history", "")
+        bull_history = investment_debate_state.get("bull_history", "")
 
         argument = f"Bull Analyst: {response.content}"
 
@@ -92,4 +95,16 @@ def create_bull_researcher(llm, memory):
 
         return {"investment_debate_state": new_investment_debate_state}
 
-    return bull_node
+    def bull_node(state) -> dict:
+        past_memories = []
+        if memory is not None:
+            past_memories = memory.get_memories(current_situation(state), n_matches=2)
+        return build_update(state, llm.invoke(build_prompt(state, past_memories)))
+
+    async def abull_node(state) -> dict:
+        past_memories = []
+        if memory is not None:
+            past_memories = await memory.aget_memories(current_situation(state), n_matches=2)
+        return build_update(state, await llm.ainvoke(build_prompt(state, past_memories)))
+
+    return AgentNode(bull_node, afunc=abull_node)
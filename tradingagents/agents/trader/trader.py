@@ -2,9 +2,14 @@ import functools
 import time
 import json
 
+from tradingagents.agents.utils.agent_utils import AgentNode
+
 
 def create_trader(llm, memory):
-    def trader_node(state, name):
+    def current_situation(state) -> str:
+        return f"{state['market_report']}\n\n{state['sentiment_report']}\n\n{state['news_report']}\n\n{state['fundamentals_report']}"
+
+    def build_messages(state, past_memories) -> list:
         company_name = state["company_of_interest"]
         investment_plan = state["investment_plan"]
         market_research_report = state["market_report"]
@@ -31,18 +36,13 @@ def create_trader(llm, memory):
         print(f"💰 [DEBUG] 基本面报告长度: {len(fundamentals_report)}")
         print(f"💰 [DEBUG] 基本面报告前200字符: {fundamentals_report[:200]}...")
 
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
-
         # 检查memory是否可用
         if memory is not None:
-            print(f"⚠️ [DEBUG] memory可用，获取历史记忆")
-            past_memories = memory.get_memories(curr_situation, n_matches=2)
             past_memory_str = ""
             for i, rec in enumerate(past_memories, 1):
                 past_memory_str += rec["recommendation"] + "\n\n"
         else:
             print(f"⚠️ [DEBUG] memory为None，跳过历史记忆检索")
-            past_memories = []
             past_memory_str = "暂无历史记忆数据可参考。"
 
         context = {
@@ -97,8 +97,9 @@ def create_trader(llm, memory):
         print(f"💰 [DEBUG] 准备调用LLM，系统提示包含货币: {currency}")
         print(f"💰 [DEBUG] 系统提示中的关键部分: 目标价格({currency})")
 
-        result = llm.invoke(messages)
+        return messages
 
+    def build_update(result, name) -> dict:
         print(f"💰 [DEBUG] LLM调用完成")
         print(f"💰 [DEBUG] 交易员回复长度: {len(result.content)}")
         print(f"💰 [DEBUG] 交易员回复前500字符: {result.content[:500]}...")
@@ -110,4 +111,27 @@ def create_trader(llm, memory):
             "sender": name,
         }
 
-    return functools.partial(trader_node, name="Trader")
+    def recall(state) -> list:
+        if memory is None:
+            return []
+        print(f"⚠️ [DEBUG] memory可用，获取历史记忆")
+        return memory.get_memories(current_situation(state), n_matches=2)
+
+    async def arecall(state) -> list:
+        if memory is None:
+            return []
+        print(f"⚠️ [DEBUG] memory可用，获取历史记忆")
+        return await memory.aget_memories(current_situation(state), n_matches=2)
+
+    def trader_node(state, name):
+        result = llm.invoke(build_messages(state, recall(state)))
+        return build_update(result, name)
+
+    async def atrader_node(state, name):
+        result = await llm.ainvoke(build_messages(state, await arecall(state)))
+        return build_update(result, name)
+
+    return AgentNode(
+        functools.partial(trader_node, name="Trader"),
+        afunc=functools.partial(atrader_node, name="Trader"),
+    )
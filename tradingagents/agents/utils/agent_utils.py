@@ -4,7 +4,9 @@ from typing import Annotated
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import RemoveMessage
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableLambda
 from datetime import date, timedelta, datetime
+import asyncio
 import functools
 import pandas as pd
 import os
@@ -31,6 +33,16 @@ def create_msg_delete():
     return delete_messages
 
 
+class AgentNode(RunnableLambda):
+    """同时提供同步和异步实现的Agent节点
+
+    图的 invoke/ainvoke 分别走同步/异步实现；直接调用 node(state) 时与原来的节点函数一致。
+    """
+
+    def __call__(self, state):
+        return self.func(state)
+
+
 class Toolkit:
     _config = DEFAULT_CONFIG.copy()
 
@@ -279,7 +291,7 @@ class Toolkit:
     def get_stockstats_indicators_report(
         symbol: Annotated[str, "ticker symbol of the company"],
         indicator: Annotated[
-            str, "technical indicator to get the analysis and report of"
+            str, "technical indicator(s) to get the analysis and report of, comma-separated for several"
         ],
         curr_date: Annotated[
             str, "The current trading date you are trading on, YYYY-mm-dd"
@@ -290,7 +302,7 @@ class Toolkit:
         Retrieve stock stats indicators for a given ticker symbol and indicator.
         Args:
             symbol (str): Ticker symbol of the company, e.g. AAPL, TSM
-            indicator (str): Technical indicator to get the analysis and report of
+            indicator (str): Technical indicator to get the analysis and report of; pass several comma-separated (e.g. "rsi,macd,boll") to get them in one call
             curr_date (str): The current trading date you are trading on, YYYY-mm-dd
             look_back_days (int): How many days to look back, default is 30
         Returns:
@@ -308,7 +320,7 @@ class Toolkit:
     def get_stockstats_indicators_report_online(
         symbol: Annotated[str, "ticker symbol of the company"],
         indicator: Annotated[
-            str, "technical indicator to get the analysis and report of"
+            str, "technical indicator(s) to get the analysis and report of, comma-separated for several"
         ],
         curr_date: Annotated[
             str, "The current trading date you are trading on, YYYY-mm-dd"
@@ -319,7 +331,7 @@ class Toolkit:
         Retrieve stock stats indicators for a given ticker symbol and indicator.
         Args:
             symbol (str): Ticker symbol of the company, e.g. AAPL, TSM
-            indicator (str): Technical indicator to get the analysis and report of
+            indicator (str): Technical indicator to get the analysis and report of; pass several comma-separated (e.g. "rsi,macd,boll") to get them in one call
             curr_date (str): The current trading date you are trading on, YYYY-mm-dd
             look_back_days (int): How many days to look back, default is 30
         Returns:
@@ -873,67 +885,15 @@ class Toolkit:
         print(f"📈 [统一市场工具] 分析股票: {ticker}")
 
         try:
-            from tradingagents.utils.stock_utils import StockUtils
-
-            # 自动识别股票类型
-            market_info = StockUtils.get_market_info(ticker)
-            is_china = market_info['is_china']
-            is_hk = market_info['is_hk']
-            is_us = market_info['is_us']
-
-            print(f"📈 [统一市场工具] 股票类型: {market_info['market_name']}")
-            print(f"📈 [统一市场工具] 货币: {market_info['currency_name']} ({market_info['currency_symbol']})")
-
-            result_data = []
-
-            if is_china:
-                # 中国A股：使用中国股票数据源
-                print(f"🇨🇳 [统一市场工具] 处理A股市场数据...")
-
-                try:
-                    from tradingagents.dataflows.interface import get_china_stock_data_unified
-                    stock_data = get_china_stock_data_unified(ticker, start_date, end_date)
-                    result_data.append(f"## A股市场数据\n{stock_data}")
-                except Exception as e:
-                    result_data.append(f"## A股市场数据\n获取失败: {e}")
+            market_info, section, fetch, _ = _select_market_data_source(ticker)
 
-            elif is_hk:
-                # 港股：使用AKShare数据源
-                print(f"🇭🇰 [统一市场工具] 处理港股市场数据...")
-
-                try:
-                    from tradingagents.dataflows.interface import get_hk_stock_data_unified
-                    hk_data = get_hk_stock_data_unified(ticker, start_date, end_date)
-                    result_data.append(f"## 港股市场数据\n{hk_data}")
-                except Exception as e:
-                    result_data.append(f"## 港股市场数据\n获取失败: {e}")
-
-            else:
-                # 美股：使用Yahoo Finance数据源
-                print(f"🇺🇸 [统一市场工具] 处理美股市场数据...")
-
-                try:
-                    from tradingagents.dataflows.interface import get_YFin_data_online
-                    us_data = get_YFin_data_online(ticker, start_date, end_date)
-                    result_data.append(f"## 美股市场数据\n{us_data}")
-                except Exception as e:
-                    result_data.append(f"## 美股市场数据\n获取失败: {e}")
-
-            # 组合所有数据
-            combined_result = f"""# {ticker} 市场数据分析
-
-**股票类型**: {market_info['market_name']}
-**货币**: {market_info['currency_name']} ({market_info['currency_symbol']})
-**分析期间**: {start_date} 至 {end_date}
-
-{chr(10).join(result_data)}
-
----
-*数据来源: 根据股票类型自动选择最适合的数据源*
-"""
+            try:
+                stock_data = fetch(ticker, start_date, end_date)
+                result_data = [f"## {section}\n{stock_data}"]
+            except Exception as e:
+                result_data = [f"## {section}\n获取失败: {e}"]
 
-            print(f"📈 [统一市场工具] 数据获取完成，总长度: {len(combined_result)}")
-            return combined_result
+            return _combine_market_data(ticker, market_info, start_date, end_date, result_data)
 
         except Exception as e:
             error_msg = f"统一市场数据工具执行失败: {str(e)}"
@@ -1120,3 +1080,96 @@ class Toolkit:
             error_msg = f"统一情绪分析工具执行失败: {str(e)}"
             print(f"❌ [统一情绪工具] {error_msg}")
             return error_msg
+
+
+def _select_market_data_source(ticker):
+    """按股票类型选择市场数据源，返回 (market_info, 报告小节标题, 同步接口, 异步接口)"""
+    from tradingagents.utils.stock_utils import StockUtils
+
+    # 自动识别股票类型
+    market_info = StockUtils.get_market_info(ticker)
+
+    print(f"📈 [统一市场工具] 股票类型: {market_info['market_name']}")
+    print(f"📈 [统一市场工具] 货币: {market_info['currency_name']} ({market_info['currency_symbol']})")
+
+    if market_info['is_china']:
+        # 中国A股：使用中国股票数据源
+        print(f"🇨🇳 [统一市场工具] 处理A股市场数据...")
+        return market_info, "A股市场数据", interface.get_china_stock_data_unified, interface.aget_china_stock_data_unified
+    if market_info['is_hk']:
+        # 港股：使用AKShare数据源
+        print(f"🇭🇰 [统一市场工具] 处理港股市场数据...")
+        return market_info, "港股市场数据", interface.get_hk_stock_data_unified, interface.aget_hk_stock_data_unified
+    # 美股：使用Yahoo Finance数据源
+    print(f"🇺🇸 [统一市场工具] 处理美股市场数据...")
+    return market_info, "美股市场数据", interface.get_YFin_data_online, interface.aget_YFin_data_online
+
+
+def _combine_market_data(ticker, market_info, start_date, end_date, result_data):
+    # 组合所有数据
+    combined_result = f"""# {ticker} 市场数据分析
+
+**股票类型**: {market_info['market_name']}
+**货币**: {market_info['currency_name']} ({market_info['currency_symbol']})
+**分析期间**: {start_date} 至 {end_date}
+
+{chr(10).join(result_data)}
+
+---
+*数据来源: 根据股票类型自动选择最适合的数据源*
+"""
+
+    print(f"📈 [统一市场工具] 数据获取完成，总长度: {len(combined_result)}")
+    return combined_result
+
+
+# ==================== 工具的异步实现 ====================
+# apropagate 中 ToolNode 和分析师节点通过 tool.ainvoke 调用工具，
+# StructuredTool 设置了 coroutine 时会直接 await，而不是把同步函数丢进线程池。
+
+async def _aget_YFin_data_online(symbol: str, start_date: str, end_date: str) -> str:
+    return await interface.aget_YFin_data_online(symbol, start_date, end_date)
+
+
+async def _aget_stock_news_openai(ticker: str, curr_date: str):
+    return await interface.aget_stock_news_openai(ticker, curr_date)
+
+
+async def _aget_global_news_openai(curr_date: str):
+    return await interface.aget_global_news_openai(curr_date)
+
+
+async def _aget_stock_market_data_unified(ticker: str, start_date: str, end_date: str) -> str:
+    print(f"📈 [统一市场工具] 分析股票: {ticker}")
+
+    try:
+        market_info, section, _, afetch = _select_market_data_source(ticker)
+
+        try:
+            stock_data = await afetch(ticker, start_date, end_date)
+            result_data = [f"## {section}\n{stock_data}"]
+        except Exception as e:
+            result_data = [f"## {section}\n获取失败: {e}"]
+
+        return _combine_market_data(ticker, market_info, start_date, end_date, result_data)
+
+    except Exception as e:
+        error_msg = f"统一市场数据工具执行失败: {str(e)}"
+        print(f"❌ [统一市场工具] {error_msg}")
+        return error_msg
+
+
+async def _aget_stock_fundamentals_unified(
+    ticker: str, start_date: str = None, end_date: str = None, curr_date: str = None
+) -> str:
+    # 各市场分支串联了多个阻塞数据源和报告生成，整体放到工作线程执行
+    return await asyncio.to_thread(
+        Toolkit.get_stock_fundamentals_unified.func, ticker, start_date, end_date, curr_date
+    )
+
+
+Toolkit.get_YFin_data_online.coroutine = _aget_YFin_data_online
+Toolkit.get_stock_news_openai.coroutine = _aget_stock_news_openai
+Toolkit.get_global_news_openai.coroutine = _aget_global_news_openai
+Toolkit.get_stock_market_data_unified.coroutine = _aget_stock_market_data_unified
+Toolkit.get_stock_fundamentals_unified.coroutine = _aget_stock_fundamentals_unified
@@ -1,32 +1,65 @@
-import chromadb
-from chromadb.config import Settings
 from openai import OpenAI
 import dashscope
 from dashscope import TextEmbedding
+import asyncio
 import os
+import hashlib
+import sqlite3
 import threading
-from typing import Dict, Optional
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# ChromaDB为可选依赖，未安装时使用NumPy向量索引
+try:
+    import chromadb
+    from chromadb.config import Settings
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    chromadb = None
+    Settings = None
+    CHROMADB_AVAILABLE = False
+
+from .vector_store import NumpyVectorStore
 
 
 class ChromaDBManager:
-    """单例ChromaDB管理器，避免并发创建集合的冲突"""
+    """ChromaDB管理器（每个存储目录一个单例），避免并发创建集合的冲突
+
+    persist_dir 为空时使用内存客户端；设置后使用持久化客户端，进程重启后
+    直接加载已有的反思记忆，无需重新嵌入。
+    """
 
-    _instance = None
+    _instances: Dict[Optional[str], "ChromaDBManager"] = {}
     _lock = threading.Lock()
-    _collections: Dict[str, any] = {}
-    _client = None
 
-    def __new__(cls):
-        if cls._instance is None:
+    def __new__(cls, persist_dir: Optional[str] = None):
+        key = os.path.abspath(persist_dir) if persist_dir else None
+        if key not in cls._instances:
             with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(ChromaDBManager, cls).__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+                if key not in cls._instances:
+                    instance = super(ChromaDBManager, cls).__new__(cls)
+                    instance._initialized = False
+                    cls._instances[key] = instance
+        return cls._instances[key]
 
-    def __init__(self):
+    def __init__(self, persist_dir: Optional[str] = None):
         if not self._initialized:
+            self.persist_dir = os.path.abspath(persist_dir) if persist_dir else None
+            self._collections: Dict[str, any] = {}
             try:
+                if self.persist_dir:
+                    os.makedirs(self.persist_dir, exist_ok=True)
+                    settings = Settings(
+                        allow_reset=True,
+                        anonymized_telemetry=False,
+                    )
+                    self._client = chromadb.PersistentClient(path=self.persist_dir, settings=settings)
+                    self._initialized = True
+                    print(f"📚 [ChromaDB] 持久化管理器初始化完成: {self.persist_dir}")
+                    return
+
                 # 使用更兼容的ChromaDB配置
                 settings = Settings(
                     allow_reset=True,
@@ -43,6 +76,19 @@ class ChromaDBManager:
                 self._initialized = True
                 print("📚 [ChromaDB] 使用备用配置初始化完成")
 
+    def get_collection(self, name: str):
+        """获取已存在的集合（只读路径），不存在时返回None"""
+        with self._lock:
+            if name in self._collections:
+                return self._collections[name]
+            try:
+                collection = self._client.get_collection(name=name)
+            except Exception:
+                return None
+            print(f"📚 [ChromaDB] 获取现有集合(只读): {name}")
+            self._collections[name] = collection
+            return collection
+
     def get_or_create_collection(self, name: str):
         """线程安全地获取或创建集合"""
         with self._lock:
@@ -73,9 +119,102 @@ class ChromaDBManager:
             return collection
 
 
+class EmbeddingCache:
+    """按内容哈希缓存嵌入向量：进程内LRU + 可选的SQLite磁盘存储
+
+    所有 FinancialSituationMemory 实例共享同一个缓存（见 get_embedding_cache），
+    同一段文本在一次分析中只会请求一次嵌入接口，磁盘存储可跨进程、跨运行复用。
+    """
+
+    def __init__(self, max_entries: int = 1024, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            db_path = os.path.join(cache_dir, "embeddings.sqlite")
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            self._conn.commit()
+            print(f"📚 [嵌入缓存] 磁盘缓存: {db_path}")
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        return hashlib.sha256(f"{model_id}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    embedding = array("d", row[0]).tolist()
+                    self._remember(key, embedding)
+                    self.hits += 1
+                    return embedding
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        with self._lock:
+            self._remember(key, list(embedding))
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, array("d", embedding).tobytes()),
+                )
+                self._conn.commit()
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache(config: Optional[Dict] = None) -> EmbeddingCache:
+    """获取全局嵌入缓存实例（首次调用时按配置创建）"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                config = config or {}
+                _embedding_cache = EmbeddingCache(
+                    max_entries=config.get("embedding_cache_size", 1024),
+                    cache_dir=config.get("embedding_cache_dir"),
+                )
+    return _embedding_cache
+
+
 class FinancialSituationMemory:
     def __init__(self, name, config):
+        self.name = name
         self.config = config
+        # 只读模式：多个工作进程共享同一持久化目录时，只由一个进程写入反思记忆
+        self.read_only = config.get("memory_read_only", False)
         self.llm_provider = config.get("llm_provider", "openai").lower()
 
         # 根据LLM提供商选择嵌入模型和客户端
@@ -156,25 +295,84 @@ class FinancialSituationMemory:
             self.embedding = "text-embedding-3-small"
             self.client = OpenAI(base_url=config["backend_url"])
 
-        # 使用单例ChromaDB管理器
-        self.chroma_manager = ChromaDBManager()
-        self.situation_collection = self.chroma_manager.get_or_create_collection(name)
+        # 所有记忆实例共享的嵌入缓存
+        self.embedding_cache = get_embedding_cache(config)
+
+        # 向量存储后端：chromadb（默认）或 numpy
+        self.backend = config.get("memory_backend", "chromadb").lower()
+        if self.backend == "chromadb" and not CHROMADB_AVAILABLE:
+            print("⚠️ [记忆] ChromaDB未安装，使用NumPy向量索引")
+            self.backend = "numpy"
+        self.persist_dir = config.get("memory_persist_dir")
+
+        if self.backend == "numpy":
+            self.chroma_manager = None
+        else:
+            # 使用单例ChromaDB管理器（配置 memory_persist_dir 时为持久化模式）
+            self.chroma_manager = ChromaDBManager(self.persist_dir)
+        self._situation_collection = None
+
+    @property
+    def situation_collection(self):
+        """懒加载集合：首次检索或写入时才打开"""
+        if self._situation_collection is None:
+            if self.backend == "numpy":
+                if self.read_only and not (
+                    self.persist_dir and NumpyVectorStore.exists(self.name, self.persist_dir)
+                ):
+                    return None
+                self._situation_collection = NumpyVectorStore(self.name, self.persist_dir)
+            elif self.read_only:
+                self._situation_collection = self.chroma_manager.get_collection(self.name)
+            else:
+                self._situation_collection = self.chroma_manager.get_or_create_collection(self.name)
+        return self._situation_collection
+
+    def _uses_dashscope(self):
+        """是否使用阿里百炼嵌入服务"""
+        return (self.llm_provider == "dashscope" or
+                self.llm_provider == "alibaba" or
+                (self.llm_provider == "google" and self.client is None) or
+                (self.llm_provider == "deepseek" and self.client is None))
+
+    def _embedding_model_id(self):
+        """嵌入缓存键中的模型标识（服务端 + 模型名）"""
+        if self._uses_dashscope():
+            return f"dashscope:{self.embedding}"
+        base_url = getattr(self.client, "base_url", "")
+        return f"{base_url}:{self.embedding}"
 
     def get_embedding(self, text):
-        """Get embedding for a text using the configured provider"""
+        """Get embedding for a text using the configured provider (cached by content hash)"""
+        if self.client == "DISABLED":
+            return self._fetch_embedding(text)
+
+        cache_key = self.embedding_cache.make_key(self._embedding_model_id(), text)
+        embedding = self.embedding_cache.get(cache_key)
+        if embedding is not None:
+            return embedding
 
-        if (self.llm_provider == "dashscope" or
-            self.llm_provider == "alibaba" or
-            (self.llm_provider == "google" and self.client is None) or
-            (self.llm_provider == "deepseek" and self.client is None)):
-            # 使用阿里百炼的嵌入模型
+        embedding = self._fetch_embedding(text)
+        self.embedding_cache.put(cache_key, embedding)
+        return embedding
+
+    def _fetch_embedding(self, text):
+        """Request an embedding from the configured provider"""
+        return self._fetch_embeddings([text])[0]
+
+    def _fetch_embeddings(self, texts):
+        """Request embeddings for a list of texts in a single provider call"""
+
+        if self._uses_dashscope():
+            # 使用阿里百炼的嵌入模型（input 支持文本列表）
             try:
                 response = TextEmbedding.call(
                     model=self.embedding,
-                    input=text
+                    input=texts
                 )
                 if response.status_code == 200:
-                    return response.output['embeddings'][0]['embedding']
+                    items = sorted(response.output['embeddings'], key=lambda item: item['text_index'])
+                    return [item['embedding'] for item in items]
                 else:
                     raise Exception(f"DashScope embedding error: {response.code} - {response.message}")
             except Exception as e:
@@ -186,28 +384,70 @@ class FinancialSituationMemory:
             elif self.client == "DISABLED":
                 # 内存功能已禁用，返回空向量
                 print("⚠️ 内存功能已禁用，返回空向量")
-                return [0.0] * 1024  # 返回1024维的零向量
+                return [[0.0] * 1024 for _ in texts]  # 返回1024维的零向量
 
             response = self.client.embeddings.create(
-                model=self.embedding, input=text
+                model=self.embedding, input=texts
             )
-            return response.data[0].embedding
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _embedding_batch_size(self):
+        """单次嵌入请求的最大文本数（阿里百炼 text-embedding-v3 限制为10条）"""
+        default_size = 10 if self._uses_dashscope() else 256
+        return max(1, self.config.get("embedding_batch_size") or default_size)
+
+    def get_embeddings(self, texts):
+        """Get embeddings for many texts with cache lookups and batched, concurrent requests"""
+        texts = list(texts)
+        if self.client == "DISABLED":
+            return self._fetch_embeddings(texts) if texts else []
+
+        model_id = self._embedding_model_id()
+        keys = [self.embedding_cache.make_key(model_id, text) for text in texts]
+        results = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in results or key in missing:
+                continue
+            embedding = self.embedding_cache.get(key)
+            if embedding is not None:
+                results[key] = embedding
+            else:
+                missing[key] = text
+
+        if missing:
+            missing_keys = list(missing)
+            batch_size = self._embedding_batch_size()
+            batches = [missing_keys[i:i + batch_size] for i in range(0, len(missing_keys), batch_size)]
+            max_workers = max(1, min(self.config.get("embedding_max_concurrency", 4), len(batches)))
+            print(f"📚 [嵌入] 批量请求 {len(missing_keys)} 条文本, {len(batches)} 个批次, 并发数: {max_workers}")
+
+            def fetch_batch(batch_keys):
+                return batch_keys, self._fetch_embeddings([missing[key] for key in batch_keys])
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for batch_keys, embeddings in executor.map(fetch_batch, batches):
+                    for key, embedding in zip(batch_keys, embeddings):
+                        self.embedding_cache.put(key, embedding)
+                        results[key] = embedding
+
+        return [results[key] for key in keys]
 
     def add_situations(self, situations_and_advice):
         """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)"""
 
-        situations = []
-        advice = []
-        ids = []
-        embeddings = []
+        if not situations_and_advice:
+            return
+        if self.read_only:
+            print(f"⚠️ [记忆] {self.name} 为只读模式，跳过写入 {len(situations_and_advice)} 条记忆")
+            return
 
-        offset = self.situation_collection.count()
+        situations = [situation for situation, _ in situations_and_advice]
+        advice = [recommendation for _, recommendation in situations_and_advice]
 
-        for i, (situation, recommendation) in enumerate(situations_and_advice):
-            situations.append(situation)
-            advice.append(recommendation)
-            ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+        offset = self.situation_collection.count()
+        ids = [str(offset + i) for i in range(len(situations))]
+        embeddings = self.get_embeddings(situations)
 
         self.situation_collection.add(
             documents=situations,
@@ -218,6 +458,9 @@ class FinancialSituationMemory:
 
     def get_memories(self, current_situation, n_matches=1):
         """Find matching recommendations using embeddings"""
+        if self.situation_collection is None:
+            return []
+
         query_embedding = self.get_embedding(current_situation)
 
         results = self.situation_collection.query(
@@ -238,6 +481,10 @@ class FinancialSituationMemory:
 
         return matched_results
 
+    async def aget_memories(self, current_situation, n_matches=1):
+        """Async variant of get_memories; the embedding SDKs and the vector store are blocking, so run in a worker thread"""
+        return await asyncio.to_thread(self.get_memories, current_situation, n_matches)
+
 
 if __name__ == "__main__":
     # Example usage
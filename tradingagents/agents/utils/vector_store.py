@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class NumpyVectorStore:
+    """轻量级NumPy向量索引，接口与记忆模块使用的ChromaDB集合子集一致
+
+    向量归一化后以 float32 矩阵保存，检索为一次矩阵乘法 + argpartition 取 top-k。
+    持久化时向量存放在可内存映射的 ``<name>.npy`` 中（按容量倍增预分配，追加为均摊O(1)），
+    文档与元数据逐行追加到 ``<name>.meta.jsonl``；元数据行数即为有效记录数，
+    因此进程在写入向量后、写入元数据前退出不会留下半条记录。
+    """
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, name: str, persist_dir: Optional[str] = None):
+        self.name = name
+        self.persist_dir = os.path.abspath(persist_dir) if persist_dir else None
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # shape (capacity, dim)
+        self._records: List[Dict[str, Any]] = []
+        self._meta_signature = None
+
+        if self.persist_dir:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            self.vectors_path = os.path.join(self.persist_dir, f"{name}.npy")
+            self.meta_path = os.path.join(self.persist_dir, f"{name}.meta.jsonl")
+            self._load()
+
+    @staticmethod
+    def exists(name: str, persist_dir: str) -> bool:
+        return os.path.exists(os.path.join(persist_dir, f"{name}.meta.jsonl"))
+
+    # ---- persistence ----
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.meta_path)
+            return stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        """从磁盘加载（向量使用只读内存映射，不整体读入内存）"""
+        records = []
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        records.append(json.loads(line))
+        self._records = records
+        if records and os.path.exists(self.vectors_path):
+            self._matrix = np.load(self.vectors_path, mmap_mode="r")
+        else:
+            self._matrix = None
+        self._meta_signature = self._signature()
+
+    def _refresh_if_changed(self):
+        """其他进程追加了记录时重新加载"""
+        if self.persist_dir and self._signature() != self._meta_signature:
+            self._load()
+
+    def _ensure_capacity(self, dim: int, needed: int):
+        current = self._matrix
+        if current is not None and current.shape[1] != dim:
+            raise ValueError(f"嵌入维度不一致: 已有 {current.shape[1]}, 新增 {dim}")
+        if current is not None and current.shape[0] >= needed:
+            if self.persist_dir and current.flags.writeable is False:
+                self._matrix = np.lib.format.open_memmap(self.vectors_path, mode="r+")
+            return
+
+        capacity = max(self.INITIAL_CAPACITY, current.shape[0] * 2 if current is not None else 0)
+        while capacity < needed:
+            capacity *= 2
+        count = len(self._records)
+
+        if self.persist_dir:
+            tmp_path = self.vectors_path + ".tmp.npy"
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, dim))
+            if current is not None and count:
+                grown[:count] = current[:count]
+            grown.flush()
+            del grown
+            os.replace(tmp_path, self.vectors_path)
+            self._matrix = np.lib.format.open_memmap(self.vectors_path, mode="r+")
+        else:
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            if current is not None and count:
+                grown[:count] = current[:count]
+            self._matrix = grown
+
+    # ---- collection API ----
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh_if_changed()
+            return len(self._records)
+
+    def add(self, documents, metadatas, embeddings, ids):
+        """追加记录（向量先写入，元数据行最后追加作为提交点）"""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(documents):
+            raise ValueError("embeddings 必须是与 documents 等长的二维数组")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+
+        with self._lock:
+            self._refresh_if_changed()
+            start = len(self._records)
+            self._ensure_capacity(vectors.shape[1], start + len(vectors))
+            self._matrix[start:start + len(vectors)] = vectors
+
+            new_records = [
+                {"id": str(record_id), "document": document, "metadata": metadata}
+                for record_id, document, metadata in zip(ids, documents, metadatas)
+            ]
+            if self.persist_dir:
+                self._matrix.flush()
+                with open(self.meta_path, "a", encoding="utf-8") as f:
+                    for record in new_records:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._meta_signature = self._signature()
+            self._records.extend(new_records)
+
+    def query(self, query_embeddings, n_results=1, include=None):
+        """余弦相似度 top-k 检索，返回格式与ChromaDB一致（distance = 1 - 余弦相似度）"""
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            self._refresh_if_changed()
+            count = len(self._records)
+            matrix = self._matrix[:count] if count else None
+            records = self._records[:count]
+
+        for query_embedding in query_embeddings:
+            if matrix is None:
+                for key in result:
+                    result[key].append([])
+                continue
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm > 0:
+                query = query / norm
+            scores = matrix @ query
+
+            k = min(n_results, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            result["ids"].append([records[i]["id"] for i in top])
+            result["documents"].append([records[i]["document"] for i in top])
+            result["metadatas"].append([records[i]["metadata"] for i in top])
+            result["distances"].append([float(1.0 - scores[i]) for i in top])
+        return result
@@ -7,6 +7,9 @@ AKShare数据源工具
 import pandas as pd
 from typing import Optional, Dict, Any
 import warnings
+
+from .indicator_engine import latest_indicators
+
 warnings.filterwarnings('ignore')
 
 class AKShareProvider:
@@ -73,13 +76,20 @@ class AKShareProvider:
             else:
                 symbol = symbol.replace('.SZ', '').replace('.SS', '')
             
-            # 获取数据
-            data = self.ak.stock_zh_a_hist(
-                symbol=symbol,
-                period="daily",
-                start_date=start_date.replace('-', '') if start_date else "20240101",
-                end_date=end_date.replace('-', '') if end_date else "20241231",
-                adjust=""
+            def fetch_hist(gap_start: str, gap_end: str) -> pd.DataFrame:
+                return self.ak.stock_zh_a_hist(
+                    symbol=symbol,
+                    period="daily",
+                    start_date=gap_start.replace('-', ''),
+                    end_date=gap_end.replace('-', ''),
+                    adjust=""
+                )
+            
+            # 获取数据（本地已有的区间直接复用，只请求缺失部分）
+            from .bar_store import get_bar_store
+            data = get_bar_store().get_bars(
+                symbol, "akshare", start_date or "20240101", end_date or "20241231",
+                fetch_hist, date_column='日期'
             )
             
             return data
@@ -127,6 +137,18 @@ class AKShareProvider:
             print("❌ AKShare未连接")
             return None
 
+        # 本地已有的区间直接复用，只请求缺失部分
+        from .bar_store import get_bar_store
+        data = get_bar_store().get_bars(
+            self._normalize_hk_symbol_for_akshare(symbol), "akshare_hk",
+            start_date or "20240101", end_date or "20241231",
+            lambda gap_start, gap_end: self._fetch_hk_stock_data(symbol, gap_start, gap_end),
+            date_column='Date'
+        )
+        return data if not data.empty else None
+
+    def _fetch_hk_stock_data(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """从AKShare获取港股历史数据"""
         try:
             # 标准化港股代码 - AKShare使用5位数字格式
             hk_symbol = self._normalize_hk_symbol_for_akshare(symbol)
@@ -134,8 +156,8 @@ class AKShareProvider:
             print(f"🇭🇰 AKShare获取港股数据: {hk_symbol} ({start_date} 到 {end_date})")
 
             # 格式化日期为AKShare需要的格式
-            start_date_formatted = start_date.replace('-', '') if start_date else "20240101"
-            end_date_formatted = end_date.replace('-', '') if end_date else "20241231"
+            start_date_formatted = start_date.replace('-', '')
+            end_date_formatted = end_date.replace('-', '')
 
             # 使用AKShare获取港股历史数据（带超时保护）
             import threading
@@ -411,6 +433,9 @@ def format_hk_stock_data_akshare(symbol: str, data: pd.DataFrame, start_date: st
         max_price = data['High'].max()
         min_price = data['Low'].min()
 
+        # 技术指标（NumPy指标引擎）
+        indicators = latest_indicators(data, ["close_5_sma", "close_10_sma", "close_20_sma", "rsi"])
+
         # 格式化输出
         formatted_text = f"""
 🇭🇰 港股数据报告 (AKShare)
@@ -433,6 +458,12 @@ def format_hk_stock_data_akshare(symbol: str, data: pd.DataFrame, start_date: st
 - 交易天数: {len(data)}天
 - 平均成交量: {avg_volume:,.0f}股
 
+技术指标:
+- MA5: HK${indicators['close_5_sma']:.2f}
+- MA10: HK${indicators['close_10_sma']:.2f}
+- MA20: HK${indicators['close_20_sma']:.2f}
+- RSI: {indicators['rsi']:.2f}
+
 最近5个交易日:
 """
 
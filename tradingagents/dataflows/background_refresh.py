@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+后台缓存刷新
+配合 stale-while-revalidate：请求直接返回稍旧的缓存，实际的数据源调用放到后台线程执行，
+同一数据同时只会排队一次刷新
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+# 后台刷新线程数
+DEFAULT_REFRESH_WORKERS = 2
+
+
+class BackgroundRefresher:
+    """按键去重的后台刷新任务队列"""
+
+    def __init__(self, max_workers: int = DEFAULT_REFRESH_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-refresh")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def schedule(self, key: str, fn: Callable, *args, **kwargs) -> Optional[Future]:
+        """
+        安排一次后台刷新；同一键已有排队或进行中的刷新时不重复安排
+
+        Returns:
+            新安排的 Future，已有刷新时返回 None
+        """
+        with self._lock:
+            if key in self._pending:
+                self.skipped += 1
+                return None
+            future = self._executor.submit(self._run, key, fn, args, kwargs)
+            self._pending[key] = future
+            self.scheduled += 1
+            return future
+
+    def _run(self, key: str, fn: Callable, args: tuple, kwargs: dict):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            self.failed += 1
+            print(f"⚠️ 后台刷新失败 {key}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def is_pending(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'scheduled': self.scheduled,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'pending': pending,
+        }
+
+
+# 全局实例
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def get_background_refresher() -> BackgroundRefresher:
+    """获取全局后台刷新实例"""
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = BackgroundRefresher()
+    return _refresher
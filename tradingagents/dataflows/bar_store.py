@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+区间感知的行情数据存储
+按 (股票代码, 数据源) 保存日线数据及已覆盖的日期区间：
+请求的区间已被覆盖时直接从本地切片返回，否则只向数据源请求缺失的部分并合并
+"""
+
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from .cache_metrics import get_cache_metrics
+from .dataframe_storage import ARROW_AVAILABLE, read_dataframe, write_dataframe
+from .market_calendar import get_market_calendar, market_for_symbol
+from .tiered_cache import cache_market_type
+
+# 数据源获取函数: fetch(start_date, end_date) -> DataFrame，日期格式 'YYYY-MM-DD'，区间两端均包含
+FetchFunc = Callable[[str, str], Optional[pd.DataFrame]]
+
+_DATE_FORMAT = '%Y-%m-%d'
+
+
+def _to_date(value) -> datetime:
+    return pd.Timestamp(value).to_pydatetime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def merge_intervals(intervals: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """合并重叠或相邻的日期区间"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def has_session(calendar, start: datetime, end: datetime) -> bool:
+    """[start, end] 内是否有交易日"""
+    day = start.date()
+    while day <= end.date():
+        if calendar.is_session(day):
+            return True
+        day += timedelta(days=1)
+    return False
+
+
+def missing_intervals(start: datetime, end: datetime,
+                      covered: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """计算 [start, end] 中未被已覆盖区间包含的部分"""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in merge_intervals(covered):
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - timedelta(days=1)))
+        cursor = max(cursor, covered_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class BarStore:
+    """按股票代码和数据源保存的日线数据存储"""
+
+    def __init__(self, store_dir: str):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    @staticmethod
+    def _entry_name(symbol: str, source: str) -> str:
+        return re.sub(r'[^0-9A-Za-z]+', '_', f"{source}_{symbol}")
+
+    def _paths(self, name: str) -> Tuple[Path, Path]:
+        suffix = 'arrow' if ARROW_AVAILABLE else 'pkl'
+        return self.store_dir / f"{name}.{suffix}", self.store_dir / f"{name}.json"
+
+    # ---- 读写 ----
+
+    def _load(self, name: str):
+        data_path, meta_path = self._paths(name)
+        if not meta_path.exists() or not data_path.exists():
+            return None, []
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            data = read_dataframe(data_path) if ARROW_AVAILABLE else pd.read_pickle(data_path)
+        except Exception as e:
+            print(f"⚠️ 行情存储读取失败，将重新获取: {name}, {e}")
+            return None, []
+        intervals = [(_to_date(s), _to_date(e)) for s, e in meta.get('intervals', [])]
+        return data, intervals
+
+    def _save(self, name: str, data: pd.DataFrame, intervals):
+        data_path, meta_path = self._paths(name)
+        tmp_path = data_path.with_name(data_path.name + '.tmp')
+        if ARROW_AVAILABLE:
+            write_dataframe(data, tmp_path)
+        else:
+            data.to_pickle(tmp_path)
+        tmp_path.replace(data_path)
+
+        # 元数据最后写入，作为提交点
+        meta = {
+            'intervals': [[s.strftime(_DATE_FORMAT), e.strftime(_DATE_FORMAT)] for s, e in intervals],
+            'rows': len(data),
+            'updated_at': datetime.now().isoformat(),
+        }
+        tmp_meta = meta_path.with_name(meta_path.name + '.tmp')
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        tmp_meta.replace(meta_path)
+
+    # ---- 日期处理 ----
+
+    @staticmethod
+    def _bar_dates(data: pd.DataFrame, date_column: Optional[str]) -> pd.DatetimeIndex:
+        values = data.index if date_column is None else data[date_column]
+        dates = pd.DatetimeIndex(pd.to_datetime(values))
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        return dates.normalize()
+
+    @staticmethod
+    def _normalize(data: pd.DataFrame, date_column: Optional[str]) -> pd.DataFrame:
+        """统一日期类型（去掉时区），便于合并与切片"""
+        data = data.copy()
+        if date_column is None:
+            index = pd.DatetimeIndex(pd.to_datetime(data.index))
+            data.index = index.tz_localize(None) if index.tz is not None else index
+        else:
+            column = pd.to_datetime(data[date_column])
+            if getattr(column.dt, 'tz', None) is not None:
+                column = column.dt.tz_localize(None)
+            data[date_column] = column
+        return data
+
+    def _merge(self, existing: Optional[pd.DataFrame], new_parts: List[pd.DataFrame],
+               date_column: Optional[str]) -> Optional[pd.DataFrame]:
+        frames = [f for f in [existing] + new_parts if f is not None and not f.empty]
+        if not frames:
+            return existing
+        merged = pd.concat(frames) if len(frames) > 1 else frames[0]
+        dates = self._bar_dates(merged, date_column)
+        # 同一交易日以最新获取的数据为准
+        keep = ~pd.Series(dates).duplicated(keep='last').to_numpy()
+        merged = merged[keep]
+        order = self._bar_dates(merged, date_column).argsort(kind='stable')
+        merged = merged.iloc[order]
+        return merged if date_column is None else merged.reset_index(drop=True)
+
+    @staticmethod
+    def _adjustment_changed(data: pd.DataFrame, part: pd.DataFrame, overlap_date: datetime,
+                            date_column: Optional[str], verify_column: str) -> bool:
+        """比较重叠K线的价格：复权价格在拆股/分红后会整体变化"""
+        stored = data[BarStore._bar_dates(data, date_column) == overlap_date]
+        fetched = part[BarStore._bar_dates(part, date_column) == overlap_date]
+        if stored.empty or fetched.empty or verify_column not in part.columns:
+            return False
+        old_value = float(stored[verify_column].iloc[-1])
+        new_value = float(fetched[verify_column].iloc[-1])
+        return abs(new_value - old_value) > 1e-6 * max(abs(old_value), 1.0)
+
+    def _fill_gaps(self, symbol: str, source: str, gaps, fetch: FetchFunc, data: Optional[pd.DataFrame],
+                   intervals, date_column: Optional[str], verify_column: Optional[str], labels: dict):
+        """
+        逐个请求缺口，返回 (新数据列表, 已覆盖区间, 是否检测到复权变化)
+
+        verify_column 不为空时，每个缺口额外请求它之前最近一根已保存的K线，用于检测历史价格是否被重新复权
+        """
+        # 按市场所在时区判断最近一个已收盘交易日，避免本机时区与市场不同时把盘中K线记为已覆盖
+        calendar = get_market_calendar(market_for_symbol(symbol))
+        settled = _to_date(calendar.last_settled_session(datetime.now().astimezone()))
+        metrics = get_cache_metrics()
+        stored_dates = self._bar_dates(data, date_column) if verify_column and data is not None and not data.empty else None
+        new_parts = []
+        for gap_start, gap_end in gaps:
+            fetch_start = gap_start
+            if stored_dates is not None:
+                earlier = stored_dates[stored_dates < gap_start]
+                if len(earlier):
+                    fetch_start = earlier[-1].to_pydatetime()
+
+            gap_desc = f"{gap_start.strftime(_DATE_FORMAT)} 到 {gap_end.strftime(_DATE_FORMAT)}"
+            if not has_session(calendar, gap_start, gap_end):
+                # 周末/节假日没有K线，直接记为已覆盖，不再请求数据源
+                intervals.append((gap_start, gap_end))
+                continue
+            try:
+                with metrics.source_call(source, labels['data_type'], labels['market']):
+                    part = fetch(fetch_start.strftime(_DATE_FORMAT), gap_end.strftime(_DATE_FORMAT))
+            except Exception as e:
+                print(f"⚠️ 行情缺口获取失败: {symbol} ({source}) {gap_desc}, {e}")
+                continue
+            if part is None or part.empty:
+                # 空结果可能是非交易日，也可能是数据源故障，不记为已覆盖
+                continue
+            part = self._normalize(part, date_column)
+            if fetch_start != gap_start and self._adjustment_changed(data, part, fetch_start, date_column, verify_column):
+                return [], [], True
+
+            print(f"📥 已补齐行情缺口: {symbol} ({source}) {gap_desc}, {len(part)}条")
+            new_parts.append(part)
+            # 尚未收盘的交易日不记为已覆盖，下次仍会重新获取
+            covered_end = min(gap_end, settled)
+            if covered_end >= gap_start:
+                intervals.append((gap_start, covered_end))
+        return new_parts, intervals, False
+
+    # ---- 对外接口 ----
+
+    def get_bars(self, symbol: str, source: str, start_date: str, end_date: str,
+                 fetch: FetchFunc, date_column: Optional[str] = None,
+                 verify_column: Optional[str] = None) -> pd.DataFrame:
+        """
+        获取 [start_date, end_date] 区间的日线数据，只请求本地未覆盖的部分
+
+        Args:
+            symbol: 股票代码
+            source: 数据源（如 "tdx", "tushare", "akshare", "yfinance"）
+            start_date: 开始日期（包含）
+            end_date: 结束日期（包含）
+            fetch: 从数据源获取指定区间数据的函数
+            date_column: 日期所在列名，None表示日期在索引中
+            verify_column: 复权价格列名（如 "Close"）。设置后补齐缺口时会重新获取一根已保存的K线做比对，
+                价格变化说明发生了拆股/分红复权，此时丢弃本地数据并重新获取完整区间
+
+        Returns:
+            DataFrame: 区间内的数据，列结构与数据源返回的一致
+        """
+        start, end = _to_date(start_date), _to_date(end_date)
+        name = self._entry_name(symbol, source)
+        metrics = get_cache_metrics()
+        labels = {'data_type': 'stock_data', 'market': cache_market_type(symbol), 'source': source}
+
+        with self._lock_for(name):
+            data, intervals = self._load(name)
+            gaps = missing_intervals(start, end, intervals)
+            metrics.record('bar_store', 'miss' if gaps else 'hit', **labels)
+
+            if gaps:
+                new_parts, new_intervals, adjusted = self._fill_gaps(
+                    symbol, source, gaps, fetch, data, list(intervals), date_column, verify_column, labels)
+                if adjusted:
+                    print(f"🔄 检测到复权价格变化（拆股/分红），重新获取完整区间: {symbol} ({source})")
+                    new_parts, new_intervals, _ = self._fill_gaps(
+                        symbol, source, [(start, end)], fetch, None, [], date_column, None, labels)
+                    if new_parts:
+                        data = None
+                    else:
+                        # 重新获取失败时继续使用本地数据
+                        new_intervals = intervals
+                covered_changed = merge_intervals(new_intervals) != merge_intervals(intervals)
+                intervals = merge_intervals(new_intervals)
+
+                if new_parts:
+                    data = self._merge(data, new_parts, date_column)
+                if (new_parts or covered_changed) and data is not None:
+                    try:
+                        self._save(name, data, intervals)
+                    except Exception as e:
+                        print(f"⚠️ 行情存储写入失败: {name}, {e}")
+            else:
+                print(f"⚡ 行情区间已在本地: {symbol} ({source}) {start_date} 到 {end_date}")
+
+        if data is None or data.empty:
+            return pd.DataFrame()
+
+        dates = self._bar_dates(data, date_column)
+        return data[(dates >= start) & (dates <= end)]
+
+    def covered_intervals(self, symbol: str, source: str) -> List[Tuple[str, str]]:
+        """返回本地已覆盖的日期区间"""
+        _, intervals = self._load(self._entry_name(symbol, source))
+        return [(s.strftime(_DATE_FORMAT), e.strftime(_DATE_FORMAT)) for s, e in intervals]
+
+
+# 全局行情存储实例
+_bar_store = None
+
+
+def get_bar_store() -> BarStore:
+    """获取全局行情存储实例（位于文件缓存目录下的 bars 子目录）"""
+    global _bar_store
+    if _bar_store is None:
+        from .cache_manager import get_cache
+        _bar_store = BarStore(get_cache().cache_dir / "bars")
+    return _bar_store
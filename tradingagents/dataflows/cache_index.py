@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+缓存元数据索引
+使用SQLite保存 StockDataCache 的元数据，按 (symbol, data_type, market_type, data_source, 日期范围)
+建立索引，替代逐个扫描 metadata/*_meta.json 文件
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# 索引表中的固定列，其余元数据字段存入 extra（JSON）
+INDEX_COLUMNS = [
+    'cache_key', 'symbol', 'data_type', 'market_type', 'data_source',
+    'start_date', 'end_date', 'file_path', 'file_format', 'cached_at', 'size_bytes',
+    'last_access', 'access_count',
+]
+
+# 旧版索引缺少的列（打开时自动补齐）
+_MIGRATED_COLUMNS = {
+    'last_access': 'TEXT',
+    'access_count': 'INTEGER DEFAULT 0',
+}
+
+# 内存层命中的访问记录先在进程内累积，满足任一条件时批量写入索引
+ACCESS_FLUSH_INTERVAL = 30  # 秒
+ACCESS_FLUSH_BATCH = 500  # 累积的不同缓存键数量
+
+# 淘汰顺序：LRU 按最近访问时间，LFU 按访问次数（相同时按最近访问时间）
+_EVICTION_ORDER = {
+    'lru': "COALESCE(last_access, cached_at) ASC",
+    'lfu': "access_count ASC, COALESCE(last_access, cached_at) ASC",
+}
+
+
+class CacheMetadataIndex:
+    """StockDataCache 的SQLite元数据索引（线程安全，可多进程共享）"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        # cache_key -> (最近访问时间, 累积的访问次数)
+        self._pending_access: Dict[str, tuple] = {}
+        self._last_access_flush = time.monotonic()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL模式下NORMAL同步级别已能保证一致性，避免每次记录访问都落盘同步
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                cache_key TEXT PRIMARY KEY,
+                symbol TEXT,
+                data_type TEXT,
+                market_type TEXT,
+                data_source TEXT,
+                start_date TEXT,
+                end_date TEXT,
+                file_path TEXT,
+                file_format TEXT,
+                cached_at TEXT,
+                size_bytes INTEGER DEFAULT 0,
+                extra TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_lookup
+                ON cache_entries (symbol, data_type, market_type, data_source, start_date, end_date);
+            CREATE INDEX IF NOT EXISTS idx_cache_type_time
+                ON cache_entries (data_type, cached_at);
+            CREATE INDEX IF NOT EXISTS idx_cache_time
+                ON cache_entries (cached_at);
+            """
+        )
+        existing = {row['name'] for row in self._conn.execute("PRAGMA table_info(cache_entries)")}
+        for column, column_type in _MIGRATED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE cache_entries ADD COLUMN {column} {column_type}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_category "
+            "ON cache_entries (data_type, market_type, last_access)"
+        )
+        self._conn.commit()
+        atexit.register(self.flush_accesses)
+
+    def _row_to_metadata(self, row: sqlite3.Row) -> Dict[str, Any]:
+        metadata = {key: row[key] for key in row.keys() if key != 'extra'}
+        if row['extra']:
+            metadata.update(json.loads(row['extra']))
+        return metadata
+
+    def put(self, cache_key: str, metadata: Dict[str, Any]):
+        """写入或替换一条元数据"""
+        record = {column: metadata.get(column) for column in INDEX_COLUMNS}
+        record['cache_key'] = cache_key
+        record['size_bytes'] = record['size_bytes'] or 0
+        record['access_count'] = record['access_count'] or 0
+        extra = {k: v for k, v in metadata.items() if k not in INDEX_COLUMNS}
+        record['extra'] = json.dumps(extra, ensure_ascii=False) if extra else None
+
+        columns = list(record.keys())
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO cache_entries ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                [record[c] for c in columns],
+            )
+            self._conn.commit()
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM cache_entries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return self._row_to_metadata(row) if row else None
+
+    def delete(self, cache_key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (cache_key,))
+            self._conn.commit()
+
+    def find(self, symbol: str = None, data_type: str = None, market_type: str = None,
+             data_source: str = None, start_date: str = None, end_date: str = None,
+             newer_than: str = None, limit: int = None) -> List[Dict[str, Any]]:
+        """按索引字段查询元数据，最新缓存在前；参数为None时不过滤该字段"""
+        clauses, params = [], []
+        for column, value in (('symbol', symbol), ('data_type', data_type),
+                              ('market_type', market_type), ('data_source', data_source),
+                              ('start_date', start_date), ('end_date', end_date)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if newer_than is not None:
+            clauses.append("cached_at >= ?")
+            params.append(newer_than)
+
+        query = "SELECT * FROM cache_entries"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY cached_at DESC"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_metadata(row) for row in rows]
+
+    def touch(self, cache_key: str):
+        """记录一次访问（用于LRU/LFU淘汰）"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE cache_entries SET last_access = MAX(COALESCE(last_access, ''), ?), "
+                "access_count = COALESCE(access_count, 0) + 1 WHERE cache_key = ?",
+                (datetime.now().isoformat(), cache_key),
+            )
+            self._conn.commit()
+
+    def record_access(self, cache_key: str):
+        """
+        延迟记录一次访问：先在进程内累积，每 ACCESS_FLUSH_INTERVAL 秒或累积 ACCESS_FLUSH_BATCH 个键时
+        批量写入（选择淘汰条目前也会先写入），内存层命中时不必每次都写SQLite
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            _, count = self._pending_access.get(cache_key, (now, 0))
+            self._pending_access[cache_key] = (now, count + 1)
+            due = (len(self._pending_access) >= ACCESS_FLUSH_BATCH
+                   or time.monotonic() - self._last_access_flush >= ACCESS_FLUSH_INTERVAL)
+        if due:
+            self.flush_accesses()
+
+    def flush_accesses(self):
+        """把累积的访问记录一次性写入索引"""
+        with self._lock:
+            pending, self._pending_access = self._pending_access, {}
+            self._last_access_flush = time.monotonic()
+            if not pending:
+                return
+            try:
+                self._conn.executemany(
+                    "UPDATE cache_entries SET last_access = MAX(COALESCE(last_access, ''), ?), "
+                    "access_count = COALESCE(access_count, 0) + ? WHERE cache_key = ?",
+                    [(last_access, count, cache_key) for cache_key, (last_access, count) in pending.items()],
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ 写入缓存访问记录失败: {e}")
+
+    def category_usage(self, data_type: str, market_type: str = None) -> Dict[str, int]:
+        """某一类缓存的条目数和字节数"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS count, COALESCE(SUM(size_bytes), 0) AS size_bytes FROM cache_entries "
+                "WHERE data_type = ? AND market_type IS ?",
+                (data_type, market_type),
+            ).fetchone()
+        return {'count': row['count'], 'size_bytes': row['size_bytes']}
+
+    def eviction_candidates(self, data_type: str, market_type: str = None, policy: str = 'lru',
+                            limit: int = 100, exclude_key: str = None) -> List[Dict[str, Any]]:
+        """按淘汰策略返回某一类缓存中最应淘汰的条目"""
+        order = _EVICTION_ORDER.get(policy, _EVICTION_ORDER['lru'])
+        # 先写入累积的访问记录，保证淘汰顺序准确
+        self.flush_accesses()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM cache_entries WHERE data_type = ? AND market_type IS ? AND cache_key != ? "
+                f"ORDER BY {order} LIMIT ?",
+                (data_type, market_type, exclude_key or '', int(limit)),
+            ).fetchall()
+        return [self._row_to_metadata(row) for row in rows]
+
+    def find_older_than(self, cutoff: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM cache_entries WHERE cached_at < ?", (cutoff,)
+            ).fetchall()
+        return [self._row_to_metadata(row) for row in rows]
+
+    def stats_by_type(self) -> Dict[str, Dict[str, int]]:
+        """按数据类型汇总条目数和字节数（单条SQL）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data_type, COUNT(*) AS count, COALESCE(SUM(size_bytes), 0) AS size_bytes "
+                "FROM cache_entries GROUP BY data_type"
+            ).fetchall()
+        return {row['data_type']: {'count': row['count'], 'size_bytes': row['size_bytes']} for row in rows}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    def import_legacy_metadata(self, metadata_dir: Path) -> int:
+        """一次性导入旧版 *_meta.json 元数据文件"""
+        imported = 0
+        for metadata_file in Path(metadata_dir).glob("*_meta.json"):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                data_file = Path(metadata.get('file_path', ''))
+                metadata['size_bytes'] = data_file.stat().st_size if data_file.exists() else 0
+                metadata.setdefault('cached_at', datetime.now().isoformat())
+                self.put(metadata_file.stem.replace('_meta', ''), metadata)
+                metadata_file.unlink()
+                imported += 1
+            except Exception as e:
+                print(f"⚠️ 导入旧版缓存元数据失败: {metadata_file}, {e}")
+        return imported
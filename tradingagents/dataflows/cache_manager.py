@@ -12,17 +12,32 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any, Union
 import hashlib
+import time
+
+from .cache_index import CacheMetadataIndex
+from .cache_metrics import get_cache_metrics, labels_from_key, labels_from_metadata
+from .market_calendar import market_data_expires_at
+from .memory_cache import DEFAULT_MEMORY_CACHE_MB, MemoryLRUCache
+from .tiered_cache import RemoteCacheTiers, cache_market_type, get_remote_tiers, make_cache_key
+from .dataframe_storage import (
+    ARROW_AVAILABLE, ARROW_FILE_FORMAT, read_dataframe, write_dataframe
+)
 
 
 class StockDataCache:
     """股票数据缓存管理器 - 支持美股和A股数据缓存优化"""
 
-    def __init__(self, cache_dir: str = None):
+    def __init__(self, cache_dir: str = None, eviction_policy: str = "lru",
+                 memory_cache_mb: int = DEFAULT_MEMORY_CACHE_MB,
+                 remote_tiers: Optional[RemoteCacheTiers] = None):
         """
         初始化缓存管理器
 
         Args:
             cache_dir: 缓存目录路径，默认为 tradingagents/dataflows/data_cache
+            eviction_policy: 超出容量限制时的淘汰策略，"lru"（最近最少使用）或 "lfu"（最不经常使用）
+            memory_cache_mb: 进程内内存缓存层的容量（MB），0 表示不使用
+            remote_tiers: 本地未命中时继续查找的远程缓存层（Redis/MongoDB），None 表示只用本地缓存
         """
         if cache_dir is None:
             # 获取当前文件所在目录
@@ -47,65 +62,76 @@ class StockDataCache:
                         self.china_fundamentals_dir, self.metadata_dir]:
             dir_path.mkdir(exist_ok=True)
 
+        # 元数据索引（SQLite），首次使用时导入旧版 *_meta.json 文件
+        self.metadata_index = CacheMetadataIndex(self.metadata_dir / "cache_index.sqlite")
+        if self.metadata_index.count() == 0:
+            imported = self.metadata_index.import_legacy_metadata(self.metadata_dir)
+            if imported:
+                print(f"📇 已将 {imported} 个旧版缓存元数据导入索引")
+
         # 缓存配置 - 针对不同市场设置不同的TTL
         self.cache_config = {
             'us_stock_data': {
                 'ttl_hours': 2,  # 美股数据缓存2小时（考虑到API限制）
                 'max_files': 1000,
+                'max_size_mb': 500,  # 磁盘占用上限
                 'description': '美股历史数据'
             },
             'china_stock_data': {
                 'ttl_hours': 1,  # A股数据缓存1小时（实时性要求高）
                 'max_files': 1000,
+                'max_size_mb': 500,  # 磁盘占用上限
                 'description': 'A股历史数据'
             },
             'us_news': {
                 'ttl_hours': 6,  # 美股新闻缓存6小时
                 'max_files': 500,
+                'max_size_mb': 100,  # 磁盘占用上限
                 'description': '美股新闻数据'
             },
             'china_news': {
                 'ttl_hours': 4,  # A股新闻缓存4小时
                 'max_files': 500,
+                'max_size_mb': 100,  # 磁盘占用上限
                 'description': 'A股新闻数据'
             },
             'us_fundamentals': {
                 'ttl_hours': 24,  # 美股基本面数据缓存24小时
                 'max_files': 200,
+                'max_size_mb': 50,  # 磁盘占用上限
                 'description': '美股基本面数据'
             },
             'china_fundamentals': {
                 'ttl_hours': 12,  # A股基本面数据缓存12小时
                 'max_files': 200,
+                'max_size_mb': 50,  # 磁盘占用上限
                 'description': 'A股基本面数据'
             }
         }
 
+        self.eviction_policy = eviction_policy
+
+        # 进程内内存缓存层：同一次运行中重复读取的数据不再读盘解析
+        self.memory_cache = MemoryLRUCache(memory_cache_mb * 1024 * 1024) if memory_cache_mb > 0 else None
+
+        # 远程缓存层：内存 → 磁盘 → Redis → MongoDB，本地未命中时读取并回填，写入时后台同步
+        self.remote_tiers = remote_tiers
+
+        # 命中率、读写字节数和延迟统计
+        self.metrics = get_cache_metrics()
+
         print(f"📁 缓存管理器初始化完成，缓存目录: {self.cache_dir}")
         print(f"🗄️ 数据库缓存管理器初始化完成")
         print(f"   美股数据: ✅ 已配置")
         print(f"   A股数据: ✅ 已配置")
 
     def _determine_market_type(self, symbol: str) -> str:
-        """根据股票代码确定市场类型"""
-        import re
-
-        # 判断是否为中国A股（6位数字）
-        if re.match(r'^\d{6}$', str(symbol)):
-            return 'china'
-        else:
-            return 'us'
+        """根据股票代码确定市场类型（6位数字为A股）"""
+        return cache_market_type(symbol)
     
     def _generate_cache_key(self, data_type: str, symbol: str, **kwargs) -> str:
-        """生成缓存键"""
-        # 创建一个包含所有参数的字符串
-        params_str = f"{data_type}_{symbol}"
-        for key, value in sorted(kwargs.items()):
-            params_str += f"_{key}_{value}"
-        
-        # 使用MD5生成短的唯一标识
-        cache_key = hashlib.md5(params_str.encode()).hexdigest()[:12]
-        return f"{symbol}_{data_type}_{cache_key}"
+        """生成缓存键（所有缓存层共用的键规则）"""
+        return make_cache_key(data_type, symbol, **kwargs)
     
     def _get_cache_path(self, data_type: str, cache_key: str, file_format: str = "json", symbol: str = None) -> Path:
         """获取缓存文件路径 - 支持市场分类"""
@@ -127,36 +153,150 @@ class StockDataCache:
 
         return base_dir / f"{cache_key}.{file_format}"
     
-    def _get_metadata_path(self, cache_key: str) -> Path:
-        """获取元数据文件路径"""
-        return self.metadata_dir / f"{cache_key}_meta.json"
-    
     def _save_metadata(self, cache_key: str, metadata: Dict[str, Any]):
-        """保存元数据"""
-        metadata_path = self._get_metadata_path(cache_key)
-        metadata['cached_at'] = datetime.now().isoformat()
-        
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        """保存元数据到索引，并按类别容量限制淘汰旧缓存（从远程层回填时保留原缓存时间）"""
+        metadata.setdefault('cached_at', datetime.now().isoformat())
+        data_file = Path(metadata.get('file_path', ''))
+        metadata['size_bytes'] = data_file.stat().st_size if data_file.is_file() else 0
+        self.metadata_index.put(cache_key, metadata)
+        if self.memory_cache is not None:
+            self.memory_cache.invalidate(cache_key)
+        self._enforce_limits(metadata.get('data_type'), metadata.get('market_type'), cache_key)
+
+    def _enforce_limits(self, data_type: str, market_type: str, keep_key: str = None):
+        """
+        增量淘汰：只检查刚写入的类别，超出 max_files 或 max_size_mb 时
+        按淘汰策略删除最应淘汰的条目（不扫描缓存目录）
+        """
+        limits = self.cache_config.get(f"{market_type}_{data_type}")
+        if not limits:
+            return
+
+        max_files = limits.get('max_files')
+        max_bytes = limits.get('max_size_mb', 0) * 1024 * 1024 or None
+        usage = self.metadata_index.category_usage(data_type, market_type)
+        excess_files = usage['count'] - max_files if max_files else 0
+        excess_bytes = usage['size_bytes'] - max_bytes if max_bytes else 0
+        if excess_files <= 0 and excess_bytes <= 0:
+            return
+
+        evicted = 0
+        candidates = self.metadata_index.eviction_candidates(
+            data_type, market_type, self.eviction_policy,
+            limit=max(excess_files, 0) + 100, exclude_key=keep_key
+        )
+        for metadata in candidates:
+            if excess_files <= 0 and excess_bytes <= 0:
+                break
+            try:
+                self._remove_entry(metadata)
+            except Exception as e:
+                print(f"⚠️ 淘汰缓存时出错: {e}")
+                continue
+            excess_files -= 1
+            excess_bytes -= metadata.get('size_bytes') or 0
+            evicted += 1
+
+        if evicted:
+            desc = limits.get('description', '数据')
+            print(f"🧹 {desc}超出容量限制，已按{self.eviction_policy.upper()}淘汰 {evicted} 个缓存")
     
     def _load_metadata(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """加载元数据"""
-        metadata_path = self._get_metadata_path(cache_key)
-        if not metadata_path.exists():
-            return None
-        
+        """从索引加载元数据；本地没有时从远程缓存层回填"""
         try:
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            metadata = self.metadata_index.get(cache_key)
         except Exception as e:
             print(f"⚠️ 加载元数据失败: {e}")
             return None
+        if metadata is None and self.remote_tiers is not None:
+            metadata = self._promote_from_remote(cache_key)
+        return metadata
+
+    def _promote_from_remote(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """从远程缓存层读取条目并写入本地磁盘（保留原缓存时间，TTL不会因回填而延长）"""
+        entry = self.remote_tiers.get(cache_key)
+        if entry is None:
+            return None
+        data, remote_metadata, _ = entry
+        metadata = {k: v for k, v in remote_metadata.items()
+                    if k not in ('file_path', 'file_format', 'size_bytes', 'last_access', 'access_count')}
+        try:
+            self._write_entry(cache_key, data, metadata)
+        except Exception as e:
+            print(f"⚠️ 远程缓存回填本地失败: {e}")
+            return None
+        print(f"⬇️ 从远程缓存回填: {cache_key}")
+        return self.metadata_index.get(cache_key)
+
+    def _write_entry(self, cache_key: str, data: Union[pd.DataFrame, str], metadata: Dict[str, Any]):
+        """写入本地数据文件和元数据（DataFrame 使用Arrow IPC，其余写为文本）"""
+        data_type = metadata['data_type']
+        symbol = metadata.get('symbol')
+        started = time.perf_counter()
+        if isinstance(data, pd.DataFrame):
+            cache_path, file_format = self._write_dataframe(data_type, cache_key, data, symbol)
+        else:
+            file_format = 'txt'
+            cache_path = self._get_cache_path(data_type, cache_key, "txt", symbol)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                f.write(str(data))
+
+        metadata['file_path'] = str(cache_path)
+        metadata['file_format'] = file_format
+        self._save_metadata(cache_key, metadata)
+        self.metrics.record('file', 'write', latency=time.perf_counter() - started,
+                            bytes_written=metadata.get('size_bytes') or 0, **labels_from_metadata(metadata))
+
+    def _write_behind(self, cache_key: str, data: Union[pd.DataFrame, str], metadata: Dict[str, Any]):
+        """将新写入的条目交给远程缓存层后台写入（与本地条目同时过期）"""
+        if self.remote_tiers is None:
+            return
+        remote_metadata = {k: v for k, v in metadata.items()
+                           if k not in ('file_path', 'file_format', 'size_bytes', 'last_access', 'access_count')}
+        try:
+            self.remote_tiers.put(cache_key, data, remote_metadata, self._metadata_expires_at(metadata))
+        except Exception as e:
+            print(f"⚠️ 远程缓存写入失败: {e}")
+
+    def _remove_entry(self, metadata: Dict[str, Any]):
+        """删除缓存数据文件及其索引记录"""
+        data_file = Path(metadata.get('file_path') or '')
+        if data_file.is_file():
+            data_file.unlink()
+        self.metadata_index.delete(metadata['cache_key'])
+        if self.memory_cache is not None:
+            self.memory_cache.invalidate(metadata['cache_key'])
+
+    def find_cache_entries(self, symbol: str = None, data_type: str = None,
+                           market_type: str = None, data_source: str = None):
+        """
+        按索引字段查询缓存元数据（不检查TTL），最新缓存在前
+
+        Returns:
+            元数据字典列表，每项包含 cache_key
+        """
+        return self.metadata_index.find(symbol=symbol, data_type=data_type,
+                                        market_type=market_type, data_source=data_source)
     
     def is_cache_valid(self, cache_key: str, max_age_hours: int = None, symbol: str = None, data_type: str = None) -> bool:
         """检查缓存是否有效 - 支持智能TTL配置"""
         metadata = self._load_metadata(cache_key)
         if not metadata:
             return False
+        is_valid = self._is_metadata_valid(metadata, max_age_hours, symbol, data_type)
+        if not is_valid:
+            self.metrics.record('file', 'stale', **labels_from_metadata(metadata))
+        return is_valid
+
+    def _metadata_expires_at(self, metadata: Dict[str, Any], max_age_hours: int = None,
+                             symbol: str = None, data_type: str = None) -> Optional[datetime]:
+        """
+        计算缓存条目的过期时间，None 表示长期有效
+
+        行情数据使用交易日历：结束日期已收盘的历史行情永久有效，包含未收盘交易日的数据
+        在下一个收盘时失效（交易时段内缓存的还受 ttl_hours 限制）；显式指定的 max_age_hours 仍为上限
+        """
+        explicit_ttl = max_age_hours is not None
 
         # 如果没有指定TTL，根据数据类型和市场自动确定
         if max_age_hours is None:
@@ -173,15 +313,31 @@ class StockDataCache:
                 max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
 
         cached_at = datetime.fromisoformat(metadata['cached_at'])
-        age = datetime.now() - cached_at
-
-        is_valid = age.total_seconds() < max_age_hours * 3600
+        flat_expiry = cached_at + timedelta(hours=max_age_hours)
+
+        if metadata.get('data_type', data_type) == 'stock_data':
+            expires_at = market_data_expires_at(metadata.get('symbol') or symbol, metadata.get('end_date'),
+                                                cached_at, max_age_hours * 3600)
+            if expires_at is not None and explicit_ttl:
+                expires_at = min(expires_at, flat_expiry)
+            return expires_at
+        return flat_expiry
+
+    def _is_metadata_valid(self, metadata: Dict[str, Any], max_age_hours: int = None,
+                           symbol: str = None, data_type: str = None) -> bool:
+        """根据已加载的元数据检查缓存是否有效"""
+        expires_at = self._metadata_expires_at(metadata, max_age_hours, symbol, data_type)
+        now = datetime.now()
+        is_valid = expires_at is None or now < expires_at
 
         if is_valid:
             market_type = self._determine_market_type(metadata.get('symbol', ''))
             cache_type = f"{market_type}_{metadata.get('data_type', 'stock_data')}"
             desc = self.cache_config.get(cache_type, {}).get('description', '数据')
-            print(f"✅ 缓存有效: {desc} - {metadata.get('symbol')} (剩余 {max_age_hours - age.total_seconds()/3600:.1f}h)")
+            if expires_at is None:
+                print(f"✅ 缓存有效: {desc} - {metadata.get('symbol')} (已收盘历史数据，长期有效)")
+            else:
+                print(f"✅ 缓存有效: {desc} - {metadata.get('symbol')} (剩余 {(expires_at - now).total_seconds()/3600:.1f}h)")
 
         return is_valid
     
@@ -208,27 +364,17 @@ class StockDataCache:
                                            source=data_source,
                                            market=market_type)
 
-        # 保存数据
-        if isinstance(data, pd.DataFrame):
-            cache_path = self._get_cache_path("stock_data", cache_key, "csv", symbol)
-            data.to_csv(cache_path, index=True)
-        else:
-            cache_path = self._get_cache_path("stock_data", cache_key, "txt", symbol)
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                f.write(str(data))
-
-        # 保存元数据
+        # 保存数据和元数据
         metadata = {
             'symbol': symbol,
             'data_type': 'stock_data',
             'market_type': market_type,
             'start_date': start_date,
             'end_date': end_date,
-            'data_source': data_source,
-            'file_path': str(cache_path),
-            'file_format': 'csv' if isinstance(data, pd.DataFrame) else 'txt'
+            'data_source': data_source
         }
-        self._save_metadata(cache_key, metadata)
+        self._write_entry(cache_key, data, metadata)
+        self._write_behind(cache_key, data, metadata)
 
         # 获取描述信息
         cache_type = f"{market_type}_stock_data"
@@ -236,19 +382,57 @@ class StockDataCache:
         print(f"💾 {desc}已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
     
-    def load_stock_data(self, cache_key: str) -> Optional[Union[pd.DataFrame, str]]:
-        """从缓存加载股票数据"""
+    def _load_through_memory(self, cache_key: str, reader) -> Optional[Any]:
+        """先查内存缓存层，未命中时从文件读取并按同样的过期时间放入内存"""
+        if self.memory_cache is not None:
+            started = time.perf_counter()
+            data = self.memory_cache.get(cache_key)
+            if data is not None:
+                # 内存命中也记录访问（批量写入索引），保证磁盘层LRU/LFU淘汰顺序准确
+                self.metadata_index.record_access(cache_key)
+                labels = self.memory_cache.labels(cache_key) or labels_from_key(cache_key)
+                self.metrics.record('memory', 'hit', latency=time.perf_counter() - started, **labels)
+                return data
+            self.metrics.record('memory', 'miss', latency=time.perf_counter() - started,
+                                **labels_from_key(cache_key))
+
+        started = time.perf_counter()
         metadata = self._load_metadata(cache_key)
-        if not metadata:
+        if not metadata or not Path(metadata['file_path']).exists():
+            self.metrics.record('file', 'miss', latency=time.perf_counter() - started,
+                                **labels_from_key(cache_key))
             return None
         
         cache_path = Path(metadata['file_path'])
-        if not cache_path.exists():
-            return None
-        
+        self.metadata_index.touch(cache_key)
+
+        data = reader(cache_key, metadata, cache_path)
+        labels = labels_from_metadata(metadata)
+        if data is not None:
+            self.metrics.record('file', 'hit', latency=time.perf_counter() - started,
+                                bytes_read=metadata.get('size_bytes') or 0, **labels)
+        else:
+            self.metrics.record('file', 'miss', latency=time.perf_counter() - started, **labels)
+        if data is not None and self.memory_cache is not None:
+            try:
+                self.memory_cache.put(cache_key, data, self._metadata_expires_at(metadata), labels)
+            except Exception as e:
+                print(f"⚠️ 写入内存缓存失败: {e}")
+        return data
+
+    def load_stock_data(self, cache_key: str) -> Optional[Union[pd.DataFrame, str]]:
+        """从缓存加载股票数据"""
+        return self._load_through_memory(cache_key, self._read_stock_file)
+
+    def _read_stock_file(self, cache_key: str, metadata: Dict[str, Any], cache_path: Path):
         try:
-            if metadata['file_format'] == 'csv':
-                return pd.read_csv(cache_path, index_col=0)
+            if metadata['file_format'] == ARROW_FILE_FORMAT:
+                return read_dataframe(cache_path)
+            elif metadata['file_format'] == 'csv':
+                data = pd.read_csv(cache_path, index_col=0)
+                if ARROW_AVAILABLE:
+                    self._migrate_csv_entry(cache_key, metadata, data)
+                return data
             else:
                 with open(cache_path, 'r', encoding='utf-8') as f:
                     return f.read()
@@ -256,6 +440,43 @@ class StockDataCache:
             print(f"⚠️ 加载缓存数据失败: {e}")
             return None
     
+    def _write_dataframe(self, data_type: str, cache_key: str, data: pd.DataFrame, symbol: str = None):
+        """写入DataFrame，优先使用Arrow IPC格式，失败时回退到CSV"""
+        if ARROW_AVAILABLE:
+            cache_path = self._get_cache_path(data_type, cache_key, ARROW_FILE_FORMAT, symbol)
+            try:
+                write_dataframe(data, cache_path)
+                return cache_path, ARROW_FILE_FORMAT
+            except Exception as e:
+                print(f"⚠️ Arrow格式写入失败，回退到CSV: {e}")
+                if cache_path.exists():
+                    cache_path.unlink()
+
+        cache_path = self._get_cache_path(data_type, cache_key, "csv", symbol)
+        data.to_csv(cache_path, index=True)
+        return cache_path, 'csv'
+
+    def _migrate_csv_entry(self, cache_key: str, metadata: Dict[str, Any], data: pd.DataFrame):
+        """将旧版CSV缓存转换为Arrow IPC格式（保留原缓存时间）"""
+        csv_path = Path(metadata['file_path'])
+        arrow_path = csv_path.with_suffix(f".{ARROW_FILE_FORMAT}")
+        try:
+            write_dataframe(data, arrow_path)
+        except Exception as e:
+            print(f"⚠️ CSV缓存迁移失败: {cache_key}, {e}")
+            if arrow_path.exists():
+                arrow_path.unlink()
+            return
+
+        metadata.update({
+            'file_path': str(arrow_path),
+            'file_format': ARROW_FILE_FORMAT,
+            'size_bytes': arrow_path.stat().st_size,
+        })
+        self.metadata_index.put(cache_key, metadata)
+        csv_path.unlink()
+        print(f"🔄 CSV缓存已迁移为Arrow格式: {cache_key}")
+
     def find_cached_stock_data(self, symbol: str, start_date: str = None,
                               end_date: str = None, data_source: str = None,
                               max_age_hours: int = None) -> Optional[str]:
@@ -274,11 +495,7 @@ class StockDataCache:
         """
         market_type = self._determine_market_type(symbol)
 
-        # 如果没有指定TTL，使用智能配置
-        if max_age_hours is None:
-            cache_type = f"{market_type}_stock_data"
-            max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
-
+        # 未指定TTL时由 _is_metadata_valid 按交易日历和智能配置判断
         # 生成查找键
         search_key = self._generate_cache_key("stock_data", symbol,
                                             start_date=start_date,
@@ -292,29 +509,61 @@ class StockDataCache:
             print(f"🎯 找到精确匹配的{desc}: {symbol} -> {search_key}")
             return search_key
 
-        # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存）
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'stock_data' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
-                        desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
-                        print(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
-                        return cache_key
-            except Exception:
+        # 如果没有精确匹配，查找部分匹配（相同股票代码、日期区间包含所请求区间的其他缓存）
+        for metadata in self.find_cache_entries(symbol=symbol, data_type='stock_data',
+                                                market_type=market_type, data_source=data_source):
+            if not self._range_covers(metadata, start_date, end_date):
                 continue
+            if self._is_metadata_valid(metadata, max_age_hours, symbol, 'stock_data'):
+                cache_key = metadata['cache_key']
+                desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
+                print(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
+                return cache_key
 
         desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
         print(f"❌ 未找到有效的{desc}缓存: {symbol}")
         return None
-    
+
+    @staticmethod
+    def _range_covers(metadata: Dict[str, Any], start_date: str = None, end_date: str = None) -> bool:
+        """缓存条目的 [start_date, end_date] 是否包含所请求的区间（None 表示不限）"""
+        cached_start, cached_end = metadata.get('start_date'), metadata.get('end_date')
+        if cached_start and (not start_date or str(start_date)[:10] < str(cached_start)[:10]):
+            return False
+        if cached_end and (not end_date or str(end_date)[:10] > str(cached_end)[:10]):
+            return False
+        return True
+
+    def find_stale_stock_data(self, symbol: str, start_date: str = None,
+                              end_date: str = None, data_source: str = None,
+                              max_stale_hours: float = 24) -> Optional[str]:
+        """
+        查找已过期但过期时间不超过 max_stale_hours 的精确匹配缓存（用于 stale-while-revalidate）
+
+        Returns:
+            cache_key: 找到可用的过期缓存时返回缓存键，否则返回None
+        """
+        market_type = self._determine_market_type(symbol)
+        cache_key = self._generate_cache_key("stock_data", symbol,
+                                             start_date=start_date,
+                                             end_date=end_date,
+                                             source=data_source,
+                                             market=market_type)
+        metadata = self._load_metadata(cache_key)
+        if not metadata or not Path(metadata['file_path']).exists():
+            return None
+
+        expires_at = self._metadata_expires_at(metadata, symbol=symbol, data_type='stock_data')
+        if expires_at is None:
+            return None  # 仍然有效，应由 find_cached_stock_data 命中
+
+        stale_for = datetime.now() - expires_at
+        if stale_for <= timedelta(0) or stale_for > timedelta(hours=max_stale_hours):
+            return None
+
+        print(f"🕰️ 找到可先行返回的过期缓存: {symbol} (已过期 {stale_for.total_seconds()/3600:.1f}h)")
+        return cache_key
+
     def save_news_data(self, symbol: str, news_data: str, 
                       start_date: str = None, end_date: str = None,
                       data_source: str = "unknown") -> str:
@@ -324,20 +573,16 @@ class StockDataCache:
                                            end_date=end_date,
                                            source=data_source)
         
-        cache_path = self._get_cache_path("news", cache_key, "txt")
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            f.write(news_data)
-        
         metadata = {
             'symbol': symbol,
             'data_type': 'news',
+            'market_type': self._determine_market_type(symbol),
             'start_date': start_date,
             'end_date': end_date,
-            'data_source': data_source,
-            'file_path': str(cache_path),
-            'file_format': 'txt'
+            'data_source': data_source
         }
-        self._save_metadata(cache_key, metadata)
+        self._write_entry(cache_key, news_data, metadata)
+        self._write_behind(cache_key, news_data, metadata)
         
         print(f"📰 新闻数据已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
@@ -351,34 +596,28 @@ class StockDataCache:
                                            market=market_type,
                                            date=datetime.now().strftime("%Y-%m-%d"))
         
-        cache_path = self._get_cache_path("fundamentals", cache_key, "txt", symbol)
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            f.write(fundamentals_data)
-        
         metadata = {
             'symbol': symbol,
             'data_type': 'fundamentals',
             'data_source': data_source,
-            'market_type': market_type,
-            'file_path': str(cache_path),
-            'file_format': 'txt'
+            'market_type': market_type
         }
-        self._save_metadata(cache_key, metadata)
+        self._write_entry(cache_key, fundamentals_data, metadata)
+        self._write_behind(cache_key, fundamentals_data, metadata)
         
         desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
         print(f"💼 {desc}已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
     
+    def load_news_data(self, cache_key: str) -> Optional[str]:
+        """从缓存加载新闻数据"""
+        return self._load_through_memory(cache_key, self._read_text_file)
+
     def load_fundamentals_data(self, cache_key: str) -> Optional[str]:
         """从缓存加载基本面数据"""
-        metadata = self._load_metadata(cache_key)
-        if not metadata:
-            return None
-        
-        cache_path = Path(metadata['file_path'])
-        if not cache_path.exists():
-            return None
-        
+        return self._load_through_memory(cache_key, self._read_text_file)
+
+    def _read_text_file(self, cache_key: str, metadata: Dict[str, Any], cache_path: Path) -> Optional[str]:
         try:
             with open(cache_path, 'r', encoding='utf-8') as f:
                 return f.read()
@@ -406,24 +645,21 @@ class StockDataCache:
             cache_type = f"{market_type}_fundamentals"
             max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
         
+        # 本地没有当天的缓存时，从远程缓存层回填
+        if data_source and self.remote_tiers is not None:
+            self._load_metadata(self._generate_cache_key("fundamentals", symbol,
+                                                         source=data_source,
+                                                         market=market_type,
+                                                         date=datetime.now().strftime("%Y-%m-%d")))
+        
         # 查找匹配的缓存
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'fundamentals' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-                    
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'fundamentals'):
-                        desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
-                        print(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        for metadata in self.find_cache_entries(symbol=symbol, data_type='fundamentals',
+                                                market_type=market_type, data_source=data_source):
+            if self._is_metadata_valid(metadata, max_age_hours, symbol, 'fundamentals'):
+                cache_key = metadata['cache_key']
+                desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
+                print(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
+                return cache_key
         
         desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
         print(f"❌ 未找到有效的{desc}缓存: {symbol} ({data_source})")
@@ -434,22 +670,10 @@ class StockDataCache:
         cutoff_time = datetime.now() - timedelta(days=max_age_days)
         cleared_count = 0
         
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+        for metadata in self.metadata_index.find_older_than(cutoff_time.isoformat()):
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                cached_at = datetime.fromisoformat(metadata['cached_at'])
-                if cached_at < cutoff_time:
-                    # 删除数据文件
-                    data_file = Path(metadata['file_path'])
-                    if data_file.exists():
-                        data_file.unlink()
-                    
-                    # 删除元数据文件
-                    metadata_file.unlink()
-                    cleared_count += 1
-                    
+                self._remove_entry(metadata)
+                cleared_count += 1
             except Exception as e:
                 print(f"⚠️ 清理缓存时出错: {e}")
         
@@ -465,33 +689,20 @@ class StockDataCache:
             'total_size_mb': 0
         }
         
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                data_type = metadata.get('data_type', 'unknown')
-                if data_type == 'stock_data':
-                    stats['stock_data_count'] += 1
-                elif data_type == 'news':
-                    stats['news_count'] += 1
-                elif data_type == 'fundamentals':
-                    stats['fundamentals_count'] += 1
-                
-                # 计算文件大小
-                data_file = Path(metadata['file_path'])
-                if data_file.exists():
-                    stats['total_size_mb'] += data_file.stat().st_size / (1024 * 1024)
-                
-                stats['total_files'] += 1
-                
-            except Exception:
-                continue
+        total_bytes = 0
+        for data_type, type_stats in self.metadata_index.stats_by_type().items():
+            if data_type in ('stock_data', 'news', 'fundamentals'):
+                stats[f'{data_type}_count'] = type_stats['count']
+            stats['total_files'] += type_stats['count']
+            total_bytes += type_stats['size_bytes']
         
-        stats['total_size_mb'] = round(stats['total_size_mb'], 2)
+        stats['total_size_mb'] = round(total_bytes / (1024 * 1024), 2)
+        if self.memory_cache is not None:
+            stats['memory_cache'] = self.memory_cache.get_stats()
+        if self.remote_tiers is not None:
+            stats['remote_tiers'] = self.remote_tiers.get_stats()
         return stats
 
-
 # 全局缓存实例
 _cache_instance = None
 
@@ -499,5 +710,5 @@ def get_cache() -> StockDataCache:
     """获取全局缓存实例"""
     global _cache_instance
     if _cache_instance is None:
-        _cache_instance = StockDataCache()
+        _cache_instance = StockDataCache(remote_tiers=get_remote_tiers())
     return _cache_instance
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+缓存与数据源指标
+按 (层级, 数据类型, 市场, 数据源) 统计命中/未命中/过期次数、读写字节数和延迟分布，
+供程序调用（get_cache_metrics().snapshot()）或写入快照文件给 Streamlit 缓存管理页面展示
+
+层级(tier)：memory / file / redis / mongodb / source（数据源调用）
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# 延迟直方图桶上限（毫秒），最后一个桶为无穷大
+LATENCY_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+
+# 自动写入快照的最短间隔（秒）
+SNAPSHOT_INTERVAL_SECONDS = 30
+
+# 计数类事件
+OUTCOMES = ('hit', 'miss', 'stale', 'write', 'call', 'error')
+# 已退出进程的指标归档文件（不匹配 cache_metrics_*.json）
+ARCHIVE_FILENAME = "cache_metrics.archive.json"
+
+_CACHE_DATA_TYPES = ('stock_data', 'news', 'fundamentals')
+
+
+def labels_from_key(cache_key: str) -> Dict[str, str]:
+    """从统一缓存键（{symbol}_{data_type}_{hash}）推断数据类型和市场，用于没有元数据的未命中事件"""
+    from .tiered_cache import cache_market_type
+
+    for data_type in _CACHE_DATA_TYPES:
+        marker = f"_{data_type}_"
+        if marker in cache_key:
+            symbol = cache_key.split(marker, 1)[0]
+            return {'data_type': data_type, 'market': cache_market_type(symbol), 'source': ''}
+    return {'data_type': '', 'market': '', 'source': ''}
+
+
+def labels_from_metadata(metadata: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        'data_type': metadata.get('data_type') or '',
+        'market': metadata.get('market_type') or '',
+        'source': metadata.get('data_source') or '',
+    }
+
+
+class _Series:
+    """单个 (tier, data_type, market, source) 组合的统计"""
+
+    __slots__ = ('counts', 'bytes_read', 'bytes_written', 'latency_buckets', 'latency_count', 'latency_sum_ms')
+
+    def __init__(self):
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.latency_count = 0
+        self.latency_sum_ms = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.counts,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'latency_buckets': list(self.latency_buckets),
+            'latency_count': self.latency_count,
+            'latency_sum_ms': self.latency_sum_ms,
+        }
+
+    def merge_dict(self, data: Dict[str, Any]):
+        for outcome in OUTCOMES:
+            self.counts[outcome] += data.get(outcome, 0)
+        self.bytes_read += data.get('bytes_read', 0)
+        self.bytes_written += data.get('bytes_written', 0)
+        for i, count in enumerate(data.get('latency_buckets', [])[:len(self.latency_buckets)]):
+            self.latency_buckets[i] += count
+        self.latency_count += data.get('latency_count', 0)
+        self.latency_sum_ms += data.get('latency_sum_ms', 0.0)
+
+
+def _percentile_ms(buckets: List[int], count: int, q: float) -> Optional[float]:
+    """按直方图估算分位数（返回所在桶的上限）"""
+    if not count:
+        return None
+    target = q * count
+    cumulative = 0
+    for upper, bucket_count in zip(LATENCY_BUCKETS_MS, buckets):
+        cumulative += bucket_count
+        if cumulative >= target:
+            return upper
+    return LATENCY_BUCKETS_MS[-1]
+
+
+def summarize_series(key: Tuple[str, str, str, str], data: Dict[str, Any]) -> Dict[str, Any]:
+    """把原始统计转换为便于展示的一行"""
+    tier, data_type, market, source = key
+    lookups = data.get('hit', 0) + data.get('miss', 0) + data.get('stale', 0)
+    count = data.get('latency_count', 0)
+    return {
+        'tier': tier,
+        'data_type': data_type,
+        'market': market,
+        'source': source,
+        'hits': data.get('hit', 0),
+        'misses': data.get('miss', 0),
+        'stale': data.get('stale', 0),
+        'writes': data.get('write', 0),
+        'calls': data.get('call', 0),
+        'errors': data.get('error', 0),
+        'hit_rate': round(data.get('hit', 0) / lookups, 4) if lookups else None,
+        'bytes_read': data.get('bytes_read', 0),
+        'bytes_written': data.get('bytes_written', 0),
+        'latency_avg_ms': round(data.get('latency_sum_ms', 0.0) / count, 3) if count else None,
+        'latency_p50_ms': _percentile_ms(data.get('latency_buckets', []), count, 0.5),
+        'latency_p95_ms': _percentile_ms(data.get('latency_buckets', []), count, 0.95),
+        'latency_buckets': data.get('latency_buckets', []),
+    }
+
+
+class CacheMetrics:
+    """线程安全的缓存指标收集器"""
+
+    def __init__(self, snapshot_dir: Optional[str] = None,
+                 snapshot_interval: float = SNAPSHOT_INTERVAL_SECONDS):
+        """
+        Args:
+            snapshot_dir: 快照目录，每个进程写入 cache_metrics_<pid>.json；None 表示不写快照
+            snapshot_interval: 记录事件时自动写快照的最短间隔（秒）
+        """
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.snapshot_interval = snapshot_interval
+        self._series: Dict[Tuple[str, str, str, str], _Series] = {}
+        self._lock = threading.Lock()
+        self._last_snapshot = time.monotonic()
+        self.started_at = datetime.now()
+
+    def record(self, tier: str, outcome: str, data_type: str = '', market: str = '', source: str = '',
+               latency: Optional[float] = None, bytes_read: int = 0, bytes_written: int = 0):
+        """
+        记录一次事件
+
+        Args:
+            tier: 缓存层级或 "source"
+            outcome: hit / miss / stale / write / call / error
+            latency: 耗时（秒）
+        """
+        key = (tier, data_type or '', market or '', source or '')
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.counts[outcome] += 1
+            series.bytes_read += bytes_read
+            series.bytes_written += bytes_written
+            if latency is not None:
+                latency_ms = latency * 1000
+                series.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+                series.latency_count += 1
+                series.latency_sum_ms += latency_ms
+            due = self.snapshot_dir is not None and time.monotonic() - self._last_snapshot >= self.snapshot_interval
+            if due:
+                self._last_snapshot = time.monotonic()
+        if due:
+            self.write_snapshot()
+
+    @contextmanager
+    def source_call(self, source: str, data_type: str = '', market: str = ''):
+        """统计一次数据源调用的耗时；调用抛出异常时记为 error"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record('source', 'error', data_type, market, source, time.perf_counter() - started)
+            raise
+        self.record('source', 'call', data_type, market, source, time.perf_counter() - started)
+
+    def raw(self) -> Dict[Tuple[str, str, str, str], Dict[str, Any]]:
+        with self._lock:
+            return {key: series.to_dict() for key, series in self._series.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前进程的指标快照"""
+        raw = self.raw()
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'started_at': self.started_at.isoformat(),
+            'pid': os.getpid(),
+            'latency_buckets_ms': [b if b != float('inf') else None for b in LATENCY_BUCKETS_MS],
+            'series': [{'key': list(key), **data} for key, data in raw.items()],
+            'summary': [summarize_series(key, data) for key, data in sorted(raw.items())],
+        }
+
+    def write_snapshot(self, path: Optional[str] = None) -> Optional[Path]:
+        """写入快照文件（原子替换），返回文件路径"""
+        if path is None:
+            if self.snapshot_dir is None:
+                return None
+            path = self.snapshot_dir / f"cache_metrics_{os.getpid()}.json"
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            print(f"⚠️ 写入缓存指标快照失败: {e}")
+            return None
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self.started_at = datetime.now()
+
+
+def _pid_alive(pid: int) -> bool:
+    """进程是否仍在运行（无法判断时按存活处理）"""
+    if pid == os.getpid():
+        return True
+    if PSUTIL_AVAILABLE:
+        return psutil.pid_exists(pid)
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _read_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _merge_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[Tuple[str, str, str, str], Dict[str, Any]]:
+    merged: Dict[Tuple[str, str, str, str], _Series] = {}
+    for snapshot in snapshots:
+        for item in snapshot.get('series', []):
+            key = tuple(item['key'])
+            merged.setdefault(key, _Series()).merge_dict(item)
+    return {key: series.to_dict() for key, series in merged.items()}
+
+
+def _archive_dead_snapshots(snapshot_dir: Path) -> Dict[str, Any]:
+    """
+    把已退出进程的快照并入归档文件 ARCHIVE_FILENAME 后删除，返回归档内容
+
+    命令行/批量任务结束后指标仍保留在归档中，而 cache_metrics_<pid>.json 不会无限累积
+    """
+    from .single_flight import FCNTL_AVAILABLE, MSVCRT_AVAILABLE, _FileLock
+
+    archive_path = snapshot_dir / ARCHIVE_FILENAME
+    # 多个页面/进程同时归档时串行化，避免同一快照被重复计入
+    lock = (_FileLock(snapshot_dir / f"{ARCHIVE_FILENAME}.lock", timeout=10)
+            if FCNTL_AVAILABLE or MSVCRT_AVAILABLE else nullcontext())
+    with lock:
+        archive = _read_snapshot(archive_path) or {'processes': 0, 'series': []}
+        dead = []
+        for path in sorted(snapshot_dir.glob("cache_metrics_*.json")):
+            snapshot = _read_snapshot(path)
+            pid = snapshot.get('pid') if snapshot else None
+            if isinstance(pid, int) and not _pid_alive(pid):
+                dead.append((path, snapshot))
+        if not dead:
+            return archive
+
+        raw = _merge_snapshots([archive] + [snapshot for _, snapshot in dead])
+        archive = {
+            'updated_at': datetime.now().isoformat(),
+            'processes': archive.get('processes', 0) + len(dead),
+            'series': [{'key': list(key), **data} for key, data in raw.items()],
+        }
+        tmp_path = archive_path.with_name(f"{archive_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(archive, f, ensure_ascii=False)
+            os.replace(tmp_path, archive_path)
+        except OSError as e:
+            print(f"⚠️ 归档缓存指标快照失败: {e}")
+            return archive
+        for path, _ in dead:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    return archive
+
+
+def load_metrics_snapshot(snapshot_dir: str) -> Dict[str, Any]:
+    """
+    合并所有进程的快照，返回与 CacheMetrics.snapshot() 相同结构的汇总（summary 为展示用的行）
+
+    已退出进程的快照先并入归档文件，归档与存活进程的快照一起汇总
+    """
+    snapshot_dir = Path(snapshot_dir)
+    archive = _archive_dead_snapshots(snapshot_dir) if snapshot_dir.is_dir() else {'processes': 0, 'series': []}
+    live = [snapshot for snapshot in map(_read_snapshot, sorted(snapshot_dir.glob("cache_metrics_*.json")))
+            if snapshot is not None]
+
+    raw = _merge_snapshots([archive] + live)
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'processes': len(live) + archive.get('processes', 0),
+        'archived_processes': archive.get('processes', 0),
+        'series': [{'key': list(key), **data} for key, data in raw.items()],
+        'summary': [summarize_series(key, data) for key, data in sorted(raw.items())],
+    }
+
+
+# 全局实例
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def default_snapshot_dir() -> Path:
+    """默认快照目录（与默认文件缓存目录一致）"""
+    return Path(__file__).parent / "data_cache" / "metrics"
+
+
+def get_cache_metrics() -> CacheMetrics:
+    """获取全局缓存指标实例，进程退出时写入最后一次快照"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = CacheMetrics(default_snapshot_dir())
+                atexit.register(_write_final_snapshot)
+    return _metrics
+
+
+def _write_final_snapshot():
+    if _metrics is not None and _metrics.raw():
+        _metrics.write_snapshot()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+DataFrame 列式存储
+使用 Arrow IPC（Feather V2）格式保存缓存的 DataFrame，保留列类型和索引，
+读取时通过内存映射避免整体解析；pyarrow 不可用时调用方应回退到CSV/JSON
+"""
+
+from pathlib import Path
+from typing import Union
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+# Arrow IPC 文件扩展名与元数据中的格式名
+ARROW_FILE_FORMAT = "arrow"
+
+
+def _to_table(df: pd.DataFrame) -> "pa.Table":
+    # Arrow 要求列名为字符串（例如 yfinance 的多级列名需要先展开）
+    if isinstance(df.columns, pd.MultiIndex) or not all(isinstance(c, str) for c in df.columns):
+        df = df.copy()
+        df.columns = [
+            "_".join(str(level) for level in c if str(level)) if isinstance(c, tuple) else str(c)
+            for c in df.columns
+        ]
+    return pa.Table.from_pandas(df, preserve_index=True)
+
+
+def write_dataframe(df: pd.DataFrame, path: Union[str, Path]):
+    """将 DataFrame 写入未压缩的 Arrow IPC 文件（未压缩才能零拷贝内存映射）"""
+    table = _to_table(df)
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_dataframe(path: Union[str, Path]) -> pd.DataFrame:
+    """通过内存映射读取 Arrow IPC 文件"""
+    with pa.memory_map(str(path), "r") as source:
+        table = pa_ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def dataframe_to_bytes(df: pd.DataFrame) -> bytes:
+    """将 DataFrame 序列化为 Arrow IPC 字节串（用于数据库缓存）"""
+    table = _to_table(df)
+    sink = pa.BufferOutputStream()
+    with pa_ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def dataframe_from_bytes(data: bytes) -> pd.DataFrame:
+    """从 Arrow IPC 字节串还原 DataFrame（直接在缓冲区上读取，不复制）"""
+    return pa_ipc.open_stream(pa.py_buffer(data)).read_all().to_pandas()
@@ -10,6 +10,8 @@ from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 import os
 
+from .indicator_engine import latest_indicators
+
 
 class HKStockProvider:
     """港股数据提供器"""
@@ -255,6 +257,9 @@ class HKStockProvider:
             max_price = data['High'].max()
             min_price = data['Low'].min()
             
+            # 技术指标（NumPy指标引擎）
+            indicators = latest_indicators(data, ["close_5_sma", "close_10_sma", "close_20_sma", "rsi"])
+
             # 格式化输出
             formatted_text = f"""
 🇭🇰 港股数据报告
@@ -277,6 +282,12 @@ class HKStockProvider:
 - 交易天数: {len(data)}天
 - 平均成交量: {avg_volume:,.0f}股
 
+技术指标:
+- MA5: HK${indicators['close_5_sma']:.2f}
+- MA10: HK${indicators['close_10_sma']:.2f}
+- MA20: HK${indicators['close_20_sma']:.2f}
+- RSI: {indicators['rsi']:.2f}
+
 最近5个交易日:
 """
             
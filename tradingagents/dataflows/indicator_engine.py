@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+NumPy技术指标引擎
+在 (股票数 × 时间) 的二维价格数组上一次性计算 best_ind_params 中的全部指标
+（SMA/EMA/MACD/RSI/布林带/ATR/VWMA/MFI），并支持新K线到达时的增量更新。
+
+计算口径与 stockstats 一致（EMA 为 adjust=True 的指数加权、RSI/ATR 为 SMMA 平滑、
+滚动窗口 min_periods=1），因此可以直接替换 StockstatsUtils 中的逐只股票计算。
+
+二维数组的每一行是一只股票自己的K线序列，按K线右对齐（最后一列为最新K线），
+历史较短的股票左侧用 NaN 补齐，见 stack_series()。
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# stockstats 的默认参数
+MACD_WINDOWS = (12, 26, 9)
+BOLL_WINDOW = 20
+BOLL_STD_TIMES = 2
+DEFAULT_WINDOWS = {'rsi': 14, 'atr': 14, 'vwma': 14, 'mfi': 14}
+
+# interface.best_ind_params 中的指标
+DEFAULT_INDICATORS = (
+    "close_50_sma", "close_200_sma", "close_10_ema",
+    "macd", "macds", "macdh",
+    "rsi",
+    "boll", "boll_ub", "boll_lb", "atr",
+    "vwma", "mfi",
+)
+
+_NAME_PATTERN = re.compile(
+    r"^(?:close_(?P<ma_window>\d+)_(?P<ma>sma|ema)"
+    r"|(?P<macd>macd[sh]?)"
+    r"|(?P<boll>boll)(?P<band>_ub|_lb)?(?:_(?P<boll_window>\d+))?"
+    r"|(?P<kind>rsi|atr|vwma|mfi)(?:_(?P<window>\d+))?)$"
+)
+
+
+def parse_indicator(name: str) -> Optional[Tuple[str, int]]:
+    """解析指标名，返回 (类型, 窗口)；不支持的指标返回 None"""
+    match = _NAME_PATTERN.match(name)
+    if not match:
+        return None
+    if match.group('ma'):
+        return match.group('ma'), int(match.group('ma_window'))
+    if match.group('macd'):
+        return match.group('macd'), MACD_WINDOWS[2]
+    if match.group('boll'):
+        window = int(match.group('boll_window') or BOLL_WINDOW)
+        return 'boll' + (match.group('band') or ''), window
+    kind = match.group('kind')
+    return kind, int(match.group('window') or DEFAULT_WINDOWS[kind])
+
+
+def is_supported(name: str) -> bool:
+    parsed = parse_indicator(name)
+    return parsed is not None and parsed[1] > 0
+
+
+def stack_series(series_list: Sequence[Sequence[float]], length: Optional[int] = None) -> np.ndarray:
+    """把多只股票长度不同的序列右对齐堆叠为二维数组，左侧补 NaN"""
+    length = length or max((len(s) for s in series_list), default=0)
+    out = np.full((len(series_list), length), np.nan)
+    for row, values in enumerate(series_list):
+        values = np.asarray(values, dtype=float)[-length:] if length else np.empty(0)
+        if len(values):
+            out[row, length - len(values):] = values
+    return out
+
+
+# ==================== 向量化基础运算 ====================
+
+def _as_2d(values) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    return arr.reshape(1, -1) if arr.ndim == 1 else arr
+
+
+def _valid_count(values: np.ndarray) -> np.ndarray:
+    """每个位置之前（含）已有的K线数"""
+    return np.cumsum(~np.isnan(values), axis=1)
+
+
+def _prev(values: np.ndarray) -> np.ndarray:
+    """上一根K线的值，第一根K线取自身（与 stockstats 的 s_shift 一致）"""
+    out = np.empty_like(values)
+    out[:, 1:] = values[:, :-1]
+    out[:, 0] = values[:, 0]
+    first = np.isnan(out) & ~np.isnan(values)
+    out[first] = values[first]
+    return out
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """滚动求和（min_periods=1），同时返回窗口内有效值个数"""
+    valid = ~np.isnan(values)
+    csum = np.cumsum(np.where(valid, values, 0.0), axis=1)
+    ccount = np.cumsum(valid, axis=1)
+    total, count = csum.copy(), ccount.copy()
+    if window < values.shape[1]:
+        total[:, window:] -= csum[:, :-window]
+        count[:, window:] -= ccount[:, :-window]
+    total[count == 0] = np.nan
+    return total, count
+
+
+def rolling_mean(values, window: int) -> np.ndarray:
+    values = _as_2d(values)
+    total, count = _rolling_sum(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total / count
+
+
+def rolling_std(values, window: int) -> np.ndarray:
+    """滚动样本标准差（ddof=1，min_periods=1，只有一个值时为 NaN）"""
+    values = _as_2d(values)
+    # 先减去每行均值再累加平方，避免大数相减的精度损失
+    valid = ~np.isnan(values)
+    offset = np.where(valid, values, 0.0).sum(axis=1, keepdims=True) / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+    centered = values - offset
+    total, count = _rolling_sum(centered, window)
+    squares, _ = _rolling_sum(centered ** 2, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (squares - total ** 2 / count) / (count - 1)
+        return np.where(count > 1, np.sqrt(np.clip(variance, 0.0, None)), np.nan)
+
+
+def _ewm_step(num: np.ndarray, den: np.ndarray, x: np.ndarray, decay: float):
+    """adjust=True 的指数加权递推一步（ignore_na=False：缺失值也让权重衰减），用于增量更新"""
+    observed = ~np.isnan(x)
+    started = den > 0
+    num *= np.where(started, decay, 1.0)
+    den *= np.where(started, decay, 1.0)
+    num[observed] += x[observed]
+    den[observed] += 1.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def _decay_filter(values: np.ndarray, decay: float, block: int = 64) -> np.ndarray:
+    """
+    y_t = x_t + decay * y_{t-1} 的分块计算：块内用下三角衰减矩阵做一次矩阵乘法，
+    块间只传递一个累计量，Python 循环次数为 时间长度/block
+    """
+    n, length = values.shape
+    n_blocks = -(-length // block)
+    padded = np.zeros((n, n_blocks * block))
+    padded[:, :length] = values
+    blocks = padded.reshape(n, n_blocks, block)
+
+    lags = np.subtract.outer(np.arange(block), np.arange(block))
+    decay_matrix = np.tril(decay ** np.clip(lags, 0, None))
+    local = blocks @ decay_matrix.T
+    carry_decay = decay ** np.arange(1, block + 1)
+    carry = np.zeros(n)
+    for b in range(n_blocks):
+        local[:, b, :] += carry[:, None] * carry_decay
+        carry = local[:, b, -1]
+    return local.reshape(n, -1)[:, :length]
+
+
+def ewm_mean(values, alpha: float) -> np.ndarray:
+    """
+    指数加权平均（adjust=True，ignore_na=False），对所有股票同时计算：
+    分子为加权和、分母为权重和，两者都是一阶衰减递推
+    """
+    values = _as_2d(values)
+    observed = ~np.isnan(values)
+    decay = 1.0 - alpha
+    num = _decay_filter(np.where(observed, values, 0.0), decay)
+    den = _decay_filter(observed.astype(float), decay)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def ema(values, window: int) -> np.ndarray:
+    return ewm_mean(values, 2.0 / (window + 1))
+
+
+def smma(values, window: int) -> np.ndarray:
+    return ewm_mean(values, 1.0 / window)
+
+
+# ==================== 指标公式 ====================
+
+def _rsi_from_smma(up: np.ndarray, down: np.ndarray, count: np.ndarray) -> np.ndarray:
+    total = up + down
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = np.where(total != 0, 100 * up / total, 50.0)
+    rsi = np.where(count == 1, 50.0, rsi)
+    return np.where(count == 0, np.nan, rsi)
+
+
+def _gains_losses(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    diff = close - _prev(close)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    missing = np.isnan(close)
+    up[missing] = np.nan
+    down[missing] = np.nan
+    return up, down
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = _prev(close)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return tr
+
+
+def _typical_price(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    return (close + high + low) / 3.0
+
+
+def _vwma(tp: np.ndarray, volume: np.ndarray, window: int) -> np.ndarray:
+    tpv, _ = _rolling_sum(tp * volume, window)
+    vol, _ = _rolling_sum(volume, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.where(vol != 0, tpv / vol, 0.0)
+    return np.where(np.isnan(vol), np.nan, out)
+
+
+def _mfi(tp: np.ndarray, volume: np.ndarray, window: int, count: np.ndarray) -> np.ndarray:
+    tp_diff = tp - _prev(tp)
+    raw_flow = tp * volume
+    pos, _ = _rolling_sum(np.where(tp_diff > 0, raw_flow, np.where(np.isnan(tp), np.nan, 0.0)), window)
+    neg, _ = _rolling_sum(np.where(tp_diff < 0, raw_flow, np.where(np.isnan(tp), np.nan, 0.0)), window)
+    total = pos + neg
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mfi = np.where(total > 0, pos / total, 0.5)
+    mfi = np.where(count <= window, 0.5, mfi)
+    return np.where(count == 0, np.nan, mfi)
+
+
+def compute_indicators(close, high=None, low=None, volume=None,
+                       indicators: Iterable[str] = DEFAULT_INDICATORS) -> Dict[str, np.ndarray]:
+    """
+    一次性计算一批股票的指标
+
+    Args:
+        close/high/low/volume: 形状为 (股票数, 时间) 的数组（一维数组视为一只股票），
+            ATR 需要 high/low，VWMA/MFI 还需要 volume
+        indicators: 指标名列表，默认计算 DEFAULT_INDICATORS
+
+    Returns:
+        Dict[str, np.ndarray]: 指标名 -> 与输入同形状的二维数组
+    """
+    close = _as_2d(close)
+    high = _as_2d(high) if high is not None else None
+    low = _as_2d(low) if low is not None else None
+    volume = _as_2d(volume) if volume is not None else None
+    count = _valid_count(close)
+
+    results: Dict[str, np.ndarray] = {}
+    cache: Dict[tuple, np.ndarray] = {}
+
+    def cached(key, fn):
+        if key not in cache:
+            cache[key] = fn()
+        return cache[key]
+
+    for name in indicators:
+        parsed = parse_indicator(name)
+        if parsed is None:
+            raise ValueError(f"不支持的技术指标: {name}")
+        kind, window = parsed
+
+        if kind == 'sma':
+            results[name] = rolling_mean(close, window)
+        elif kind == 'ema':
+            results[name] = cached(('ema', window), lambda: ema(close, window))
+        elif kind.startswith('macd'):
+            short, long, signal = MACD_WINDOWS
+            macd = cached(('macd',), lambda: ema(close, short) - ema(close, long))
+            macds = cached(('macds',), lambda: ema(macd, signal))
+            results[name] = {'macd': macd, 'macds': macds, 'macdh': macd - macds}[kind]
+        elif kind == 'rsi':
+            up, down = cached(('gains',), lambda: _gains_losses(close))
+            results[name] = _rsi_from_smma(smma(up, window), smma(down, window), count)
+        elif kind.startswith('boll'):
+            mid = cached(('boll', window), lambda: rolling_mean(close, window))
+            width = cached(('boll_width', window), lambda: BOLL_STD_TIMES * rolling_std(close, window))
+            results[name] = {'boll': mid, 'boll_ub': mid + width, 'boll_lb': mid - width}[kind]
+        else:
+            if high is None or low is None:
+                raise ValueError(f"计算 {name} 需要最高价和最低价")
+            if kind == 'atr':
+                results[name] = smma(_true_range(high, low, close), window)
+                continue
+            if volume is None:
+                raise ValueError(f"计算 {name} 需要成交量")
+            tp = cached(('tp',), lambda: _typical_price(high, low, close))
+            if kind == 'vwma':
+                results[name] = _vwma(tp, volume, window)
+            else:
+                results[name] = _mfi(tp, volume, window, count)
+    return results
+
+
+# ==================== DataFrame 接口 ====================
+
+def _column(df: pd.DataFrame, name: str) -> Optional[np.ndarray]:
+    for col in df.columns:
+        if str(col).lower() == name:
+            return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+    return None
+
+
+def _frame_arrays(frames: Sequence[pd.DataFrame]) -> Dict[str, Optional[np.ndarray]]:
+    arrays = {}
+    for field in ('close', 'high', 'low', 'volume'):
+        columns = [_column(df, field) for df in frames]
+        arrays[field] = None if any(c is None for c in columns) else stack_series(columns)
+    return arrays
+
+
+def compute_frame(df: pd.DataFrame, indicators: Iterable[str] = DEFAULT_INDICATORS) -> pd.DataFrame:
+    """计算单只股票的指标，返回与 df 同索引的 DataFrame（列名不区分大小写地读取 OHLCV）"""
+    return compute_watchlist({'_': df}, indicators)['_']
+
+
+def compute_watchlist(frames: Dict[str, pd.DataFrame],
+                      indicators: Iterable[str] = DEFAULT_INDICATORS) -> Dict[str, pd.DataFrame]:
+    """一次计算整个自选股列表的指标，返回 {代码: 与原数据同索引的指标 DataFrame}"""
+    indicators = list(indicators)
+    symbols = list(frames)
+    if not symbols:
+        return {}
+    arrays = _frame_arrays([frames[s] for s in symbols])
+    if arrays['close'] is None:
+        raise ValueError("价格数据缺少收盘价列")
+    results = compute_indicators(arrays['close'], arrays['high'], arrays['low'], arrays['volume'], indicators)
+
+    length = arrays['close'].shape[1]
+    out = {}
+    for row, symbol in enumerate(symbols):
+        n = len(frames[symbol])
+        out[symbol] = pd.DataFrame(
+            {name: results[name][row, length - n:] for name in indicators},
+            index=frames[symbol].index,
+        )
+    return out
+
+
+def latest_indicators(df: pd.DataFrame, indicators: Iterable[str]) -> Dict[str, float]:
+    """最新一根K线的指标值"""
+    frame = compute_frame(df, indicators)
+    return {name: float(frame[name].iloc[-1]) for name in frame.columns} if len(frame) else {}
+
+
+# ==================== 增量更新 ====================
+
+class IndicatorState:
+    """
+    增量指标状态：保存每只股票的指数加权累计量和最近一段K线，
+    新K线到达时只做 O(股票数 × 窗口) 的计算，结果与全量重算一致
+    """
+
+    def __init__(self, indicators: Iterable[str] = DEFAULT_INDICATORS):
+        self.indicators = list(indicators)
+        self._parsed = {}
+        for name in self.indicators:
+            parsed = parse_indicator(name)
+            if parsed is None:
+                raise ValueError(f"不支持的技术指标: {name}")
+            self._parsed[name] = parsed
+        rolling_windows = [w for k, w in self._parsed.values() if k in ('sma', 'vwma', 'mfi') or k.startswith('boll')]
+        self.tail_length = max(rolling_windows, default=1) + 1
+
+        self.count = None
+        self._tail: Dict[str, np.ndarray] = {}
+        self._ewm: Dict[tuple, List[np.ndarray]] = {}
+
+    def _ewm_keys(self) -> List[tuple]:
+        keys = set()
+        for kind, window in self._parsed.values():
+            if kind == 'ema':
+                keys.add(('ema', window))
+            elif kind.startswith('macd'):
+                keys.update({('ema', MACD_WINDOWS[0]), ('ema', MACD_WINDOWS[1]), ('macds',)})
+            elif kind == 'rsi':
+                keys.update({('up', window), ('down', window)})
+            elif kind == 'atr':
+                keys.add(('atr', window))
+        return sorted(keys, key=str)
+
+    @staticmethod
+    def _alpha(key: tuple) -> float:
+        if key[0] == 'ema':
+            return 2.0 / (key[1] + 1)
+        if key[0] == 'macds':
+            return 2.0 / (MACD_WINDOWS[2] + 1)
+        return 1.0 / key[1]
+
+    @classmethod
+    def from_history(cls, close, high=None, low=None, volume=None,
+                     indicators: Iterable[str] = DEFAULT_INDICATORS) -> 'IndicatorState':
+        """用已有历史K线（二维数组，右对齐）初始化状态，累计量由批量计算得到"""
+        state = cls(indicators)
+        close = _as_2d(close)
+        n_symbols, length = close.shape
+        bars = {'close': close}
+        for field, value in (('high', high), ('low', low), ('volume', volume)):
+            bars[field] = _as_2d(value) if value is not None else np.full_like(close, np.nan)
+
+        state._reset(n_symbols)
+        state.count = _valid_count(close)[:, -1] if length else state.count
+        keep = min(length, state.tail_length)
+        for field, values in bars.items():
+            if keep:
+                state._tail[field][:, -keep:] = values[:, -keep:]
+
+        def seed(key, series):
+            observed = ~np.isnan(series)
+            decay = 1.0 - cls._alpha(key)
+            state._ewm[key] = [_decay_filter(np.where(observed, series, 0.0), decay)[:, -1],
+                               _decay_filter(observed.astype(float), decay)[:, -1]]
+
+        if length:
+            for key in state._ewm:
+                if key[0] == 'ema':
+                    seed(key, close)
+                elif key[0] in ('up', 'down'):
+                    up, down = _gains_losses(close)
+                    seed(key, up if key[0] == 'up' else down)
+                elif key[0] == 'atr':
+                    seed(key, _true_range(bars['high'], bars['low'], close))
+                elif key[0] == 'macds':
+                    seed(key, ema(close, MACD_WINDOWS[0]) - ema(close, MACD_WINDOWS[1]))
+        return state
+
+    def _reset(self, n_symbols: int):
+        self.count = np.zeros(n_symbols, dtype=int)
+        self._tail = {field: np.full((n_symbols, self.tail_length), np.nan)
+                      for field in ('close', 'high', 'low', 'volume')}
+        self._ewm = {key: [np.zeros(n_symbols), np.zeros(n_symbols)] for key in self._ewm_keys()}
+
+    def _step(self, key: tuple, x: np.ndarray, observed: np.ndarray) -> np.ndarray:
+        """只推进本次有新K线的股票，其余股票的累计量保持不变"""
+        num, den = self._ewm[key]
+        sub_num, sub_den = num[observed], den[observed]
+        _ewm_step(sub_num, sub_den, x[observed], 1.0 - self._alpha(key))
+        num[observed], den[observed] = sub_num, sub_den
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(den > 0, num / den, np.nan)
+
+    def update(self, close, high=None, low=None, volume=None) -> Dict[str, np.ndarray]:
+        """
+        追加一根新K线（每只股票一个值，没有新K线的股票传 NaN），返回各指标的最新值
+
+        Returns:
+            Dict[str, np.ndarray]: 指标名 -> 形状为 (股票数,) 的数组
+        """
+        close = np.atleast_1d(np.asarray(close, dtype=float))
+        if self.count is None:
+            self._reset(len(close))
+        bars = {'close': close}
+        for field, value in (('high', high), ('low', low), ('volume', volume)):
+            bars[field] = np.atleast_1d(np.asarray(value, dtype=float)) if value is not None else np.full(len(close), np.nan)
+
+        observed = ~np.isnan(close)
+        prev_close = np.where(self.count > 0, self._tail['close'][:, -1], close)
+        for field, value in bars.items():
+            tail = self._tail[field]
+            tail[observed] = np.roll(tail[observed], -1, axis=1)
+            tail[observed, -1] = value[observed]
+        self.count = self.count + observed
+
+        diff = close - prev_close
+        current = {}
+        for key in self._ewm:
+            if key[0] == 'ema':
+                current[key] = self._step(key, close, observed)
+            elif key[0] == 'up':
+                current[key] = self._step(key, np.where(diff > 0, diff, 0.0), observed)
+            elif key[0] == 'down':
+                current[key] = self._step(key, np.where(diff < 0, -diff, 0.0), observed)
+            elif key[0] == 'atr':
+                tr = np.fmax(bars['high'] - bars['low'],
+                             np.fmax(np.abs(bars['high'] - prev_close), np.abs(bars['low'] - prev_close)))
+                current[key] = self._step(key, tr, observed)
+        if ('macds',) in self._ewm:
+            macd = current[('ema', MACD_WINDOWS[0])] - current[('ema', MACD_WINDOWS[1])]
+            current[('macds',)] = self._step(('macds',), macd, observed)
+
+        return self._latest(current)
+
+    def _latest(self, current: Dict[tuple, np.ndarray]) -> Dict[str, np.ndarray]:
+        tail = self._tail
+        out = {}
+        for name, (kind, window) in self._parsed.items():
+            if kind == 'sma':
+                out[name] = rolling_mean(tail['close'], window)[:, -1]
+            elif kind == 'ema':
+                out[name] = current[('ema', window)]
+            elif kind.startswith('macd'):
+                macd = current[('ema', MACD_WINDOWS[0])] - current[('ema', MACD_WINDOWS[1])]
+                out[name] = {'macd': macd, 'macds': current[('macds',)],
+                             'macdh': macd - current[('macds',)]}[kind]
+            elif kind == 'rsi':
+                out[name] = _rsi_from_smma(current[('up', window)], current[('down', window)], self.count)
+            elif kind.startswith('boll'):
+                mid = rolling_mean(tail['close'], window)[:, -1]
+                width = BOLL_STD_TIMES * rolling_std(tail['close'][:, -window:], window)[:, -1]
+                out[name] = {'boll': mid, 'boll_ub': mid + width, 'boll_lb': mid - width}[kind]
+            elif kind == 'atr':
+                out[name] = current[('atr', window)]
+            else:
+                tp = _typical_price(tail['high'], tail['low'], tail['close'])
+                if kind == 'vwma':
+                    out[name] = _vwma(tp, tail['volume'], window)[:, -1]
+                else:
+                    # 尾部窗口内的位置计数只用于前 window 根K线取 0.5 的规则，按累计K线数判断
+                    mfi = _mfi(tp, tail['volume'], window, _valid_count(tail['close']))[:, -1]
+                    out[name] = np.where(self.count <= window, 0.5, mfi)
+                    out[name] = np.where(self.count == 0, np.nan, out[name])
+        return out
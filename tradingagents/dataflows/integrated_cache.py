@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 """
 集成缓存管理器
-结合原有缓存系统和新的自适应数据库支持
-提供向后兼容的接口
+统一分层缓存（内存 → 磁盘 → Redis → MongoDB）的兼容入口，
+所有读写都经过同一个 StockDataCache，使用同一套缓存键
 """
 
 import os
@@ -11,41 +11,39 @@ from pathlib import Path
 from typing import Any, Dict, Optional, Union
 import pandas as pd
 
-# 导入原有缓存系统
-from .cache_manager import StockDataCache
+# 导入统一缓存系统
+from .cache_manager import StockDataCache, get_cache as get_stock_cache_instance
+from .tiered_cache import get_remote_tiers
 
-# 导入自适应缓存系统
+# 导入数据库管理器（用于显示后端状态）
 try:
-    from .adaptive_cache import get_cache_system
     from ..config.database_manager import get_database_manager
     ADAPTIVE_CACHE_AVAILABLE = True
 except ImportError:
     ADAPTIVE_CACHE_AVAILABLE = False
 
 class IntegratedCacheManager:
-    """集成缓存管理器 - 智能选择缓存策略"""
+    """集成缓存管理器 - 统一分层缓存的兼容接口"""
     
     def __init__(self, cache_dir: str = None):
         self.logger = logging.getLogger(__name__)
         
-        # 初始化原有缓存系统（作为备用）
-        self.legacy_cache = StockDataCache(cache_dir)
-        
-        # 尝试初始化自适应缓存系统
-        self.adaptive_cache = None
-        self.use_adaptive = False
+        # 统一分层缓存：默认目录时复用全局实例，避免同一目录出现两份内存缓存层
+        if cache_dir is None:
+            self.unified_cache = get_stock_cache_instance()
+        else:
+            self.unified_cache = StockDataCache(cache_dir, remote_tiers=get_remote_tiers())
+        # 向后兼容：旧代码通过 legacy_cache 访问文件缓存
+        self.legacy_cache = self.unified_cache
         
+        # 远程缓存层（Redis/MongoDB）可用时视为启用了数据库缓存
+        self.db_manager = None
         if ADAPTIVE_CACHE_AVAILABLE:
             try:
-                self.adaptive_cache = get_cache_system()
                 self.db_manager = get_database_manager()
-                self.use_adaptive = True
-                self.logger.info("✅ 自适应缓存系统已启用")
             except Exception as e:
-                self.logger.warning(f"自适应缓存系统初始化失败，使用传统缓存: {e}")
-                self.use_adaptive = False
-        else:
-            self.logger.info("自适应缓存系统不可用，使用传统文件缓存")
+                self.logger.warning(f"数据库管理器初始化失败，仅使用本地缓存: {e}")
+        self.use_adaptive = self.unified_cache.remote_tiers is not None and self.db_manager is not None
         
         # 显示当前配置
         self._log_cache_status()
@@ -53,17 +51,13 @@ class IntegratedCacheManager:
     def _log_cache_status(self):
         """记录缓存状态"""
         if self.use_adaptive:
-            backend = self.adaptive_cache.primary_backend
-            mongodb_available = self.db_manager.is_mongodb_available()
-            redis_available = self.db_manager.is_redis_available()
-            
+            tiers = " → ".join(["memory", "file"] + self.unified_cache.remote_tiers.get_stats()['tiers'])
             self.logger.info(f"📊 缓存配置:")
-            self.logger.info(f"  主要后端: {backend}")
-            self.logger.info(f"  MongoDB: {'✅ 可用' if mongodb_available else '❌ 不可用'}")
-            self.logger.info(f"  Redis: {'✅ 可用' if redis_available else '❌ 不可用'}")
-            self.logger.info(f"  降级支持: {'✅ 启用' if self.adaptive_cache.fallback_enabled else '❌ 禁用'}")
+            self.logger.info(f"  缓存层: {tiers}")
+            self.logger.info(f"  MongoDB: {'✅ 可用' if self.db_manager.is_mongodb_available() else '❌ 不可用'}")
+            self.logger.info(f"  Redis: {'✅ 可用' if self.db_manager.is_redis_available() else '❌ 不可用'}")
         else:
-            self.logger.info("📁 使用传统文件缓存系统")
+            self.logger.info("📁 使用本地缓存（内存 + 文件）")
     
     def save_stock_data(self, symbol: str, data: Any, start_date: str = None, 
                        end_date: str = None, data_source: str = "default") -> str:
@@ -80,25 +74,13 @@ class IntegratedCacheManager:
         Returns:
             缓存键
         """
-        if self.use_adaptive:
-            # 使用自适应缓存系统
-            return self.adaptive_cache.save_data(
-                symbol=symbol,
-                data=data,
-                start_date=start_date or "",
-                end_date=end_date or "",
-                data_source=data_source,
-                data_type="stock_data"
-            )
-        else:
-            # 使用传统缓存系统
-            return self.legacy_cache.save_stock_data(
-                symbol=symbol,
-                data=data,
-                start_date=start_date,
-                end_date=end_date,
-                data_source=data_source
-            )
+        return self.unified_cache.save_stock_data(
+            symbol=symbol,
+            data=data,
+            start_date=start_date,
+            end_date=end_date,
+            data_source=data_source
+        )
     
     def load_stock_data(self, cache_key: str) -> Optional[Any]:
         """
@@ -110,12 +92,7 @@ class IntegratedCacheManager:
         Returns:
             股票数据或None
         """
-        if self.use_adaptive:
-            # 使用自适应缓存系统
-            return self.adaptive_cache.load_data(cache_key)
-        else:
-            # 使用传统缓存系统
-            return self.legacy_cache.load_stock_data(cache_key)
+        return self.unified_cache.load_stock_data(cache_key)
     
     def find_cached_stock_data(self, symbol: str, start_date: str = None, 
                               end_date: str = None, data_source: str = "default") -> Optional[str]:
@@ -131,105 +108,53 @@ class IntegratedCacheManager:
         Returns:
             缓存键或None
         """
-        if self.use_adaptive:
-            # 使用自适应缓存系统
-            return self.adaptive_cache.find_cached_data(
-                symbol=symbol,
-                start_date=start_date or "",
-                end_date=end_date or "",
-                data_source=data_source,
-                data_type="stock_data"
-            )
-        else:
-            # 使用传统缓存系统
-            return self.legacy_cache.find_cached_stock_data(
-                symbol=symbol,
-                start_date=start_date,
-                end_date=end_date,
-                data_source=data_source
-            )
+        return self.unified_cache.find_cached_stock_data(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            data_source=data_source
+        )
     
     def save_news_data(self, symbol: str, data: Any, data_source: str = "default") -> str:
         """保存新闻数据"""
-        if self.use_adaptive:
-            return self.adaptive_cache.save_data(
-                symbol=symbol,
-                data=data,
-                data_source=data_source,
-                data_type="news_data"
-            )
-        else:
-            return self.legacy_cache.save_news_data(symbol, data, data_source)
+        return self.unified_cache.save_news_data(symbol, data, data_source=data_source)
     
     def load_news_data(self, cache_key: str) -> Optional[Any]:
         """加载新闻数据"""
-        if self.use_adaptive:
-            return self.adaptive_cache.load_data(cache_key)
-        else:
-            return self.legacy_cache.load_news_data(cache_key)
+        return self.unified_cache.load_news_data(cache_key)
     
     def save_fundamentals_data(self, symbol: str, data: Any, data_source: str = "default") -> str:
         """保存基本面数据"""
-        if self.use_adaptive:
-            return self.adaptive_cache.save_data(
-                symbol=symbol,
-                data=data,
-                data_source=data_source,
-                data_type="fundamentals_data"
-            )
-        else:
-            return self.legacy_cache.save_fundamentals_data(symbol, data, data_source)
+        return self.unified_cache.save_fundamentals_data(symbol, data, data_source)
     
     def load_fundamentals_data(self, cache_key: str) -> Optional[Any]:
         """加载基本面数据"""
-        if self.use_adaptive:
-            return self.adaptive_cache.load_data(cache_key)
-        else:
-            return self.legacy_cache.load_fundamentals_data(cache_key)
+        return self.unified_cache.load_fundamentals_data(cache_key)
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
-        if self.use_adaptive:
-            # 获取自适应缓存统计
-            adaptive_stats = self.adaptive_cache.get_cache_stats()
-            
-            # 添加传统缓存统计
-            legacy_stats = self.legacy_cache.get_cache_stats()
-            
-            return {
-                "cache_system": "adaptive",
-                "adaptive_cache": adaptive_stats,
-                "legacy_cache": legacy_stats,
-                "database_available": self.db_manager.is_database_available(),
-                "mongodb_available": self.db_manager.is_mongodb_available(),
-                "redis_available": self.db_manager.is_redis_available()
-            }
-        else:
-            # 只返回传统缓存统计
-            legacy_stats = self.legacy_cache.get_cache_stats()
-            return {
-                "cache_system": "legacy",
-                "legacy_cache": legacy_stats,
-                "database_available": False,
-                "mongodb_available": False,
-                "redis_available": False
-            }
+        unified_stats = self.unified_cache.get_cache_stats()
+        return {
+            "cache_system": "tiered" if self.use_adaptive else "legacy",
+            "legacy_cache": unified_stats,
+            "memory_cache": unified_stats.get("memory_cache"),
+            "remote_tiers": unified_stats.get("remote_tiers"),
+            "database_available": self.is_database_available(),
+            "mongodb_available": self.use_adaptive and self.db_manager.is_mongodb_available(),
+            "redis_available": self.use_adaptive and self.db_manager.is_redis_available()
+        }
     
-    def clear_expired_cache(self):
-        """清理过期缓存"""
-        if self.use_adaptive:
-            self.adaptive_cache.clear_expired_cache()
-        
-        # 总是清理传统缓存
-        self.legacy_cache.clear_expired_cache()
+    def clear_expired_cache(self, max_age_days: int = 7):
+        """清理本地过期缓存（Redis/MongoDB 条目按各自的过期时间自动失效）"""
+        self.unified_cache.clear_old_cache(max_age_days)
     
     def get_cache_backend_info(self) -> Dict[str, Any]:
         """获取缓存后端信息"""
         if self.use_adaptive:
             return {
-                "system": "adaptive",
-                "primary_backend": self.adaptive_cache.primary_backend,
-                "fallback_enabled": self.adaptive_cache.fallback_enabled,
+                "system": "tiered",
+                "primary_backend": self.unified_cache.remote_tiers.get_stats()['tiers'][0],
+                "fallback_enabled": True,
                 "mongodb_available": self.db_manager.is_mongodb_available(),
                 "redis_available": self.db_manager.is_redis_available()
             }
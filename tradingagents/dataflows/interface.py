@@ -35,13 +35,14 @@ except ImportError as e:
     print(f"⚠️ stockstats工具不可用: {e}")
     STOCKSTATS_AVAILABLE = False
 from dateutil.relativedelta import relativedelta
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 import os
 import pandas as pd
 from tqdm import tqdm
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 # 尝试导入yfinance，如果失败则设置为None
 try:
@@ -52,6 +53,11 @@ except ImportError as e:
     yf = None
     YF_AVAILABLE = False
 from .config import get_config, set_config, DATA_DIR
+from .single_flight import single_flight
+from .cache_metrics import get_cache_metrics
+from .tiered_cache import cache_market_type
+from .price_store import get_offline_price_store
+from .simfin_store import get_simfin_store
 
 
 def get_finnhub_news(
@@ -194,35 +200,15 @@ def get_simfin_balance_sheet(
     ],
     curr_date: Annotated[str, "current date you are trading at, yyyy-mm-dd"],
 ):
-    data_path = os.path.join(
-        DATA_DIR,
-        "fundamental_data",
-        "simfin_data_all",
-        "balance_sheet",
-        "companies",
-        "us",
-        f"us-balance-{freq}.csv",
-    )
-    df = pd.read_csv(data_path, sep=";")
-
-    # Convert date strings to datetime objects and remove any time components
-    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
-    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
-
-    # Convert the current date to datetime and normalize
-    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
-
-    # Filter the DataFrame for the given ticker and for reports that were published on or before the current date
-    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    # Latest report published on or before the current date, looked up in the per-ticker SimFin store
+    simfin_store = get_simfin_store(os.path.join(DATA_DIR, "fundamental_data", "simfin_data_all"))
+    latest_balance_sheet = simfin_store.latest_as_of(ticker, "balance_sheet", freq, curr_date)
 
     # Check if there are any available reports; if not, return a notification
-    if filtered_df.empty:
+    if latest_balance_sheet is None:
         print("No balance sheet available before the given current date.")
         return ""
 
-    # Get the most recent balance sheet by selecting the row with the latest Publish Date
-    latest_balance_sheet = filtered_df.loc[filtered_df["Publish Date"].idxmax()]
-
     # drop the SimFinID column
     latest_balance_sheet = latest_balance_sheet.drop("SimFinId")
 
@@ -241,35 +227,15 @@ def get_simfin_cashflow(
     ],
     curr_date: Annotated[str, "current date you are trading at, yyyy-mm-dd"],
 ):
-    data_path = os.path.join(
-        DATA_DIR,
-        "fundamental_data",
-        "simfin_data_all",
-        "cash_flow",
-        "companies",
-        "us",
-        f"us-cashflow-{freq}.csv",
-    )
-    df = pd.read_csv(data_path, sep=";")
-
-    # Convert date strings to datetime objects and remove any time components
-    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
-    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
-
-    # Convert the current date to datetime and normalize
-    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
-
-    # Filter the DataFrame for the given ticker and for reports that were published on or before the current date
-    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    # Latest report published on or before the current date, looked up in the per-ticker SimFin store
+    simfin_store = get_simfin_store(os.path.join(DATA_DIR, "fundamental_data", "simfin_data_all"))
+    latest_cash_flow = simfin_store.latest_as_of(ticker, "cash_flow", freq, curr_date)
 
     # Check if there are any available reports; if not, return a notification
-    if filtered_df.empty:
+    if latest_cash_flow is None:
         print("No cash flow statement available before the given current date.")
         return ""
 
-    # Get the most recent cash flow statement by selecting the row with the latest Publish Date
-    latest_cash_flow = filtered_df.loc[filtered_df["Publish Date"].idxmax()]
-
     # drop the SimFinID column
     latest_cash_flow = latest_cash_flow.drop("SimFinId")
 
@@ -288,35 +254,15 @@ def get_simfin_income_statements(
     ],
     curr_date: Annotated[str, "current date you are trading at, yyyy-mm-dd"],
 ):
-    data_path = os.path.join(
-        DATA_DIR,
-        "fundamental_data",
-        "simfin_data_all",
-        "income_statements",
-        "companies",
-        "us",
-        f"us-income-{freq}.csv",
-    )
-    df = pd.read_csv(data_path, sep=";")
-
-    # Convert date strings to datetime objects and remove any time components
-    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
-    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
-
-    # Convert the current date to datetime and normalize
-    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
-
-    # Filter the DataFrame for the given ticker and for reports that were published on or before the current date
-    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    # Latest report published on or before the current date, looked up in the per-ticker SimFin store
+    simfin_store = get_simfin_store(os.path.join(DATA_DIR, "fundamental_data", "simfin_data_all"))
+    latest_income = simfin_store.latest_as_of(ticker, "income_statements", freq, curr_date)
 
     # Check if there are any available reports; if not, return a notification
-    if filtered_df.empty:
+    if latest_income is None:
         print("No income statement available before the given current date.")
         return ""
 
-    # Get the most recent income statement by selecting the row with the latest Publish Date
-    latest_income = filtered_df.loc[filtered_df["Publish Date"].idxmax()]
-
     # drop the SimFinID column
     latest_income = latest_income.drop("SimFinId")
 
@@ -338,7 +284,8 @@ def get_google_news(
     before = start_date - relativedelta(days=look_back_days)
     before = before.strftime("%Y-%m-%d")
 
-    news_results = getNewsData(query, before, curr_date)
+    with get_cache_metrics().source_call("google_news", "news"):
+        news_results = getNewsData(query, before, curr_date)
 
     news_str = ""
 
@@ -466,7 +413,9 @@ def get_reddit_company_news(
 
 def get_stock_stats_indicators_window(
     symbol: Annotated[str, "ticker symbol of the company"],
-    indicator: Annotated[str, "technical indicator to get the analysis and report of"],
+    indicator: Annotated[
+        str, "technical indicator(s) to get the analysis and report of, comma-separated or a list"
+    ],
     curr_date: Annotated[
         str, "The current trading date you are trading on, YYYY-mm-dd"
     ],
@@ -547,57 +496,63 @@ def get_stock_stats_indicators_window(
         ),
     }
 
-    if indicator not in best_ind_params:
-        raise ValueError(
-            f"Indicator {indicator} is not supported. Please choose from: {list(best_ind_params.keys())}"
-        )
+    # 支持一次请求多个指标：列表或逗号分隔的字符串
+    if isinstance(indicator, str):
+        indicators = [ind.strip() for ind in indicator.split(",") if ind.strip()]
+    else:
+        indicators = list(indicator)
+
+    for ind in indicators:
+        if ind not in best_ind_params:
+            raise ValueError(
+                f"Indicator {ind} is not supported. Please choose from: {list(best_ind_params.keys())}"
+            )
 
     end_date = curr_date
     curr_date = datetime.strptime(curr_date, "%Y-%m-%d")
     before = curr_date - relativedelta(days=look_back_days)
 
-    if not online:
-        # read from YFin data
-        data = pd.read_csv(
-            os.path.join(
-                DATA_DIR,
-                f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-            )
+    # 价格序列只读取一次，每个指标只计算一次，再用日期掩码截取窗口
+    try:
+        values = StockstatsUtils.get_indicators(
+            symbol,
+            indicators,
+            os.path.join(DATA_DIR, "market_data", "price_data"),
+            online=online,
         )
-        data["Date"] = pd.to_datetime(data["Date"], utc=True)
-        dates_in_df = data["Date"].astype(str).str[:10]
-
-        ind_string = ""
-        while curr_date >= before:
-            # only do the trading dates
-            if curr_date.strftime("%Y-%m-%d") in dates_in_df.values:
-                indicator_value = get_stockstats_indicator(
-                    symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
-                )
+    except Exception as e:
+        print(
+            f"Error getting stockstats indicator data for indicators {indicators}: {e}"
+        )
+        values = None
 
-                ind_string += f"{curr_date.strftime('%Y-%m-%d')}: {indicator_value}\n"
+    window_dates = pd.date_range(before, curr_date, freq="D")[::-1].strftime("%Y-%m-%d")
 
-            curr_date = curr_date - relativedelta(days=1)
+    if values is None:
+        # 与逐日查询失败时一致，保留日期、值为空
+        window = pd.DataFrame("", index=window_dates if online else [], columns=indicators)
     else:
-        # online gathering
-        ind_string = ""
-        while curr_date >= before:
-            indicator_value = get_stockstats_indicator(
-                symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
-            )
-
-            ind_string += f"{curr_date.strftime('%Y-%m-%d')}: {indicator_value}\n"
-
-            curr_date = curr_date - relativedelta(days=1)
-
-    result_str = (
-        f"## {indicator} values from {before.strftime('%Y-%m-%d')} to {end_date}:\n\n"
-        + ind_string
-        + "\n\n"
-        + best_ind_params.get(indicator, "No description available.")
-    )
+        mask = (values.index >= window_dates[-1]) & (values.index <= window_dates[0])
+        window = values[mask].iloc[::-1]
+        if online:
+            # 在线模式逐个自然日列出，非交易日标注N/A
+            trading = window_dates.isin(window.index)
+            window = window.astype(object).reindex(window_dates)
+            window.loc[~trading, :] = "N/A: Not a trading day (weekend or holiday)"
+
+    sections = []
+    for ind in indicators:
+        ind_string = "".join(
+            f"{date}: {value}\n" for date, value in window[ind].items()
+        )
+        sections.append(
+            f"## {ind} values from {before.strftime('%Y-%m-%d')} to {end_date}:\n\n"
+            + ind_string
+            + "\n\n"
+            + best_ind_params.get(ind, "No description available.")
+        )
 
-    return result_str
+    return "\n\n".join(sections)
 
 
 def get_stockstats_indicator(
@@ -639,24 +594,10 @@ def get_YFin_data_window(
     before = date_obj - relativedelta(days=look_back_days)
     start_date = before.strftime("%Y-%m-%d")
 
-    # read in data
-    data = pd.read_csv(
-        os.path.join(
-            DATA_DIR,
-            f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-        )
-    )
-
-    # Extract just the date part for comparison
-    data["DateOnly"] = data["Date"].str[:10]
-
-    # Filter data between the start and end dates (inclusive)
-    filtered_data = data[
-        (data["DateOnly"] >= start_date) & (data["DateOnly"] <= curr_date)
-    ]
-
-    # Drop the temporary column we created
-    filtered_data = filtered_data.drop("DateOnly", axis=1)
+    # read in data (binary search over the memory-mapped offline store)
+    filtered_data = get_offline_price_store(
+        os.path.join(DATA_DIR, "market_data", "price_data")
+    ).get_range(symbol, start_date, curr_date)
 
     # Set pandas display options to show the full DataFrame
     with pd.option_context(
@@ -670,6 +611,7 @@ def get_YFin_data_window(
     )
 
 
+@single_flight("yfin_data_online")
 def get_YFin_data_online(
     symbol: Annotated[str, "ticker symbol of the company"],
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
@@ -686,7 +628,8 @@ def get_YFin_data_online(
     ticker = yf.Ticker(symbol.upper())
 
     # Fetch historical data for the specified date range
-    data = ticker.history(start=start_date, end=end_date)
+    with get_cache_metrics().source_call("yfinance", "stock_data", "us"):
+        data = ticker.history(start=start_date, end=end_date)
 
     # Check if data is empty
     if data.empty:
@@ -720,29 +663,16 @@ def get_YFin_data(
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
     end_date: Annotated[str, "End date in yyyy-mm-dd format"],
 ) -> str:
-    # read in data
-    data = pd.read_csv(
-        os.path.join(
-            DATA_DIR,
-            f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-        )
-    )
+    # read in data (binary search over the memory-mapped offline store)
+    store = get_offline_price_store(os.path.join(DATA_DIR, "market_data", "price_data"))
 
     if end_date > "2025-03-25":
         raise Exception(
             f"Get_YFin_Data: {end_date} is outside of the data range of 2015-01-01 to 2025-03-25"
         )
 
-    # Extract just the date part for comparison
-    data["DateOnly"] = data["Date"].str[:10]
-
     # Filter data between the start and end dates (inclusive)
-    filtered_data = data[
-        (data["DateOnly"] >= start_date) & (data["DateOnly"] <= end_date)
-    ]
-
-    # Drop the temporary column we created
-    filtered_data = filtered_data.drop("DateOnly", axis=1)
+    filtered_data = store.get_range(symbol, start_date, end_date)
 
     # remove the index from the dataframe
     filtered_data = filtered_data.reset_index(drop=True)
@@ -750,19 +680,17 @@ def get_YFin_data(
     return filtered_data
 
 
-def get_stock_news_openai(ticker, curr_date):
-    config = get_config()
-    client = OpenAI(base_url=config["backend_url"])
-
-    response = client.responses.create(
-        model=config["quick_think_llm"],
+def _web_search_request(model, text):
+    """OpenAI Responses API 联网搜索的请求参数，同步/异步接口共用"""
+    return dict(
+        model=model,
         input=[
             {
                 "role": "system",
                 "content": [
                     {
                         "type": "input_text",
-                        "text": f"Can you search Social Media for {ticker} from 7 days before {curr_date} to {curr_date}? Make sure you only get the data posted during that period.",
+                        "text": text,
                     }
                 ],
             }
@@ -782,6 +710,24 @@ def get_stock_news_openai(ticker, curr_date):
         store=True,
     )
 
+
+def _stock_news_query(ticker, curr_date):
+    return f"Can you search Social Media for {ticker} from 7 days before {curr_date} to {curr_date}? Make sure you only get the data posted during that period."
+
+
+def _global_news_query(curr_date):
+    return f"Can you search global or macroeconomics news from 7 days before {curr_date} to {curr_date} that would be informative for trading purposes? Make sure you only get the data posted during that period."
+
+
+def get_stock_news_openai(ticker, curr_date):
+    config = get_config()
+    client = OpenAI(base_url=config["backend_url"])
+
+    with get_cache_metrics().source_call("openai", "news", cache_market_type(ticker)):
+        response = client.responses.create(
+            **_web_search_request(config["quick_think_llm"], _stock_news_query(ticker, curr_date))
+        )
+
     return response.output[1].content[0].text
 
 
@@ -789,37 +735,15 @@ def get_global_news_openai(curr_date):
     config = get_config()
     client = OpenAI(base_url=config["backend_url"])
 
-    response = client.responses.create(
-        model=config["quick_think_llm"],
-        input=[
-            {
-                "role": "system",
-                "content": [
-                    {
-                        "type": "input_text",
-                        "text": f"Can you search global or macroeconomics news from 7 days before {curr_date} to {curr_date} that would be informative for trading purposes? Make sure you only get the data posted during that period.",
-                    }
-                ],
-            }
-        ],
-        text={"format": {"type": "text"}},
-        reasoning={},
-        tools=[
-            {
-                "type": "web_search_preview",
-                "user_location": {"type": "approximate"},
-                "search_context_size": "low",
-            }
-        ],
-        temperature=1,
-        max_output_tokens=4096,
-        top_p=1,
-        store=True,
-    )
+    with get_cache_metrics().source_call("openai", "news"):
+        response = client.responses.create(
+            **_web_search_request(config["quick_think_llm"], _global_news_query(curr_date))
+        )
 
     return response.output[1].content[0].text
 
 
+@single_flight("fundamentals_finnhub")
 def get_fundamentals_finnhub(ticker, curr_date):
     """
     使用Finnhub API获取股票基本面数据作为OpenAI的备选方案
@@ -855,21 +779,24 @@ def get_fundamentals_finnhub(ticker, curr_date):
         
         # 获取基本财务数据
         try:
-            basic_financials = finnhub_client.company_basic_financials(ticker, 'all')
+            with get_cache_metrics().source_call("finnhub", "fundamentals", cache_market_type(ticker)):
+                basic_financials = finnhub_client.company_basic_financials(ticker, 'all')
         except Exception as e:
             print(f"❌ [DEBUG] Finnhub基本财务数据获取失败: {str(e)}")
             basic_financials = None
         
         # 获取公司概况
         try:
-            company_profile = finnhub_client.company_profile2(symbol=ticker)
+            with get_cache_metrics().source_call("finnhub", "fundamentals", cache_market_type(ticker)):
+                company_profile = finnhub_client.company_profile2(symbol=ticker)
         except Exception as e:
             print(f"❌ [DEBUG] Finnhub公司概况获取失败: {str(e)}")
             company_profile = None
         
         # 获取收益数据
         try:
-            earnings = finnhub_client.company_earnings(ticker, limit=4)
+            with get_cache_metrics().source_call("finnhub", "fundamentals", cache_market_type(ticker)):
+                earnings = finnhub_client.company_earnings(ticker, limit=4)
         except Exception as e:
             print(f"❌ [DEBUG] Finnhub收益数据获取失败: {str(e)}")
             earnings = None
@@ -960,6 +887,7 @@ def get_fundamentals_finnhub(ticker, curr_date):
         return f"Finnhub基本面数据获取失败: {str(e)}"
 
 
+@single_flight("fundamentals_openai")
 def get_fundamentals_openai(ticker, curr_date):
     """
     获取股票基本面数据，优先使用OpenAI，失败时回退到Finnhub API
@@ -993,33 +921,13 @@ def get_fundamentals_openai(ticker, curr_date):
         
         client = OpenAI(base_url=config["backend_url"])
 
-        response = client.responses.create(
-            model=config["quick_think_llm"],
-            input=[
-                {
-                    "role": "system",
-                    "content": [
-                        {
-                            "type": "input_text",
-                            "text": f"Can you search Fundamental for discussions on {ticker} during of the month before {curr_date} to the month of {curr_date}. Make sure you only get the data posted during that period. List as a table, with PE/PS/Cash flow/ etc",
-                        }
-                    ],
-                }
-            ],
-            text={"format": {"type": "text"}},
-            reasoning={},
-            tools=[
-                {
-                    "type": "web_search_preview",
-                    "user_location": {"type": "approximate"},
-                    "search_context_size": "low",
-                }
-            ],
-            temperature=1,
-            max_output_tokens=4096,
-            top_p=1,
-            store=True,
-        )
+        with get_cache_metrics().source_call("openai", "fundamentals", cache_market_type(ticker)):
+            response = client.responses.create(
+                **_web_search_request(
+                    config["quick_think_llm"],
+                    f"Can you search Fundamental for discussions on {ticker} during of the month before {curr_date} to the month of {curr_date}. Make sure you only get the data posted during that period. List as a table, with PE/PS/Cash flow/ etc",
+                )
+            )
 
         result = response.output[1].content[0].text
         
@@ -1238,6 +1146,7 @@ def get_china_stock_info_tushare(
 
 # ==================== 统一数据源接口 ====================
 
+@single_flight("china_stock_data")
 def get_china_stock_data_unified(
     ticker: Annotated[str, "中国股票代码，如：000001、600036等"],
     start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD"],
@@ -1372,6 +1281,7 @@ def get_current_china_data_source() -> str:
 
 # ==================== 港股数据接口 ====================
 
+@single_flight("hk_stock_data")
 def get_hk_stock_data_unified(symbol: str, start_date: str = None, end_date: str = None) -> str:
     """
     获取港股数据的统一接口
@@ -1505,3 +1415,49 @@ def get_stock_data_by_market(symbol: str, start_date: str = None, end_date: str
     except Exception as e:
         print(f"❌ 获取股票数据失败: {e}")
         return f"❌ 获取股票{symbol}数据失败: {e}"
+
+
+# ==================== 异步数据接口 ====================
+# apropagate 下的工具通过这些接口取数。Tushare/AKShare/yfinance/Finnhub
+# 只提供同步阻塞调用，带 single_flight 的接口还依赖线程同步做去重，
+# 所以放到工作线程执行；OpenAI 联网搜索直接使用 AsyncOpenAI 客户端。
+
+async def aget_china_stock_data_unified(ticker: str, start_date: str, end_date: str) -> str:
+    """get_china_stock_data_unified 的异步版本"""
+    return await asyncio.to_thread(get_china_stock_data_unified, ticker, start_date, end_date)
+
+
+async def aget_hk_stock_data_unified(symbol: str, start_date: str = None, end_date: str = None) -> str:
+    """get_hk_stock_data_unified 的异步版本"""
+    return await asyncio.to_thread(get_hk_stock_data_unified, symbol, start_date, end_date)
+
+
+async def aget_YFin_data_online(symbol: str, start_date: str, end_date: str) -> str:
+    """get_YFin_data_online 的异步版本"""
+    return await asyncio.to_thread(get_YFin_data_online, symbol, start_date, end_date)
+
+
+async def aget_stock_news_openai(ticker, curr_date):
+    """get_stock_news_openai 的异步版本"""
+    config = get_config()
+    client = AsyncOpenAI(base_url=config["backend_url"])
+
+    with get_cache_metrics().source_call("openai", "news", cache_market_type(ticker)):
+        response = await client.responses.create(
+            **_web_search_request(config["quick_think_llm"], _stock_news_query(ticker, curr_date))
+        )
+
+    return response.output[1].content[0].text
+
+
+async def aget_global_news_openai(curr_date):
+    """get_global_news_openai 的异步版本"""
+    config = get_config()
+    client = AsyncOpenAI(base_url=config["backend_url"])
+
+    with get_cache_metrics().source_call("openai", "news"):
+        response = await client.responses.create(
+            **_web_search_request(config["quick_think_llm"], _global_news_query(curr_date))
+        )
+
+    return response.output[1].content[0].text
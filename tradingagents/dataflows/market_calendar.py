@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+交易日历与行情缓存TTL策略
+已收盘交易日的历史行情不会再变化，缓存永久有效；只有包含未收盘交易日的数据
+才需要较短的TTL，并在下一个交易日收盘时失效
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+# 可选：安装 exchange_calendars 后可识别节假日，否则只按周末判断
+try:
+    import exchange_calendars as xcals
+    EXCHANGE_CALENDARS_AVAILABLE = True
+except ImportError:
+    EXCHANGE_CALENDARS_AVAILABLE = False
+
+# 市场 -> (时区, 开盘时间, 收盘时间, exchange_calendars 代码)
+MARKET_SESSIONS = {
+    'china': ('Asia/Shanghai', time(9, 30), time(15, 0), 'XSHG'),
+    'hk': ('Asia/Hong_Kong', time(9, 30), time(16, 0), 'XHKG'),
+    'us': ('America/New_York', time(9, 30), time(16, 0), 'XNYS'),
+}
+
+# 需要有限TTL的后端（如Redis）对永久有效数据使用的过期时间
+IMMUTABLE_TTL_SECONDS = 30 * 24 * 3600
+
+
+def market_for_symbol(symbol: str) -> str:
+    """根据股票代码判断所属市场"""
+    symbol = str(symbol or '').upper()
+    if re.match(r'^\d{6}(\.(SZ|SS|SH))?$', symbol):
+        return 'china'
+    if symbol.endswith('.HK') or re.match(r'^\d{4,5}$', symbol):
+        return 'hk'
+    return 'us'
+
+
+class MarketCalendar:
+    """单个市场的交易日历"""
+
+    def __init__(self, market: str):
+        tz_name, self.open_time, self.close_time, code = MARKET_SESSIONS[market]
+        self.market = market
+        self.tz = ZoneInfo(tz_name)
+        self._xcal = None
+        if EXCHANGE_CALENDARS_AVAILABLE:
+            try:
+                self._xcal = xcals.get_calendar(code)
+            except Exception:
+                self._xcal = None
+
+    def is_session(self, day: date) -> bool:
+        """是否为交易日"""
+        if self._xcal is not None:
+            try:
+                return bool(self._xcal.is_session(pd.Timestamp(day)))
+            except Exception:
+                pass
+        return day.weekday() < 5
+
+    def _local(self, at: datetime) -> datetime:
+        # 无时区的时间按本机时区解释（与缓存元数据中的 datetime.now() 一致）
+        return at.astimezone(self.tz)
+
+    def session_close(self, day: date) -> datetime:
+        return datetime.combine(day, self.close_time, tzinfo=self.tz)
+
+    def is_open(self, at: datetime) -> bool:
+        """给定时刻是否处于交易时段"""
+        local = self._local(at)
+        return (self.is_session(local.date())
+                and self.open_time <= local.time() < self.close_time)
+
+    def last_settled_session(self, at: datetime) -> date:
+        """给定时刻之前最近一个已收盘的交易日"""
+        local = self._local(at)
+        day = local.date()
+        if not (self.is_session(day) and local >= self.session_close(day)):
+            day -= timedelta(days=1)
+        while not self.is_session(day):
+            day -= timedelta(days=1)
+        return day
+
+    def next_session_close(self, at: datetime) -> datetime:
+        """给定时刻之后的下一个收盘时间"""
+        local = self._local(at)
+        day = local.date()
+        if self.is_session(day) and local < self.session_close(day):
+            return self.session_close(day)
+        day += timedelta(days=1)
+        while not self.is_session(day):
+            day += timedelta(days=1)
+        return self.session_close(day)
+
+
+_calendars = {}
+
+
+def get_market_calendar(market: str) -> MarketCalendar:
+    """获取市场交易日历（按市场缓存）"""
+    if market not in _calendars:
+        _calendars[market] = MarketCalendar(market)
+    return _calendars[market]
+
+
+def _naive_local(at: datetime) -> datetime:
+    return at.astimezone().replace(tzinfo=None)
+
+
+def market_data_expires_at(symbol: str, end_date: Optional[str], cached_at: datetime,
+                           live_ttl_seconds: Optional[int] = None) -> Optional[datetime]:
+    """
+    计算行情缓存的过期时间
+
+    Args:
+        symbol: 股票代码
+        end_date: 缓存数据的结束日期，None表示包含最新行情
+        cached_at: 缓存时间（本机时间）
+        live_ttl_seconds: 交易时段内缓存的数据的最长有效期
+
+    Returns:
+        过期时间（本机时间）；结束日期不晚于缓存时最近一个已收盘交易日时返回None，表示永久有效
+    """
+    calendar = get_market_calendar(market_for_symbol(symbol))
+
+    if end_date:
+        try:
+            end = pd.Timestamp(end_date).date()
+        except Exception:
+            end = None
+        if end is not None and end <= calendar.last_settled_session(cached_at):
+            return None
+
+    # 包含未收盘交易日：下一个收盘时失效；交易时段内缓存的数据还受较短TTL限制
+    expires_at = _naive_local(calendar.next_session_close(cached_at))
+    if live_ttl_seconds is not None and calendar.is_open(cached_at):
+        expires_at = min(expires_at, cached_at + timedelta(seconds=live_ttl_seconds))
+    return expires_at
+
+
+def market_data_ttl_seconds(symbol: str, end_date: Optional[str], cached_at: datetime = None,
+                            live_ttl_seconds: Optional[int] = None) -> int:
+    """计算从缓存时间起的TTL秒数，永久有效的数据返回 IMMUTABLE_TTL_SECONDS"""
+    cached_at = cached_at or datetime.now()
+    expires_at = market_data_expires_at(symbol, end_date, cached_at, live_ttl_seconds)
+    if expires_at is None:
+        return IMMUTABLE_TTL_SECONDS
+    return max(1, int((expires_at - cached_at).total_seconds()))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+进程内内存缓存层
+按字节数限制容量的LRU缓存，位于文件/数据库缓存之前；
+每个条目带有与底层缓存一致的过期时间，过期或底层条目被覆盖/删除时同步失效
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+# 内存缓存层默认容量（MB）
+DEFAULT_MEMORY_CACHE_MB = 128
+
+
+def estimate_size(value: Any) -> int:
+    """估算对象占用的内存字节数"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class MemoryLRUCache:
+    """按字节数限制的LRU内存缓存（线程安全）"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, size, expires_at, labels)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取条目；不存在或已过期时返回None。DataFrame返回副本，避免调用方修改缓存内容"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at, _ = entry
+            if expires_at is not None and datetime.now() >= expires_at:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return value.copy() if isinstance(value, pd.DataFrame) else value
+
+    def put(self, key: str, value: Any, expires_at: Optional[datetime] = None,
+            labels: Optional[Dict[str, str]] = None):
+        """写入条目；expires_at 为None表示只受容量限制，labels 为统计指标使用的标签"""
+        if value is None or (expires_at is not None and datetime.now() >= expires_at):
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if isinstance(value, pd.DataFrame):
+            value = value.copy()
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at, labels)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def labels(self, key: str) -> Optional[Dict[str, str]]:
+        """条目写入时附带的标签"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[3] if entry else None
+
+    def invalidate(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'size_mb': round(self.current_bytes / (1024 * 1024), 2),
+            'max_size_mb': round(self.max_bytes / (1024 * 1024), 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
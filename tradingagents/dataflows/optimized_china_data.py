@@ -53,18 +53,25 @@ class OptimizedChinaDataProvider:
         
         # 检查缓存（除非强制刷新）
         if not force_refresh:
-            cache_key = self.cache.find_cached_stock_data(
-                symbol=symbol,
-                start_date=start_date,
-                end_date=end_date,
-                data_source="tdx"
-            )
-            
-            if cache_key:
-                cached_data = self.cache.load_stock_data(cache_key)
-                if cached_data:
-                    print(f"⚡ 从缓存加载A股数据: {symbol}")
-                    return cached_data
+            # 统一数据源写入的缓存优先，兼容旧版以 tdx 标识的缓存
+            for data_source in ("unified", "tdx"):
+                cache_key = self.cache.find_cached_stock_data(
+                    symbol=symbol,
+                    start_date=start_date,
+                    end_date=end_date,
+                    data_source=data_source
+                )
+
+                if cache_key:
+                    cached_data = self.cache.load_stock_data(cache_key)
+                    if cached_data:
+                        print(f"⚡ 从缓存加载A股数据: {symbol}")
+                        return cached_data
+
+            # 过期不久的缓存先行返回，后台刷新
+            stale_data = self._serve_stale_and_refresh(symbol, start_date, end_date)
+            if stale_data:
+                return stale_data
         
         # 缓存未命中，从Tushare数据接口获取
         print(f"🌐 从Tushare数据接口获取数据: {symbol}")
@@ -76,6 +83,7 @@ class OptimizedChinaDataProvider:
             # 调用统一数据源接口（默认Tushare，支持备用数据源）
             from .data_source_manager import get_china_stock_data_unified
 
+            # 统一数据源经由 BarStore 获取，数据源调用已在 BarStore 中统计
             formatted_data = get_china_stock_data_unified(
                 symbol=symbol,
                 start_date=start_date,
@@ -135,24 +143,14 @@ class OptimizedChinaDataProvider:
         # 检查缓存（除非强制刷新）
         if not force_refresh:
             # 查找基本面数据缓存
-            for metadata_file in self.cache.metadata_dir.glob(f"*_meta.json"):
-                try:
-                    import json
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    if (metadata.get('symbol') == symbol and 
-                        metadata.get('data_type') == 'fundamentals' and
-                        metadata.get('market_type') == 'china'):
-                        
-                        cache_key = metadata_file.stem.replace('_meta', '')
-                        if self.cache.is_cache_valid(cache_key, symbol=symbol, data_type='fundamentals'):
-                            cached_data = self.cache.load_stock_data(cache_key)
-                            if cached_data:
-                                print(f"⚡ 从缓存加载A股基本面数据: {symbol}")
-                                return cached_data
-                except Exception:
-                    continue
+            for metadata in self.cache.find_cache_entries(symbol=symbol, data_type='fundamentals',
+                                                          market_type='china'):
+                cache_key = metadata['cache_key']
+                if self.cache.is_cache_valid(cache_key, symbol=symbol, data_type='fundamentals'):
+                    cached_data = self.cache.load_stock_data(cache_key)
+                    if cached_data:
+                        print(f"⚡ 从缓存加载A股基本面数据: {symbol}")
+                        return cached_data
         
         # 缓存未命中，生成基本面分析
         print(f"🔍 生成A股基本面分析: {symbol}")
@@ -516,26 +514,36 @@ class OptimizedChinaDataProvider:
 - 建议等待基本面改善或估值回落
 - 风险承受能力较低的投资者应避免"""
     
+    def _serve_stale_and_refresh(self, symbol: str, start_date: str, end_date: str) -> Optional[str]:
+        """stale-while-revalidate：返回未超过最大过期时长的缓存，并安排后台刷新"""
+        if not self.config.get("stale_while_revalidate", False):
+            return None
+
+        cache_key = self.cache.find_stale_stock_data(symbol, start_date, end_date, "unified",
+                                                     self.config.get("max_stale_hours", 24))
+        if not cache_key:
+            return None
+        cached_data = self.cache.load_stock_data(cache_key)
+        if not cached_data:
+            return None
+
+        from .background_refresh import get_background_refresher
+        get_background_refresher().schedule(
+            f"china_stock_data:{symbol}:{start_date}:{end_date}",
+            self.get_stock_data, symbol, start_date, end_date, force_refresh=True
+        )
+        print(f"⚡ 先返回过期缓存并在后台刷新A股数据: {symbol}")
+        return cached_data
+
     def _try_get_old_cache(self, symbol: str, start_date: str, end_date: str) -> Optional[str]:
         """尝试获取过期的缓存数据作为备用"""
         try:
             # 查找任何相关的缓存，不考虑TTL
-            for metadata_file in self.cache.metadata_dir.glob(f"*_meta.json"):
-                try:
-                    import json
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    if (metadata.get('symbol') == symbol and 
-                        metadata.get('data_type') == 'stock_data' and
-                        metadata.get('market_type') == 'china'):
-                        
-                        cache_key = metadata_file.stem.replace('_meta', '')
-                        cached_data = self.cache.load_stock_data(cache_key)
-                        if cached_data:
-                            return cached_data + "\n\n⚠️ 注意: 使用的是过期缓存数据"
-                except Exception:
-                    continue
+            for metadata in self.cache.find_cache_entries(symbol=symbol, data_type='stock_data',
+                                                          market_type='china'):
+                cached_data = self.cache.load_stock_data(metadata['cache_key'])
+                if cached_data:
+                    return cached_data + "\n\n⚠️ 注意: 使用的是过期缓存数据"
         except Exception:
             pass
         
@@ -12,7 +12,9 @@ from typing import Optional, Dict, Any
 import yfinance as yf
 import pandas as pd
 from .cache_manager import get_cache
+from .cache_metrics import get_cache_metrics
 from .config import get_config
+from .indicator_engine import compute_frame
 
 
 class OptimizedUSDataProvider:
@@ -78,6 +80,11 @@ class OptimizedUSDataProvider:
                 if cached_data:
                     print(f"⚡ 从缓存加载美股数据: {symbol}")
                     return cached_data
+
+            # 过期不久的缓存先行返回，后台刷新
+            stale_data = self._serve_stale_and_refresh(symbol, start_date, end_date)
+            if stale_data:
+                return stale_data
         
         # 缓存未命中，从API获取 - 优先使用FINNHUB
         formatted_data = None
@@ -88,7 +95,8 @@ class OptimizedUSDataProvider:
             print(f"🌐 从FINNHUB API获取数据: {symbol}")
             self._wait_for_rate_limit()
 
-            formatted_data = self._get_data_from_finnhub(symbol, start_date, end_date)
+            with get_cache_metrics().source_call("finnhub", "stock_data", "us"):
+                formatted_data = self._get_data_from_finnhub(symbol, start_date, end_date)
             if formatted_data and "❌" not in formatted_data:
                 data_source = "finnhub"
                 print(f"✅ FINNHUB数据获取成功: {symbol}")
@@ -126,9 +134,7 @@ class OptimizedUSDataProvider:
                         # 备用方案：Yahoo Finance
                         print(f"🔄 使用Yahoo Finance备用方案获取港股数据: {symbol}")
 
-                        self._wait_for_rate_limit()
-                        ticker = yf.Ticker(symbol)  # 港股代码保持原格式
-                        data = ticker.history(start=start_date, end=end_date)
+                        data = self._get_yfinance_history(symbol, start_date, end_date)  # 港股代码保持原格式
 
                         if not data.empty:
                             formatted_data = self._format_stock_data(symbol, data, start_date, end_date)
@@ -139,11 +145,8 @@ class OptimizedUSDataProvider:
                 else:
                     # 美股使用Yahoo Finance
                     print(f"🇺🇸 从Yahoo Finance API获取美股数据: {symbol}")
-                    self._wait_for_rate_limit()
-
                     # 获取数据
-                    ticker = yf.Ticker(symbol.upper())
-                    data = ticker.history(start=start_date, end=end_date)
+                    data = self._get_yfinance_history(symbol.upper(), start_date, end_date)
 
                     if data.empty:
                         error_msg = f"未找到股票 '{symbol}' 在 {start_date} 到 {end_date} 期间的数据"
@@ -175,6 +178,18 @@ class OptimizedUSDataProvider:
 
         return formatted_data
     
+    def _get_yfinance_history(self, ticker_symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """通过区间感知存储获取Yahoo Finance日线，只请求本地缺失的区间（yfinance的end不包含当天）"""
+        from .bar_store import get_bar_store
+
+        def fetch_history(gap_start: str, gap_end: str) -> pd.DataFrame:
+            self._wait_for_rate_limit()
+            gap_end_exclusive = (datetime.strptime(gap_end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+            return yf.Ticker(ticker_symbol).history(start=gap_start, end=gap_end_exclusive)
+
+        last_day = (datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+        return get_bar_store().get_bars(ticker_symbol, "yfinance", start_date, last_day, fetch_history)
+
     def _format_stock_data(self, symbol: str, data: pd.DataFrame, 
                           start_date: str, end_date: str) -> str:
         """格式化股票数据为字符串"""
@@ -194,17 +209,12 @@ class OptimizedUSDataProvider:
         price_change = data['Close'].iloc[-1] - data['Close'].iloc[0]
         price_change_pct = (price_change / data['Close'].iloc[0]) * 100
         
-        # 计算技术指标
-        data['MA5'] = data['Close'].rolling(window=5).mean()
-        data['MA10'] = data['Close'].rolling(window=10).mean()
-        data['MA20'] = data['Close'].rolling(window=20).mean()
-        
-        # 计算RSI
-        delta = data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        # 计算技术指标（NumPy指标引擎）
+        indicators = compute_frame(data, ["close_5_sma", "close_10_sma", "close_20_sma", "rsi"])
+        data['MA5'] = indicators['close_5_sma']
+        data['MA10'] = indicators['close_10_sma']
+        data['MA20'] = indicators['close_20_sma']
+        rsi = indicators['rsi']
         
         # 格式化输出
         result = f"""# {symbol} 美股数据分析
@@ -236,26 +246,37 @@ class OptimizedUSDataProvider:
         
         return result
     
+    def _serve_stale_and_refresh(self, symbol: str, start_date: str, end_date: str) -> Optional[str]:
+        """stale-while-revalidate：返回未超过最大过期时长的缓存，并安排后台刷新"""
+        if not self.config.get("stale_while_revalidate", False):
+            return None
+
+        max_stale_hours = self.config.get("max_stale_hours", 24)
+        for data_source in ("finnhub", "yfinance"):
+            cache_key = self.cache.find_stale_stock_data(symbol, start_date, end_date,
+                                                         data_source, max_stale_hours)
+            if not cache_key:
+                continue
+            cached_data = self.cache.load_stock_data(cache_key)
+            if cached_data:
+                from .background_refresh import get_background_refresher
+                get_background_refresher().schedule(
+                    f"us_stock_data:{symbol}:{start_date}:{end_date}",
+                    self.get_stock_data, symbol, start_date, end_date, force_refresh=True
+                )
+                print(f"⚡ 先返回过期缓存并在后台刷新美股数据: {symbol}")
+                return cached_data
+        return None
+
     def _try_get_old_cache(self, symbol: str, start_date: str, end_date: str) -> Optional[str]:
         """尝试获取过期的缓存数据作为备用"""
         try:
             # 查找任何相关的缓存，不考虑TTL
-            for metadata_file in self.cache.metadata_dir.glob(f"*_meta.json"):
-                try:
-                    import json
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    if (metadata.get('symbol') == symbol and 
-                        metadata.get('data_type') == 'stock_data' and
-                        metadata.get('market_type') == 'us'):
-                        
-                        cache_key = metadata_file.stem.replace('_meta', '')
-                        cached_data = self.cache.load_stock_data(cache_key)
-                        if cached_data:
-                            return cached_data + "\n\n⚠️ 注意: 使用的是过期缓存数据"
-                except Exception:
-                    continue
+            for metadata in self.cache.find_cache_entries(symbol=symbol, data_type='stock_data',
+                                                          market_type='us'):
+                cached_data = self.cache.load_stock_data(metadata['cache_key'])
+                if cached_data:
+                    return cached_data + "\n\n⚠️ 注意: 使用的是过期缓存数据"
         except Exception:
             pass
         
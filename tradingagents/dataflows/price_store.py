@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+离线行情二进制存储
+把 market_data/price_data 下的 {symbol}-YFin-data-2015-01-01-2025-03-25.csv 转换为按日期排序的
+逐列 .npy 文件，读取时内存映射，用二分查找定位日期区间，只复制命中的行。
+
+目录结构（位于 price_data 的同级目录 price_store 下）:
+    {symbol}/meta.json          列名、列文件、源CSV的修改时间
+    {symbol}/dates.npy          datetime64[D]，升序，用于二分查找
+    {symbol}/col_{i}.npy        原CSV各列（Date 列保留原始字符串）
+
+offline 的 get_YFin_data、get_YFin_data_window 和 get_stock_stats 共用这一份存储；
+首次读取尚未转换的股票时自动转换，也可以用 scripts/setup/build_price_store.py 一次性转换。
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+OFFLINE_CSV_TEMPLATE = "{symbol}-YFin-data-2015-01-01-2025-03-25.csv"
+_CSV_PATTERN = re.compile(r"^(?P<symbol>.+)-YFin-data-2015-01-01-2025-03-25\.csv$")
+_DATE_COLUMN = "Date"
+_STORE_VERSION = 1
+
+
+class OfflinePriceStore:
+    """按股票代码保存的内存映射离线行情"""
+
+    def __init__(self, price_data_dir: str, store_dir: Optional[str] = None):
+        """
+        Args:
+            price_data_dir: 原始CSV所在目录（{DATA_DIR}/market_data/price_data）
+            store_dir: 二进制存储目录，默认为 price_data 的同级目录 price_store
+        """
+        self.price_data_dir = Path(price_data_dir)
+        self.store_dir = Path(store_dir) if store_dir else self.price_data_dir.parent / "price_store"
+        self._opened: Dict[str, Tuple[float, dict, np.ndarray, List[np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    # ---- 路径 ----
+
+    def csv_path(self, symbol: str) -> Path:
+        return self.price_data_dir / OFFLINE_CSV_TEMPLATE.format(symbol=symbol)
+
+    def _symbol_dir(self, symbol: str) -> Path:
+        return self.store_dir / re.sub(r'[^0-9A-Za-z.\-^=]+', '_', symbol)
+
+    def available_symbols(self) -> List[str]:
+        """price_data 目录下可以转换的股票代码"""
+        if not self.price_data_dir.exists():
+            return []
+        return sorted(m.group('symbol') for m in map(_CSV_PATTERN.match, os.listdir(self.price_data_dir)) if m)
+
+    # ---- 转换 ----
+
+    def is_current(self, symbol: str) -> bool:
+        """二进制存储存在且不旧于源CSV"""
+        meta_path = self._symbol_dir(symbol) / "meta.json"
+        if not meta_path.exists():
+            return False
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception:
+            return False
+        csv_path = self.csv_path(symbol)
+        if meta.get('version') != _STORE_VERSION:
+            return False
+        return not csv_path.exists() or meta.get('source_mtime') == csv_path.stat().st_mtime
+
+    def convert(self, symbol: str) -> Path:
+        """把一只股票的CSV转换为二进制存储，返回存储目录"""
+        csv_path = self.csv_path(symbol)
+        data = pd.read_csv(csv_path)
+        if _DATE_COLUMN not in data.columns:
+            raise ValueError(f"{csv_path} 缺少 {_DATE_COLUMN} 列")
+
+        data[_DATE_COLUMN] = data[_DATE_COLUMN].astype(str)
+        dates = pd.to_datetime(data[_DATE_COLUMN].str[:10]).to_numpy(dtype='datetime64[D]')
+        order = np.argsort(dates, kind='stable')
+
+        symbol_dir = self._symbol_dir(symbol)
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+        columns = []
+        for i, column in enumerate(data.columns):
+            values = data[column].to_numpy()[order]
+            if values.dtype == object:
+                values = values.astype(str)
+            file_name = f"col_{i}.npy"
+            np.save(symbol_dir / f"{file_name}.tmp.npy", values)
+            os.replace(symbol_dir / f"{file_name}.tmp.npy", symbol_dir / file_name)
+            columns.append({'name': column, 'file': file_name})
+        np.save(symbol_dir / "dates.tmp.npy", dates[order])
+        os.replace(symbol_dir / "dates.tmp.npy", symbol_dir / "dates.npy")
+
+        # 元数据最后写入，作为提交点
+        meta = {
+            'version': _STORE_VERSION,
+            'symbol': symbol,
+            'columns': columns,
+            'rows': len(data),
+            'source_csv': csv_path.name,
+            'source_mtime': csv_path.stat().st_mtime,
+        }
+        tmp_meta = symbol_dir / "meta.json.tmp"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_meta, symbol_dir / "meta.json")
+
+        with self._lock:
+            self._opened.pop(symbol, None)
+        return symbol_dir
+
+    def convert_all(self, symbols: Optional[List[str]] = None, force: bool = False) -> Dict[str, str]:
+        """批量转换，返回 {股票代码: 结果}"""
+        results = {}
+        for symbol in symbols or self.available_symbols():
+            if not force and self.is_current(symbol):
+                results[symbol] = "已是最新"
+                continue
+            try:
+                self.convert(symbol)
+                results[symbol] = "已转换"
+            except Exception as e:
+                results[symbol] = f"失败: {e}"
+        return results
+
+    # ---- 读取 ----
+
+    def _open(self, symbol: str) -> Tuple[dict, np.ndarray, List[np.ndarray]]:
+        """内存映射打开一只股票的存储（同一进程内复用），尚未转换或已过期时先转换"""
+        symbol_dir = self._symbol_dir(symbol)
+        meta_path = symbol_dir / "meta.json"
+        with self._lock:
+            opened = self._opened.get(symbol)
+        if opened is not None:
+            try:
+                csv_path = self.csv_path(symbol)
+                csv_current = not csv_path.exists() or csv_path.stat().st_mtime == opened[1].get('source_mtime')
+                if csv_current and meta_path.stat().st_mtime == opened[0]:
+                    return opened[1:]
+            except OSError:
+                pass
+
+        if not self.is_current(symbol):
+            if not self.csv_path(symbol).exists():
+                raise FileNotFoundError(f"离线行情不存在: {self.csv_path(symbol)}")
+            try:
+                self.convert(symbol)
+            except OSError as e:
+                # 数据目录只读等情况下直接读取CSV
+                print(f"⚠️ 离线行情转换失败，改为读取CSV: {symbol}, {e}")
+                return self._from_csv(symbol)
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        dates = np.load(symbol_dir / "dates.npy", mmap_mode='r')
+        columns = [np.load(symbol_dir / column['file'], mmap_mode='r') for column in meta['columns']]
+        with self._lock:
+            self._opened[symbol] = (meta_path.stat().st_mtime, meta, dates, columns)
+        return meta, dates, columns
+
+    def _from_csv(self, symbol: str) -> Tuple[dict, np.ndarray, List[np.ndarray]]:
+        data = pd.read_csv(self.csv_path(symbol))
+        data[_DATE_COLUMN] = data[_DATE_COLUMN].astype(str)
+        dates = pd.to_datetime(data[_DATE_COLUMN].str[:10]).to_numpy(dtype='datetime64[D]')
+        order = np.argsort(dates, kind='stable')
+        meta = {'columns': [{'name': column} for column in data.columns]}
+        return meta, dates[order], [data[column].to_numpy()[order] for column in data.columns]
+
+    def slice_bounds(self, symbol: str, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Tuple[int, int]:
+        """二分查找 [start_date, end_date]（两端包含）对应的行号区间 [lo, hi)"""
+        _, dates, _ = self._open(symbol)
+        return self._bounds(dates, start_date, end_date)
+
+    @staticmethod
+    def _bounds(dates: np.ndarray, start_date: Optional[str], end_date: Optional[str]) -> Tuple[int, int]:
+        lo = int(np.searchsorted(dates, np.datetime64(start_date, 'D'), side='left')) if start_date else 0
+        hi = int(np.searchsorted(dates, np.datetime64(end_date, 'D'), side='right')) if end_date else len(dates)
+        return lo, max(lo, hi)
+
+    def get_range(self, symbol: str, start_date: Optional[str] = None,
+                  end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        读取日期区间内的行情，列与原CSV一致，索引为行在（排序后）文件中的位置
+
+        Args:
+            start_date/end_date: YYYY-mm-dd，两端包含；None 表示不限
+        """
+        meta, dates, columns = self._open(symbol)
+        lo, hi = self._bounds(dates, start_date, end_date)
+        return pd.DataFrame(
+            {column['name']: np.asarray(values[lo:hi]) for column, values in zip(meta['columns'], columns)},
+            index=pd.RangeIndex(lo, hi),
+        )
+
+    def get_column(self, symbol: str, column: str, start_date: Optional[str] = None,
+                   end_date: Optional[str] = None) -> np.ndarray:
+        """读取单列的只读视图（不复制）"""
+        meta, dates, columns = self._open(symbol)
+        names = [c['name'] for c in meta['columns']]
+        lo, hi = self._bounds(dates, start_date, end_date)
+        return columns[names.index(column)][lo:hi]
+
+
+# 按 price_data 目录复用存储实例（数据目录可以在运行时切换）
+_stores: Dict[str, OfflinePriceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_offline_price_store(price_data_dir: str) -> OfflinePriceStore:
+    """获取指定 price_data 目录对应的离线行情存储"""
+    key = os.path.abspath(price_data_dir)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = OfflinePriceStore(key)
+        return store
@@ -12,6 +12,9 @@ import time
 import os
 from dataclasses import dataclass
 
+from .cache_metrics import get_cache_metrics
+from .tiered_cache import cache_market_type
+
 
 @dataclass
 class NewsItem:
@@ -85,7 +88,8 @@ class RealtimeNewsAggregator:
                 'token': self.finnhub_key
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            with get_cache_metrics().source_call("finnhub", "news", cache_market_type(ticker)):
+                response = requests.get(url, params=params, headers=self.headers)
             response.raise_for_status()
             
             news_data = response.json()
@@ -130,7 +134,8 @@ class RealtimeNewsAggregator:
                 'limit': 50
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            with get_cache_metrics().source_call("alpha_vantage", "news", cache_market_type(ticker)):
+                response = requests.get(url, params=params, headers=self.headers)
             response.raise_for_status()
             
             data = response.json()
@@ -190,7 +195,8 @@ class RealtimeNewsAggregator:
                 'apiKey': self.newsapi_key
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            with get_cache_metrics().source_call("newsapi", "news", cache_market_type(ticker)):
+                response = requests.get(url, params=params, headers=self.headers)
             response.raise_for_status()
             
             data = response.json()
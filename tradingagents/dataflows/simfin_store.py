@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+SimFin财报索引存储
+把 simfin_data_all 下包含全部美股公司的 us-<statement>-<freq>.csv 预处理一次：
+解析日期、按 (Ticker, Publish Date) 排序后写入一个 Arrow IPC 文件，并记录每个股票所在的行区间。
+查询时内存映射该文件、只取出一个股票的行，再按发布日期二分查找"截至某日最新的一期报表"。
+最近使用的股票保留在内存中（LRU），跨多次工具调用复用。
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .dataframe_storage import ARROW_AVAILABLE, write_dataframe
+
+if ARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+
+# 报表类型 -> (目录名, 文件名中的类型)
+STATEMENTS = {
+    'balance_sheet': ('balance_sheet', 'balance'),
+    'cash_flow': ('cash_flow', 'cashflow'),
+    'income_statements': ('income_statements', 'income'),
+}
+
+_DATE_COLUMNS = ("Report Date", "Publish Date")
+_STORE_VERSION = 1
+
+
+def _as_datetime64(dates: pd.Series) -> np.ndarray:
+    """UTC日期列转为 datetime64 数组（NaT 排在最后，不会被查到）"""
+    return dates.dt.tz_convert(None).to_numpy()
+
+
+class SimFinStore:
+    """按股票代码索引的SimFin财报存储"""
+
+    def __init__(self, simfin_dir: str, store_dir: Optional[str] = None, max_hot_tickers: int = 256):
+        """
+        Args:
+            simfin_dir: simfin_data_all 目录
+            store_dir: 预处理结果目录，默认为 simfin_data_all 的同级目录 simfin_store
+            max_hot_tickers: 内存中保留的 (报表, 频率, 股票) 数量上限
+        """
+        self.simfin_dir = Path(simfin_dir)
+        self.store_dir = Path(store_dir) if store_dir else self.simfin_dir.parent / "simfin_store"
+        self.max_hot_tickers = max_hot_tickers
+        self._datasets: Dict[Tuple[str, str], Tuple[float, object, Dict[str, list]]] = {}
+        self._hot: "OrderedDict[Tuple[str, str, str], pd.DataFrame]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.stats = {'hot_hits': 0, 'loads': 0, 'builds': 0}
+
+    # ---- 路径 ----
+
+    def csv_path(self, statement: str, freq: str) -> Path:
+        folder, name = STATEMENTS[statement]
+        return self.simfin_dir / folder / "companies" / "us" / f"us-{name}-{freq}.csv"
+
+    def _dataset_paths(self, statement: str, freq: str) -> Tuple[Path, Path]:
+        base = self.store_dir / f"{statement}-{re.sub(r'[^0-9A-Za-z]+', '_', freq)}"
+        suffix = 'arrow' if ARROW_AVAILABLE else 'pkl'
+        return base.with_suffix(f'.{suffix}'), base.with_suffix('.json')
+
+    # ---- 预处理 ----
+
+    def _is_current(self, statement: str, freq: str) -> bool:
+        data_path, index_path = self._dataset_paths(statement, freq)
+        if not data_path.exists() or not index_path.exists():
+            return False
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception:
+            return False
+        csv_path = self.csv_path(statement, freq)
+        if meta.get('version') != _STORE_VERSION:
+            return False
+        return not csv_path.exists() or meta.get('source_mtime') == csv_path.stat().st_mtime
+
+    def build(self, statement: str, freq: str) -> Path:
+        """读取一次完整CSV，按股票和发布日期排序后写入存储，返回数据文件路径"""
+        csv_path = self.csv_path(statement, freq)
+        df = pd.read_csv(csv_path, sep=";")
+
+        # Convert date strings to datetime objects and remove any time components
+        for column in _DATE_COLUMNS:
+            df[column] = pd.to_datetime(df[column], utc=True).dt.normalize()
+
+        # 稳定排序：同一发布日期的报表保持原CSV中的先后顺序
+        df = df[df["Ticker"].notna()]
+        df = df.iloc[np.lexsort((_as_datetime64(df["Publish Date"]), df["Ticker"].astype(str).to_numpy()))]
+
+        tickers = df["Ticker"].astype(str).to_numpy()
+        starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]]) if len(tickers) else np.array([], dtype=int)
+        stops = np.r_[starts[1:], len(tickers)]
+        index = {tickers[start]: [int(start), int(stop)] for start, stop in zip(starts, stops)}
+
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        data_path, index_path = self._dataset_paths(statement, freq)
+        tmp_path = data_path.with_name(data_path.name + '.tmp')
+        if ARROW_AVAILABLE:
+            write_dataframe(df, tmp_path)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, data_path)
+
+        # 索引最后写入，作为提交点
+        meta = {
+            'version': _STORE_VERSION,
+            'source_csv': csv_path.name,
+            'source_mtime': csv_path.stat().st_mtime,
+            'rows': len(df),
+            'tickers': index,
+        }
+        tmp_index = index_path.with_name(index_path.name + '.tmp')
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_index, index_path)
+
+        with self._lock:
+            self.stats['builds'] += 1
+            self._datasets.pop((statement, freq), None)
+            for key in [k for k in self._hot if k[:2] == (statement, freq)]:
+                del self._hot[key]
+        print(f"📦 SimFin报表已预处理: {csv_path.name}, {len(index)}个股票, {len(df)}行")
+        return data_path
+
+    # ---- 读取 ----
+
+    def _open_dataset(self, statement: str, freq: str):
+        """打开（必要时先预处理）一个报表数据集，返回 (数据, 股票行区间索引)"""
+        key = (statement, freq)
+        csv_path = self.csv_path(statement, freq)
+        csv_mtime = csv_path.stat().st_mtime if csv_path.exists() else None
+        with self._lock:
+            opened = self._datasets.get(key)
+            if opened is not None and (csv_mtime is None or opened[0] == csv_mtime):
+                return opened[1], opened[2]
+
+            if not self._is_current(statement, freq):
+                if csv_mtime is None:
+                    raise FileNotFoundError(f"SimFin数据不存在: {csv_path}")
+                self.build(statement, freq)
+
+            data_path, index_path = self._dataset_paths(statement, freq)
+            with open(index_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if ARROW_AVAILABLE:
+                # 内存映射，整表读取不复制数据
+                data = pa_ipc.open_file(pa.memory_map(str(data_path), 'r')).read_all()
+            else:
+                data = pd.read_pickle(data_path)
+            self._datasets[key] = (meta['source_mtime'], data, meta['tickers'])
+            return data, meta['tickers']
+
+    def get_ticker(self, ticker: str, statement: str, freq: str) -> pd.DataFrame:
+        """一个股票的全部报表，按发布日期升序（常用股票保留在内存中）"""
+        hot_key = (statement, freq, ticker)
+        data, index = self._open_dataset(statement, freq)
+        with self._lock:
+            if hot_key in self._hot:
+                self._hot.move_to_end(hot_key)
+                self.stats['hot_hits'] += 1
+                return self._hot[hot_key]
+
+        bounds = index.get(ticker)
+        if bounds is None:
+            frame = pd.DataFrame()
+        elif ARROW_AVAILABLE:
+            frame = data.slice(bounds[0], bounds[1] - bounds[0]).to_pandas()
+        else:
+            frame = data.iloc[bounds[0]:bounds[1]]
+
+        with self._lock:
+            self.stats['loads'] += 1
+            self._hot[hot_key] = frame
+            while len(self._hot) > self.max_hot_tickers:
+                self._hot.popitem(last=False)
+        return frame
+
+    def latest_as_of(self, ticker: str, statement: str, freq: str, curr_date: str) -> Optional[pd.Series]:
+        """
+        截至 curr_date（含）已发布的最新一期报表
+
+        Returns:
+            pd.Series: 报表行（与原先从完整CSV中取出的行相同），没有时返回 None
+        """
+        frame = self.get_ticker(ticker, statement, freq)
+        if frame.empty:
+            return None
+        curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
+        publish_dates = _as_datetime64(frame["Publish Date"])
+        position = int(np.searchsorted(publish_dates, curr_date_dt.to_datetime64(), side='right')) - 1
+        if position < 0:
+            return None
+        # 同一天发布多期时取最先出现的一行
+        position = int(np.searchsorted(publish_dates, publish_dates[position], side='left'))
+        return frame.iloc[position]
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, 'hot_tickers': len(self._hot), 'datasets': len(self._datasets)}
+
+
+# 按 simfin_data_all 目录复用存储实例（数据目录可以在运行时切换）
+_stores: Dict[str, SimFinStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_simfin_store(simfin_dir: str) -> SimFinStore:
+    """获取指定 simfin_data_all 目录对应的财报存储"""
+    key = os.path.abspath(simfin_dir)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SimFinStore(key)
+        return store
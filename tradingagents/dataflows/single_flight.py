@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+请求合并（single-flight）
+同一时刻对同一数据的重复请求只触发一次实际获取：
+- 同进程内：后到的线程等待首个线程的结果并直接共享
+- 同主机多进程：通过锁文件（或Redis锁）串行化，首个进程把结果写到锁旁边（锁文件目录或Redis）；
+  后到的进程拿到锁后，如果等待期间已有新结果写入，直接使用该结果，不再重新执行
+- 共享结果与Redis锁有相同的有效期，锁文件目录中过期的结果文件在获取锁时清理
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+try:
+    import msvcrt
+    MSVCRT_AVAILABLE = True
+except ImportError:
+    msvcrt = None
+    MSVCRT_AVAILABLE = False
+
+# 等待跨进程锁的最长时间（秒），超时后不再等待，直接执行
+DEFAULT_LOCK_TIMEOUT = 120
+# Redis锁的过期时间（毫秒），防止持锁进程异常退出后锁永不释放
+REDIS_LOCK_TTL_MS = 300_000
+# 同进程内等待首个线程结果的最长时间（秒），首个线程卡住时后到的线程改为直接执行
+DEFAULT_WAIT_TIMEOUT = REDIS_LOCK_TTL_MS / 1000
+# 轮询锁的间隔（秒）
+LOCK_POLL_INTERVAL = 0.05
+# 清理锁文件目录中过期结果文件的最小间隔（秒）
+RESULT_SWEEP_INTERVAL = 60
+# 共享结果的标识长度（uuid4 hex）
+_TOKEN_LENGTH = 32
+# 表示没有可共享的结果
+_MISSING = object()
+
+# 仅当锁仍由自己持有时才删除（Redis锁释放脚本）
+_REDIS_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    """一次进行中的获取"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.owner = threading.get_ident()
+        self.shared = 0
+
+
+class SingleFlight:
+    """合并并发的相同请求"""
+
+    def __init__(self, lock_dir: Optional[str] = None, redis_client=None,
+                 lock_timeout: float = DEFAULT_LOCK_TIMEOUT,
+                 wait_timeout: float = DEFAULT_WAIT_TIMEOUT,
+                 result_ttl: float = REDIS_LOCK_TTL_MS / 1000):
+        """
+        Args:
+            lock_dir: 锁文件目录；为None时只在进程内合并（除非提供了Redis）
+            redis_client: Redis客户端；提供时使用Redis锁代替锁文件
+            lock_timeout: 等待跨进程锁的最长时间（秒）
+            wait_timeout: 同进程内等待首个线程结果的最长时间（秒）
+            result_ttl: 锁文件目录中共享结果的有效期（秒），与Redis结果的过期时间一致
+        """
+        self.lock_dir = Path(lock_dir) if lock_dir else None
+        if self.lock_dir is not None:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self.redis_client = redis_client
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.result_ttl = result_ttl
+        self._last_sweep = 0.0
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+        self.shared_across_processes = 0
+        self.wait_timeouts = 0
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """执行 fn(*args, **kwargs)；相同 key 的并发调用共享同一次执行的结果（或异常）"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.owner != threading.get_ident():
+                call.shared += 1
+                self.shared += 1
+                is_leader = False
+            elif call is not None:
+                # 同一线程重入同一个key（例如递归调用），直接执行以免等待自己
+                call = None
+                is_leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                is_leader = True
+
+        if call is None:
+            return fn(*args, **kwargs)
+
+        if not is_leader:
+            if not call.done.wait(self.wait_timeout):
+                print(f"⚠️ 等待相同请求超时，直接执行: {key}")
+                with self._lock:
+                    self.wait_timeouts += 1
+                return fn(*args, **kwargs)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            process_lock = self._process_lock(key)
+            # 等锁之前记下当前结果的标识，拿到锁后标识变化说明等待期间其他进程已完成同一请求
+            seen_token = process_lock.result_token()
+            with process_lock:
+                result = process_lock.load_result(seen_token)
+                if result is not _MISSING:
+                    self.shared_across_processes += 1
+                    call.result = result
+                else:
+                    self.executions += 1
+                    call.result = fn(*args, **kwargs)
+                    process_lock.store_result(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """当前进行中的请求数"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'executions': self.executions,
+            'shared': self.shared,
+            'shared_across_processes': self.shared_across_processes,
+            'wait_timeouts': self.wait_timeouts,
+            'in_flight': self.in_flight(),
+            'cross_process': 'redis' if self.redis_client is not None else ('file' if self.lock_dir else 'none'),
+        }
+
+    # ---------- 跨进程锁 ----------
+
+    def _process_lock(self, key: str):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        if self.redis_client is not None:
+            return _RedisLock(self.redis_client, f"tradingagents:single_flight:{digest}", self.lock_timeout)
+        if self.lock_dir is not None and (FCNTL_AVAILABLE or MSVCRT_AVAILABLE):
+            self._sweep_expired_results()
+            return _FileLock(self.lock_dir / f"{digest}.lock", self.lock_timeout, self.result_ttl)
+        return _NullLock()
+
+    def _sweep_expired_results(self):
+        """删除锁文件目录中超过有效期的共享结果（每隔 RESULT_SWEEP_INTERVAL 秒最多一次）"""
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < RESULT_SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+        for pattern in ("*.result", "*.result.*.tmp"):
+            for path in self.lock_dir.glob(pattern):
+                try:
+                    if now - path.stat().st_mtime > self.result_ttl:
+                        path.unlink()
+                except OSError:
+                    pass
+
+
+class _NullLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def result_token(self) -> Optional[str]:
+        return None
+
+    def load_result(self, seen_token: Optional[str]) -> Any:
+        return _MISSING
+
+    def store_result(self, result: Any):
+        pass
+
+
+def _pack_result(result: Any) -> Optional[bytes]:
+    """结果序列化为 标识 + pickle；无法序列化时返回None（不共享）"""
+    try:
+        return uuid.uuid4().hex.encode('ascii') + pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        print(f"⚠️ 请求结果无法跨进程共享: {e}")
+        return None
+
+
+def _unpack_result(payload: Optional[bytes], seen_token: Optional[str]) -> Any:
+    if not payload or len(payload) <= _TOKEN_LENGTH:
+        return _MISSING
+    if payload[:_TOKEN_LENGTH].decode('ascii', 'replace') == seen_token:
+        return _MISSING
+    try:
+        return pickle.loads(payload[_TOKEN_LENGTH:])
+    except Exception:
+        return _MISSING
+
+
+class _FileLock:
+    """基于锁文件的跨进程互斥锁（POSIX 使用 fcntl，Windows 使用 msvcrt）"""
+
+    def __init__(self, path: Path, timeout: float, result_ttl: float = REDIS_LOCK_TTL_MS / 1000):
+        self.path = path
+        self.result_path = path.with_suffix('.result')
+        self.timeout = timeout
+        self.result_ttl = result_ttl
+        self._fd = None
+
+    def result_token(self) -> Optional[str]:
+        try:
+            with open(self.result_path, 'rb') as f:
+                return f.read(_TOKEN_LENGTH).decode('ascii', 'replace')
+        except OSError:
+            return None
+
+    def load_result(self, seen_token: Optional[str]) -> Any:
+        try:
+            with open(self.result_path, 'rb') as f:
+                # 与Redis结果一样，超过有效期的结果不再使用
+                if time.time() - os.fstat(f.fileno()).st_mtime > self.result_ttl:
+                    return _MISSING
+                return _unpack_result(f.read(), seen_token)
+        except OSError:
+            return _MISSING
+
+    def store_result(self, result: Any):
+        payload = _pack_result(result)
+        if payload is None:
+            return
+        tmp_path = self.result_path.with_name(f"{self.result_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.result_path)
+        except OSError as e:
+            print(f"⚠️ 写入共享请求结果失败: {e}")
+
+    def __enter__(self):
+        self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+                return self
+            except OSError:
+                if time.monotonic() >= deadline:
+                    print(f"⚠️ 等待请求锁超时，直接执行: {self.path.name}")
+                    os.close(self._fd)
+                    self._fd = None
+                    return self
+                time.sleep(LOCK_POLL_INTERVAL)
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            try:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        return False
+
+
+class _RedisLock:
+    """基于 Redis SET NX PX 的跨进程互斥锁"""
+
+    def __init__(self, client, name: str, timeout: float):
+        self.client = client
+        self.name = name
+        self.timeout = timeout
+        self.result_name = f"{name}:result"
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+
+    def result_token(self) -> Optional[str]:
+        try:
+            token = self.client.getrange(self.result_name, 0, _TOKEN_LENGTH - 1)
+        except Exception:
+            return None
+        if isinstance(token, bytes):
+            token = token.decode('ascii', 'replace')
+        return token or None
+
+    def load_result(self, seen_token: Optional[str]) -> Any:
+        try:
+            return _unpack_result(self.client.get(self.result_name), seen_token)
+        except Exception:
+            return _MISSING
+
+    def store_result(self, result: Any):
+        payload = _pack_result(result)
+        if payload is None:
+            return
+        try:
+            self.client.set(self.result_name, payload, px=REDIS_LOCK_TTL_MS)
+        except Exception as e:
+            print(f"⚠️ 写入共享请求结果失败: {e}")
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        try:
+            while not self.client.set(self.name, self.token, nx=True, px=REDIS_LOCK_TTL_MS):
+                if time.monotonic() >= deadline:
+                    print(f"⚠️ 等待Redis请求锁超时，直接执行: {self.name}")
+                    return self
+                time.sleep(LOCK_POLL_INTERVAL)
+            self.acquired = True
+        except Exception as e:
+            print(f"⚠️ Redis请求锁不可用，直接执行: {e}")
+        return self
+
+    def __exit__(self, *exc):
+        if self.acquired:
+            try:
+                self.client.eval(_REDIS_RELEASE_SCRIPT, 1, self.name, self.token)
+            except Exception as e:
+                print(f"⚠️ 释放Redis请求锁失败: {e}")
+        return False
+
+
+def make_key(namespace: str, args: tuple, kwargs: dict) -> str:
+    """由命名空间和调用参数生成请求键"""
+    parts = [repr(a) for a in args]
+    parts += [f"{k}={kwargs[k]!r}" for k in sorted(kwargs)]
+    return f"{namespace}({', '.join(parts)})"
+
+
+def single_flight(namespace: str):
+    """装饰器：相同参数的并发调用合并为一次执行"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_single_flight().do(make_key(namespace, args, kwargs), func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# 全局实例
+_single_flight = None
+_single_flight_init_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """获取全局请求合并实例；Redis可用时使用Redis锁，否则使用缓存目录下的锁文件"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_init_lock:
+            if _single_flight is None:
+                redis_client = None
+                try:
+                    from ..config.database_manager import get_database_manager
+                    redis_client = get_database_manager().get_redis_client()
+                except Exception:
+                    redis_client = None
+
+                from .cache_manager import get_cache
+                _single_flight = SingleFlight(get_cache().cache_dir / "locks", redis_client=redis_client)
+    return _single_flight
@@ -1,21 +1,19 @@
+from datetime import datetime
+
 import pandas as pd
 import yfinance as yf
 from stockstats import wrap
-from typing import Annotated
-import os
-from .config import get_config
+from typing import Annotated, List
+from .bar_store import get_bar_store
+from .indicator_engine import compute_frame, is_supported
+from .market_calendar import get_market_calendar, market_for_symbol
+from .price_store import get_offline_price_store
 
 
 class StockstatsUtils:
     @staticmethod
-    def get_stock_stats(
+    def get_price_data(
         symbol: Annotated[str, "ticker symbol for the company"],
-        indicator: Annotated[
-            str, "quantitative indicators based off of the stock data for the company"
-        ],
-        curr_date: Annotated[
-            str, "curr date for retrieving stock price data, YYYY-mm-dd"
-        ],
         data_dir: Annotated[
             str,
             "directory where the stock data is stored.",
@@ -24,64 +22,105 @@ class StockstatsUtils:
             bool,
             "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
         ] = False,
-    ):
-        df = None
-        data = None
-
+    ) -> pd.DataFrame:
+        """读取计算指标所需的日线数据（离线CSV或在线下载的缓存），Date 列为 YYYY-mm-dd 开头的字符串"""
         if not online:
             try:
-                data = pd.read_csv(
-                    os.path.join(
-                        data_dir,
-                        f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-                    )
-                )
-                df = wrap(data)
+                return get_offline_price_store(data_dir).get_range(symbol)
             except FileNotFoundError:
                 raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
-        else:
-            # Get today's date as YYYY-mm-dd to add to cache
-            today_date = pd.Timestamp.today()
-            curr_date = pd.to_datetime(curr_date)
-
-            end_date = today_date
-            start_date = today_date - pd.DateOffset(years=15)
-            start_date = start_date.strftime("%Y-%m-%d")
-            end_date = end_date.strftime("%Y-%m-%d")
 
-            # Get config and ensure cache directory exists
-            config = get_config()
-            os.makedirs(config["data_cache_dir"], exist_ok=True)
+        # 按股票代码保存复权日线，每天只请求上次保存之后的新K线；
+        # 复权价格发生变化（拆股/分红）时由行情存储检测并重新获取完整历史
+        # 请求截止到该市场最近一个已收盘的交易日，而不是本地时区的今天/昨天
+        calendar = get_market_calendar(market_for_symbol(symbol))
+        settled = pd.Timestamp(calendar.last_settled_session(datetime.now().astimezone()))
+        start_date = (settled - pd.DateOffset(years=15)).strftime("%Y-%m-%d")
+        end_date = settled.strftime("%Y-%m-%d")
 
-            data_file = os.path.join(
-                config["data_cache_dir"],
-                f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
+        def fetch_history(gap_start: str, gap_end: str) -> pd.DataFrame:
+            # yfinance 的 end 不包含当天
+            gap_end_exclusive = (pd.Timestamp(gap_end) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+            return yf.download(
+                symbol,
+                start=gap_start,
+                end=gap_end_exclusive,
+                multi_level_index=False,
+                progress=False,
+                auto_adjust=True,
             )
 
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                data["Date"] = pd.to_datetime(data["Date"])
-            else:
-                data = yf.download(
-                    symbol,
-                    start=start_date,
-                    end=end_date,
-                    multi_level_index=False,
-                    progress=False,
-                    auto_adjust=True,
-                )
-                data = data.reset_index()
-                data.to_csv(data_file, index=False)
+        data = get_bar_store().get_bars(
+            symbol, "yfinance_adjusted", start_date, end_date, fetch_history, verify_column="Close"
+        )
+        if data.empty:
+            raise Exception(f"Stockstats fail: no Yahoo Finance data for {symbol}")
+        data = data.rename_axis("Date").reset_index()
 
-            df = wrap(data)
-            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-            curr_date = curr_date.strftime("%Y-%m-%d")
+        data["Date"] = data["Date"].dt.strftime("%Y-%m-%d")
+        return data
 
-        df[indicator]  # trigger stockstats to calculate the indicator
-        matching_rows = df[df["Date"].str.startswith(curr_date)]
+    @staticmethod
+    def get_indicators(
+        symbol: Annotated[str, "ticker symbol for the company"],
+        indicators: Annotated[
+            List[str], "quantitative indicators based off of the stock data for the company"
+        ],
+        data_dir: Annotated[
+            str,
+            "directory where the stock data is stored.",
+        ],
+        online: Annotated[
+            bool,
+            "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
+        ] = False,
+    ) -> pd.DataFrame:
+        """
+        一次读取价格数据、一次计算多个指标
+
+        Returns:
+            DataFrame: 以交易日（YYYY-mm-dd 字符串，升序）为索引，每个指标一列
+        """
+        data = StockstatsUtils.get_price_data(symbol, data_dir, online)
+
+        # best_ind_params 中的指标由NumPy指标引擎计算，其余指标仍交给 stockstats
+        native = [ind for ind in indicators if is_supported(ind)]
+        values = compute_frame(data, native) if native else pd.DataFrame(index=data.index)
+        others = [ind for ind in indicators if ind not in values.columns]
+        if others:
+            df = wrap(data.copy())
+            for indicator in others:
+                values[indicator] = df[indicator].values  # trigger stockstats to calculate the indicator
+
+        result = pd.DataFrame(
+            {indicator: values[indicator].values for indicator in indicators},
+            index=pd.Index(data["Date"].astype(str).str[:10].values, name="Date"),
+        )
+        # 同一交易日出现多行时与逐日查询一致，取第一行
+        return result[~result.index.duplicated(keep="first")]
+
+    @staticmethod
+    def get_stock_stats(
+        symbol: Annotated[str, "ticker symbol for the company"],
+        indicator: Annotated[
+            str, "quantitative indicators based off of the stock data for the company"
+        ],
+        curr_date: Annotated[
+            str, "curr date for retrieving stock price data, YYYY-mm-dd"
+        ],
+        data_dir: Annotated[
+            str,
+            "directory where the stock data is stored.",
+        ],
+        online: Annotated[
+            bool,
+            "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
+        ] = False,
+    ):
+        values = StockstatsUtils.get_indicators(symbol, [indicator], data_dir, online)[indicator]
+        curr_date = pd.to_datetime(curr_date).strftime("%Y-%m-%d")
 
-        if not matching_rows.empty:
-            indicator_value = matching_rows[indicator].values[0]
-            return indicator_value
+        if curr_date in values.index:
+            return values.loc[curr_date]
         else:
             return "N/A: Not a trading day (weekend or holiday)"
@@ -355,39 +355,19 @@ class TongDaXinDataProvider:
             if df.empty:
                 return {}
             
-            # 计算技术指标
-            indicators = {}
-            
-            # 移动平均线
-            indicators['MA5'] = df['Close'].rolling(5).mean().iloc[-1] if len(df) >= 5 else None
-            indicators['MA10'] = df['Close'].rolling(10).mean().iloc[-1] if len(df) >= 10 else None
-            indicators['MA20'] = df['Close'].rolling(20).mean().iloc[-1] if len(df) >= 20 else None
-            
-            # RSI
-            if len(df) >= 14:
-                delta = df['Close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                indicators['RSI'] = (100 - (100 / (1 + rs))).iloc[-1]
-            
-            # MACD
-            if len(df) >= 26:
-                exp1 = df['Close'].ewm(span=12).mean()
-                exp2 = df['Close'].ewm(span=26).mean()
-                macd = exp1 - exp2
-                signal = macd.ewm(span=9).mean()
-                indicators['MACD'] = macd.iloc[-1]
-                indicators['MACD_Signal'] = signal.iloc[-1]
-                indicators['MACD_Histogram'] = (macd - signal).iloc[-1]
-            
-            # 布林带
-            if len(df) >= 20:
-                sma = df['Close'].rolling(20).mean()
-                std = df['Close'].rolling(20).std()
-                indicators['BB_Upper'] = (sma + 2 * std).iloc[-1]
-                indicators['BB_Middle'] = sma.iloc[-1]
-                indicators['BB_Lower'] = (sma - 2 * std).iloc[-1]
+            # 计算技术指标（统一使用NumPy指标引擎）
+            from .indicator_engine import latest_indicators
+
+            names = {
+                'MA5': ('close_5_sma', 5), 'MA10': ('close_10_sma', 10), 'MA20': ('close_20_sma', 20),
+                'RSI': ('rsi', 14),
+                'MACD': ('macd', 26), 'MACD_Signal': ('macds', 26), 'MACD_Histogram': ('macdh', 26),
+                'BB_Upper': ('boll_ub', 20), 'BB_Middle': ('boll', 20), 'BB_Lower': ('boll_lb', 20),
+            }
+            values = latest_indicators(df, [name for name, _ in names.values()])
+            indicators = {
+                key: values[name] for key, (name, min_bars) in names.items() if len(df) >= min_bars
+            }
             
             return indicators
             
@@ -680,8 +660,12 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
     try:
         provider = get_tdx_provider()
 
-        # 获取历史数据
-        df = provider.get_stock_history_data(stock_code, start_date, end_date)
+        # 获取历史数据（本地已有的区间直接复用，只请求缺失部分）
+        from .bar_store import get_bar_store
+        df = get_bar_store().get_bars(
+            stock_code, "tdx", start_date, end_date,
+            lambda gap_start, gap_end: provider.get_stock_history_data(stock_code, gap_start, gap_end)
+        )
 
         if df.empty:
             error_msg = f"❌ 未能获取股票 {stock_code} 的历史数据"
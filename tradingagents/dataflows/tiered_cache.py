@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+统一分层缓存
+内存 → 本地磁盘 → Redis → MongoDB 共用一套缓存键规则和可插拔的序列化器：
+- 读取时逐层查找（read-through），在较慢的层命中后回填到更快的层
+- 写入时本地层同步写入，Redis/MongoDB 由后台线程写入（write-behind）
+
+内存层和磁盘层由 StockDataCache 实现（见 cache_manager.py），本模块提供
+缓存键、序列化器以及远程层（Redis/MongoDB）
+"""
+
+import base64
+import hashlib
+import json
+import pickle
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .dataframe_storage import ARROW_AVAILABLE, dataframe_from_bytes, dataframe_to_bytes
+from .cache_metrics import get_cache_metrics, labels_from_key, labels_from_metadata
+from .market_calendar import IMMUTABLE_TTL_SECONDS
+
+# ---------- 缓存键 ----------
+
+# 各缓存管理器历史上使用的数据类型名称 -> 统一名称
+_DATA_TYPE_ALIASES = {
+    'stock': 'stock_data',
+    'news_data': 'news',
+    'fundamentals_data': 'fundamentals',
+}
+
+
+def cache_market_type(symbol: str) -> str:
+    """缓存键使用的市场类型（6位数字为A股，其余归为美股目录）"""
+    return 'china' if re.match(r'^\d{6}$', str(symbol)) else 'us'
+
+
+def make_cache_key(data_type: str, symbol: str, **params) -> str:
+    """
+    统一的缓存键：{symbol}_{data_type}_{md5(参数)[:12]}
+
+    所有缓存层使用同一个键，同一份数据只写入/查找一次
+    """
+    data_type = _DATA_TYPE_ALIASES.get(data_type, data_type)
+    params_str = f"{data_type}_{symbol}"
+    for key, value in sorted(params.items()):
+        params_str += f"_{key}_{value}"
+    digest = hashlib.md5(params_str.encode()).hexdigest()[:12]
+    return f"{symbol}_{data_type}_{digest}"
+
+
+# ---------- 序列化器 ----------
+
+class Serializer(ABC):
+    """序列化器接口：name 写入缓存记录，读取时按 name 选择反序列化方式"""
+
+    name = ""
+
+    @abstractmethod
+    def can_serialize(self, value: Any) -> bool:
+        """是否能序列化该值"""
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """序列化为字节"""
+
+    @abstractmethod
+    def loads(self, payload: bytes) -> Any:
+        """从字节还原"""
+
+
+class ArrowSerializer(Serializer):
+    """DataFrame -> Arrow IPC"""
+
+    name = "arrow"
+
+    def can_serialize(self, value: Any) -> bool:
+        return ARROW_AVAILABLE and isinstance(value, pd.DataFrame)
+
+    def dumps(self, value: pd.DataFrame) -> bytes:
+        return dataframe_to_bytes(value)
+
+    def loads(self, payload: bytes) -> pd.DataFrame:
+        return dataframe_from_bytes(payload)
+
+
+class TextSerializer(Serializer):
+    """字符串 -> UTF-8"""
+
+    name = "text"
+
+    def can_serialize(self, value: Any) -> bool:
+        return isinstance(value, str)
+
+    def dumps(self, value: str) -> bytes:
+        return value.encode('utf-8')
+
+    def loads(self, payload: bytes) -> str:
+        return payload.decode('utf-8')
+
+
+class PickleSerializer(Serializer):
+    """其他对象 -> pickle（兜底）"""
+
+    name = "pickle"
+
+    def can_serialize(self, value: Any) -> bool:
+        return True
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, payload: bytes) -> Any:
+        return pickle.loads(payload)
+
+
+# 按优先级排列，序列化时使用第一个可处理该值的序列化器
+_serializers: List[Serializer] = [ArrowSerializer(), TextSerializer(), PickleSerializer()]
+
+
+def register_serializer(serializer: Serializer, first: bool = True):
+    """注册序列化器；first=True 时优先于内置序列化器（同名的会被替换）"""
+    global _serializers
+    _serializers = [s for s in _serializers if s.name != serializer.name]
+    if first:
+        _serializers.insert(0, serializer)
+    else:
+        _serializers.insert(len(_serializers) - 1, serializer)  # 保持 pickle 兜底
+
+
+def get_serializer(name: str) -> Serializer:
+    for serializer in _serializers:
+        if serializer.name == name:
+            return serializer
+    raise KeyError(f"未注册的序列化器: {name}")
+
+
+def serialize(value: Any) -> Tuple[str, bytes]:
+    """返回 (序列化器名称, 字节串)"""
+    for serializer in _serializers:
+        if serializer.can_serialize(value):
+            return serializer.name, serializer.dumps(value)
+    raise TypeError(f"没有可用的序列化器: {type(value)}")
+
+
+def deserialize(name: str, payload: bytes) -> Any:
+    return get_serializer(name).loads(payload)
+
+
+# ---------- 远程缓存层 ----------
+
+class CacheTier(ABC):
+    """
+    缓存层接口。记录为字典：
+    {'format': 序列化器名称, 'payload': bytes, 'metadata': dict, 'expires_at': datetime 或 None}
+    """
+
+    name = ""
+
+    @abstractmethod
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """读取记录，不存在或已过期时返回None"""
+
+    @abstractmethod
+    def put(self, cache_key: str, record: Dict[str, Any]):
+        """写入记录"""
+
+    @abstractmethod
+    def delete(self, cache_key: str):
+        """删除记录"""
+
+
+def _ttl_seconds(expires_at: Optional[datetime]) -> int:
+    if expires_at is None:
+        return IMMUTABLE_TTL_SECONDS
+    return max(int((expires_at - datetime.now()).total_seconds()), 0)
+
+
+class RedisTier(CacheTier):
+    """Redis 层：记录编码为JSON（负载base64），兼容 decode_responses 的客户端"""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "tradingagents:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.prefix + cache_key)
+        if not raw:
+            return None
+        doc = json.loads(raw)
+        return {
+            'format': doc['format'],
+            'payload': base64.b64decode(doc['payload']),
+            'metadata': doc['metadata'],
+            'expires_at': datetime.fromisoformat(doc['expires_at']) if doc.get('expires_at') else None,
+        }
+
+    def put(self, cache_key: str, record: Dict[str, Any]):
+        ttl = _ttl_seconds(record['expires_at'])
+        if ttl <= 0:
+            return
+        doc = {
+            'format': record['format'],
+            'payload': base64.b64encode(record['payload']).decode('ascii'),
+            'metadata': record['metadata'],
+            'expires_at': record['expires_at'].isoformat() if record['expires_at'] else None,
+        }
+        self.client.setex(self.prefix + cache_key, ttl, json.dumps(doc, ensure_ascii=False))
+
+    def delete(self, cache_key: str):
+        self.client.delete(self.prefix + cache_key)
+
+
+class MongoTier(CacheTier):
+    """MongoDB 层：持久化存储，读取时检查过期时间"""
+
+    name = "mongodb"
+
+    def __init__(self, client, db_name: str = "tradingagents", collection: str = "tiered_cache"):
+        self.collection = client[db_name][collection]
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        doc = self.collection.find_one({'_id': cache_key})
+        if not doc:
+            return None
+        expires_at = doc.get('expires_at')
+        if expires_at is not None and expires_at <= datetime.now():
+            self.collection.delete_one({'_id': cache_key})
+            return None
+        return {
+            'format': doc['format'],
+            'payload': bytes(doc['payload']),
+            'metadata': doc.get('metadata') or {},
+            'expires_at': expires_at,
+        }
+
+    def put(self, cache_key: str, record: Dict[str, Any]):
+        self.collection.replace_one({'_id': cache_key}, {
+            '_id': cache_key,
+            'format': record['format'],
+            'payload': record['payload'],
+            'metadata': record['metadata'],
+            'expires_at': record['expires_at'],
+            'updated_at': datetime.now(),
+        }, upsert=True)
+
+    def delete(self, cache_key: str):
+        self.collection.delete_one({'_id': cache_key})
+
+
+class RemoteCacheTiers:
+    """按顺序排列的远程缓存层（通常为 Redis → MongoDB），负责回填和后台写入"""
+
+    def __init__(self, tiers: List[CacheTier]):
+        self.tiers = list(tiers)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-write-behind")
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self.hits = {tier.name: 0 for tier in self.tiers}
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.metrics = get_cache_metrics()
+
+    def get(self, cache_key: str) -> Optional[Tuple[Any, Dict[str, Any], Optional[datetime]]]:
+        """逐层读取；命中较慢的层时回填到之前的层。返回 (data, metadata, expires_at) 或 None"""
+        for i, tier in enumerate(self.tiers):
+            started = time.perf_counter()
+            try:
+                record = tier.get(cache_key)
+            except Exception as e:
+                self.errors += 1
+                self.metrics.record(tier.name, 'error', **labels_from_key(cache_key))
+                print(f"⚠️ {tier.name}缓存读取失败: {e}")
+                continue
+            latency = time.perf_counter() - started
+            if record is None:
+                self.metrics.record(tier.name, 'miss', latency=latency, **labels_from_key(cache_key))
+                continue
+            if record['expires_at'] is not None and record['expires_at'] <= datetime.now():
+                self.metrics.record(tier.name, 'stale', latency=latency, **labels_from_metadata(record['metadata']))
+                continue
+
+            self.hits[tier.name] += 1
+            self.metrics.record(tier.name, 'hit', latency=latency, bytes_read=len(record['payload']),
+                                **labels_from_metadata(record['metadata']))
+            if i > 0:
+                self._submit(self.tiers[:i], cache_key, record)
+            try:
+                data = deserialize(record['format'], record['payload'])
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ {tier.name}缓存反序列化失败: {e}")
+                continue
+            return data, record['metadata'], record['expires_at']
+
+        self.misses += 1
+        return None
+
+    def put(self, cache_key: str, data: Any, metadata: Dict[str, Any],
+            expires_at: Optional[datetime] = None):
+        """后台写入所有远程层；序列化在调用线程完成，调用方之后修改数据不影响写入内容"""
+        if expires_at is not None and expires_at <= datetime.now():
+            return
+        fmt, payload = serialize(data)
+        record = {'format': fmt, 'payload': payload, 'metadata': metadata, 'expires_at': expires_at}
+        self._submit(self.tiers, cache_key, record)
+
+    def delete(self, cache_key: str):
+        for tier in self.tiers:
+            try:
+                tier.delete(cache_key)
+            except Exception as e:
+                print(f"⚠️ {tier.name}缓存删除失败: {e}")
+
+    def _submit(self, tiers: List[CacheTier], cache_key: str, record: Dict[str, Any]):
+        future = self._executor.submit(self._write, tiers, cache_key, record)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+
+    def _discard(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _write(self, tiers: List[CacheTier], cache_key: str, record: Dict[str, Any]):
+        labels = labels_from_metadata(record['metadata'])
+        for tier in tiers:
+            started = time.perf_counter()
+            try:
+                tier.put(cache_key, record)
+                self.writes += 1
+                self.metrics.record(tier.name, 'write', latency=time.perf_counter() - started,
+                                    bytes_written=len(record['payload']), **labels)
+            except Exception as e:
+                self.errors += 1
+                self.metrics.record(tier.name, 'error', **labels)
+                print(f"⚠️ {tier.name}缓存写入失败: {e}")
+
+    def flush(self, timeout: float = None):
+        """等待已提交的后台写入完成"""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'tiers': [tier.name for tier in self.tiers],
+            'hits': dict(self.hits),
+            'misses': self.misses,
+            'writes': self.writes,
+            'errors': self.errors,
+            'pending_writes': pending,
+        }
+
+
+def get_remote_tiers() -> Optional[RemoteCacheTiers]:
+    """根据数据库管理器检测结果构建远程缓存层；Redis 和 MongoDB 都不可用时返回None"""
+    try:
+        from ..config.database_manager import get_database_manager
+        db_manager = get_database_manager()
+    except Exception as e:
+        print(f"⚠️ 数据库管理器不可用，仅使用本地缓存: {e}")
+        return None
+
+    tiers: List[CacheTier] = []
+    redis_client = db_manager.get_redis_client()
+    if redis_client is not None:
+        tiers.append(RedisTier(redis_client))
+    mongodb_client = db_manager.get_mongodb_client()
+    if mongodb_client is not None:
+        tiers.append(MongoTier(mongodb_client))
+    return RemoteCacheTiers(tiers) if tiers else None
@@ -27,6 +27,8 @@ except ImportError:
     CACHE_AVAILABLE = False
     print("⚠️ 缓存管理器不可用")
 
+from .cache_metrics import get_cache_metrics
+
 
 class TushareDataAdapter:
     """Tushare数据适配器"""
@@ -271,7 +273,8 @@ class TushareDataAdapter:
             stock_info = self.get_stock_info(symbol)
             
             # 获取财务数据
-            financial_data = self.provider.get_financial_data(symbol)
+            with get_cache_metrics().source_call("tushare", "fundamentals", "china"):
+                financial_data = self.provider.get_financial_data(symbol)
             
             # 生成基本面分析报告
             report = self._generate_fundamentals_report(symbol, stock_info, financial_data)
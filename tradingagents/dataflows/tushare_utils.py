@@ -171,18 +171,25 @@ class TushareProvider:
             
             print(f"🔄 从Tushare获取{ts_code}数据 ({start_date} 到 {end_date})...")
             
-            # 获取日线数据
-            data = self.api.daily(
-                ts_code=ts_code,
-                start_date=start_date,
-                end_date=end_date
+            def fetch_daily(gap_start: str, gap_end: str) -> pd.DataFrame:
+                gap_data = self.api.daily(
+                    ts_code=ts_code,
+                    start_date=gap_start.replace('-', ''),
+                    end_date=gap_end.replace('-', '')
+                )
+                if gap_data is not None and not gap_data.empty:
+                    # 数据预处理
+                    gap_data = gap_data.sort_values('trade_date')
+                    gap_data['trade_date'] = pd.to_datetime(gap_data['trade_date'])
+                return gap_data
+            
+            # 获取日线数据（本地已有的区间直接复用，只请求缺失部分）
+            from .bar_store import get_bar_store
+            data = get_bar_store().get_bars(
+                ts_code, "tushare", start_date, end_date, fetch_daily, date_column='trade_date'
             )
             
             if data is not None and not data.empty:
-                # 数据预处理
-                data = data.sort_values('trade_date')
-                data['trade_date'] = pd.to_datetime(data['trade_date'])
-                
                 print(f"✅ 获取{ts_code}数据成功: {len(data)}条")
                 
                 # 缓存数据
@@ -17,8 +17,25 @@ DEFAULT_CONFIG = {
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 100,
+    # Graph execution settings
+    "parallel_analysts": False,  # 分析师并行执行（各自独立的消息通道，在看涨研究员前汇合）
+    "checkpoint_enabled": False,  # 每个节点完成后持久化检查点，失败的分析可从断点恢复
+    "checkpoint_dir": os.path.join(os.getenv("TRADINGAGENTS_RESULTS_DIR", "./results"), "checkpoints"),
+    "analyst_report_cache": False,  # 复用相同(股票, 日期, 分析师, 模型, 提示词版本)的分析师报告
+    "analyst_report_cache_dir": None,  # 默认为 data_cache_dir/analyst_reports
+    # Memory settings
+    "embedding_cache_size": 1024,  # 进程内嵌入缓存条目数（所有记忆实例共享）
+    "embedding_cache_dir": None,  # 设置后启用磁盘嵌入缓存，跨进程/跨运行复用
+    "embedding_batch_size": None,  # 单次嵌入请求文本数，默认按服务商限制（阿里百炼10，OpenAI 256）
+    "embedding_max_concurrency": 4,  # 批量嵌入时的并发请求数
+    "memory_backend": "chromadb",  # 记忆向量存储: chromadb 或 numpy（轻量级，内存映射 .npy）
+    "memory_persist_dir": None,  # 设置后记忆持久化到该目录，重启后无需重新嵌入
+    "memory_read_only": False,  # 只读工作进程：共享持久化记忆，但不写入
     # Tool settings
     "online_tools": True,
+    # Data cache settings
+    "stale_while_revalidate": False,  # 开启后缓存过期不久时先返回旧数据，并在后台刷新
+    "max_stale_hours": 24,  # 过期超过该时长的缓存不再先行返回，需同步获取
     # Language and localization settings
     "language": "zh-CN",
     "locale": "zh-CN", 
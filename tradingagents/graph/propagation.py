@@ -41,9 +41,16 @@ class Propagator:
             "news_report": "",
         }
 
-    def get_graph_args(self) -> Dict[str, Any]:
-        """Get arguments for the graph invocation."""
+    def get_graph_args(self, thread_id: str = None) -> Dict[str, Any]:
+        """Get arguments for the graph invocation.
+
+        ``thread_id`` selects the checkpoint thread when the graph is compiled
+        with a checkpointer.
+        """
+        config = {"recursion_limit": self.max_recur_limit}
+        if thread_id is not None:
+            config["configurable"] = {"thread_id": thread_id}
         return {
             "stream_mode": "values",
-            "config": {"recursion_limit": self.max_recur_limit},
+            "config": config,
         }
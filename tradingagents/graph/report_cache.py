@@ -0,0 +1,139 @@
+# TradingAgents/graph/report_cache.py
+
+import hashlib
+import inspect
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+
+
+def prompt_fingerprint(
+    factory: Callable, tool_names: Iterable[str], settings: Optional[Dict[str, Any]] = None
+) -> str:
+    """Fingerprint an analyst's prompt, tool set and data settings.
+
+    The fingerprint covers the source of the module that defines the analyst
+    factory (prompts live there), the names of the tools bound to it and the
+    settings that decide which data those tools return (online vs. offline
+    tools, data directory, data sources), so changing any of them invalidates
+    cached reports.
+    """
+    try:
+        source = inspect.getsource(inspect.getmodule(factory))
+    except (OSError, TypeError):
+        source = getattr(factory, "__qualname__", repr(factory))
+    payload = source + "|" + ",".join(sorted(tool_names))
+    if settings:
+        payload += "|" + json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()[:12]
+
+
+class AnalystReportCache:
+    """Persistent cache of analyst reports.
+
+    Reports are keyed by (ticker, trade_date, analyst, model, prompt version)
+    and stored as one JSON file per key, so they can be reused by reruns with
+    different debate settings.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(ticker: str, trade_date: str, analyst: str, model: str, prompt_version: str) -> str:
+        raw = f"{ticker}|{trade_date}|{analyst}|{model}|{prompt_version}"
+        return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached report for ``key`` or None."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["report"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ [报告缓存] 读取失败: {path}, {e}")
+            return None
+
+    def put(self, key: str, report: str, metadata: Dict[str, Any]) -> None:
+        """Store a report; the file is replaced atomically."""
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        record = dict(metadata, report=report, created_at=datetime.now().isoformat())
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def clear(self) -> int:
+        """Delete every cached report and return the number removed."""
+        removed = 0
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink()
+            removed += 1
+        return removed
+
+    def wrap(self, analyst_type: str, report_key: str, node: Callable, model: str, prompt_version: str) -> Runnable:
+        """Put the cache in front of an analyst node.
+
+        On a hit the node returns the stored report as a final message (no
+        tool calls), so the analyst loop ends immediately. On a miss the
+        analyst runs normally and its final report is stored. The wrapper is
+        a runnable with sync and async implementations, so under
+        ``apropagate`` the analyst's own async path is awaited.
+        """
+        if not isinstance(node, Runnable):
+            node = RunnableLambda(node)
+
+        def lookup(state):
+            ticker = state["company_of_interest"]
+            trade_date = str(state["trade_date"])
+            key = self.make_key(ticker, trade_date, analyst_type, model, prompt_version)
+
+            report = self.get(key)
+            if report is not None:
+                print(f"⚡ [报告缓存] 命中: {ticker} {trade_date} {analyst_type}")
+                return key, {"messages": [AIMessage(content=report)], report_key: report}
+            return key, None
+
+        def store(state, key, result):
+            ticker = state["company_of_interest"]
+            trade_date = str(state["trade_date"])
+
+            messages = result.get("messages") or []
+            last_message = messages[-1] if messages else None
+            report = result.get(report_key)
+            # 只缓存最终报告：没有待执行的工具调用，且不是错误信息
+            if report and not getattr(last_message, "tool_calls", None) and not report.startswith("❌"):
+                self.put(key, report, {
+                    "ticker": ticker,
+                    "trade_date": trade_date,
+                    "analyst": analyst_type,
+                    "model": model,
+                    "prompt_version": prompt_version,
+                })
+                print(f"💾 [报告缓存] 已保存: {ticker} {trade_date} {analyst_type}")
+            return result
+
+        def cached_analyst_node(state, config):
+            key, hit = lookup(state)
+            if hit is not None:
+                return hit
+            return store(state, key, node.invoke(state, config))
+
+        async def acached_analyst_node(state, config):
+            key, hit = lookup(state)
+            if hit is not None:
+                return hit
+            return store(state, key, await node.ainvoke(state, config))
+
+        return RunnableLambda(cached_analyst_node, afunc=acached_analyst_node)
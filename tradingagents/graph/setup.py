@@ -1,7 +1,9 @@
 # TradingAgents/graph/setup.py
 
+import os
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph, START
 from langgraph.prebuilt import ToolNode
 
@@ -10,6 +12,21 @@ from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
 
 from .conditional_logic import ConditionalLogic
+from .report_cache import AnalystReportCache, prompt_fingerprint
+
+
+# 每个分析师写入的报告字段
+ANALYST_REPORT_KEYS = {
+    "market": "market_report",
+    "social": "sentiment_report",
+    "news": "news_report",
+    "fundamentals": "fundamentals_report",
+}
+
+# 决定分析师工具返回哪些数据的配置项，变化时缓存的报告失效
+REPORT_CACHE_CONFIG_KEYS = ("online_tools", "data_dir", "llm_provider", "backend_url", "quick_think_llm")
+# 同样影响数据来源的环境变量
+REPORT_CACHE_ENV_KEYS = ("DEFAULT_CHINA_DATA_SOURCE",)
 
 
 class GraphSetup:
@@ -44,8 +61,74 @@ class GraphSetup:
         self.config = config or {}
         self.react_llm = react_llm
 
+    def _create_analyst_branch(self, analyst_type, analyst_node, delete_node, tool_node):
+        """Wrap one analyst sub-loop (analyst <-> tools -> Msg Clear) as a graph node.
+
+        The sub-loop runs as its own compiled graph so that its messages never
+        mix with the other analysts running concurrently; only the analyst's
+        report field is written back to the parent state.
+        """
+        analyst_name = f"{analyst_type.capitalize()} Analyst"
+        tools_name = f"tools_{analyst_type}"
+        clear_name = f"Msg Clear {analyst_type.capitalize()}"
+        report_key = ANALYST_REPORT_KEYS[analyst_type]
+
+        branch = StateGraph(AgentState)
+        branch.add_node(analyst_name, analyst_node)
+        branch.add_node(tools_name, tool_node)
+        branch.add_node(clear_name, delete_node)
+        branch.add_edge(START, analyst_name)
+        branch.add_conditional_edges(
+            analyst_name,
+            getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+            [tools_name, clear_name],
+        )
+        branch.add_edge(tools_name, analyst_name)
+        branch.add_edge(clear_name, END)
+        compiled_branch = branch.compile()
+
+        def analyst_branch_node(state, config):
+            final_state = compiled_branch.invoke(state, config)
+            return {report_key: final_state.get(report_key, "")}
+
+        async def aanalyst_branch_node(state, config):
+            final_state = await compiled_branch.ainvoke(state, config)
+            return {report_key: final_state.get(report_key, "")}
+
+        # 同时提供同步/异步实现，apropagate 下分支走 ainvoke
+        return RunnableLambda(analyst_branch_node, afunc=aanalyst_branch_node)
+
+    def _apply_report_cache(self, analyst_nodes, tool_nodes):
+        """Wrap every analyst node with the persistent report cache."""
+        factories = {
+            "market": create_market_analyst,
+            "social": create_social_media_analyst,
+            "news": create_news_analyst,
+            "fundamentals": create_fundamentals_analyst,
+        }
+        cache_dir = self.config.get("analyst_report_cache_dir") or os.path.join(
+            self.config.get("data_cache_dir", "."), "analyst_reports"
+        )
+        report_cache = AnalystReportCache(cache_dir)
+        model = (
+            getattr(self.quick_thinking_llm, "model_name", None)
+            or getattr(self.quick_thinking_llm, "model", None)
+            or self.quick_thinking_llm.__class__.__name__
+        )
+
+        data_settings = {key: self.config.get(key) for key in REPORT_CACHE_CONFIG_KEYS}
+        data_settings.update({key: os.getenv(key) for key in REPORT_CACHE_ENV_KEYS})
+
+        for analyst_type, node in analyst_nodes.items():
+            tool_names = getattr(tool_nodes[analyst_type], "tools_by_name", {}).keys()
+            prompt_version = prompt_fingerprint(factories[analyst_type], tool_names, data_settings)
+            analyst_nodes[analyst_type] = report_cache.wrap(
+                analyst_type, ANALYST_REPORT_KEYS[analyst_type], node, model, prompt_version
+            )
+        print(f"⚡ [报告缓存] 已启用: {cache_dir}")
+
     def setup_graph(
-        self, selected_analysts=["market", "social", "news", "fundamentals"]
+        self, selected_analysts=["market", "social", "news", "fundamentals"], checkpointer=None
     ):
         """Set up and compile the agent workflow graph.
 
@@ -55,6 +138,12 @@ class GraphSetup:
                 - "social": Social media analyst
                 - "news": News analyst
                 - "fundamentals": Fundamentals analyst
+            checkpointer: Optional LangGraph checkpoint saver used to persist
+                progress after every node so failed runs can be resumed.
+
+        When ``config["parallel_analysts"]`` is True the selected analysts run
+        concurrently as independent branches joined before "Bull Researcher";
+        otherwise they are chained in the given order.
         """
         if len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
@@ -132,6 +221,10 @@ class GraphSetup:
             delete_nodes["fundamentals"] = create_msg_delete()
             tool_nodes["fundamentals"] = self.tool_nodes["fundamentals"]
 
+        # 分析师报告缓存：相同 (股票, 日期, 分析师, 模型, 提示词版本) 直接复用报告
+        if self.config.get("analyst_report_cache", False):
+            self._apply_report_cache(analyst_nodes, tool_nodes)
+
         # Create researcher and manager nodes
         bull_researcher_node = create_bull_researcher(
             self.quick_thinking_llm, self.bull_memory
@@ -154,14 +247,29 @@ class GraphSetup:
 
         # Create workflow
         workflow = StateGraph(AgentState)
+        parallel_analysts = self.config.get("parallel_analysts", False)
 
         # Add analyst nodes to the graph
-        for analyst_type, node in analyst_nodes.items():
-            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
-            workflow.add_node(
-                f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
-            )
-            workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
+        if parallel_analysts:
+            # 并行模式：每个分析师子循环封装为独立分支，拥有各自的消息通道
+            print(f"⚡ [DEBUG] 分析师并行执行: {selected_analysts}")
+            for analyst_type in selected_analysts:
+                workflow.add_node(
+                    f"{analyst_type.capitalize()} Analyst",
+                    self._create_analyst_branch(
+                        analyst_type,
+                        analyst_nodes[analyst_type],
+                        delete_nodes[analyst_type],
+                        tool_nodes[analyst_type],
+                    ),
+                )
+        else:
+            for analyst_type, node in analyst_nodes.items():
+                workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
+                workflow.add_node(
+                    f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
+                )
+                workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
 
         # Add other nodes
         workflow.add_node("Bull Researcher", bull_researcher_node)
@@ -174,30 +282,40 @@ class GraphSetup:
         workflow.add_node("Risk Judge", risk_manager_node)
 
         # Define edges
-        # Start with the first analyst
-        first_analyst = selected_analysts[0]
-        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
-
-        # Connect analysts in sequence
-        for i, analyst_type in enumerate(selected_analysts):
-            current_analyst = f"{analyst_type.capitalize()} Analyst"
-            current_tools = f"tools_{analyst_type}"
-            current_clear = f"Msg Clear {analyst_type.capitalize()}"
-
-            # Add conditional edges for current analyst
-            workflow.add_conditional_edges(
-                current_analyst,
-                getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
-                [current_tools, current_clear],
-            )
-            workflow.add_edge(current_tools, current_analyst)
+        if parallel_analysts:
+            # Fan out to all analysts and join before Bull Researcher
+            branch_names = [
+                f"{analyst_type.capitalize()} Analyst"
+                for analyst_type in selected_analysts
+            ]
+            for branch_name in branch_names:
+                workflow.add_edge(START, branch_name)
+            workflow.add_edge(branch_names, "Bull Researcher")
+        else:
+            # Start with the first analyst
+            first_analyst = selected_analysts[0]
+            workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
 
-            # Connect to next analyst or to Bull Researcher if this is the last analyst
-            if i < len(selected_analysts) - 1:
-                next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
-                workflow.add_edge(current_clear, next_analyst)
-            else:
-                workflow.add_edge(current_clear, "Bull Researcher")
+            # Connect analysts in sequence
+            for i, analyst_type in enumerate(selected_analysts):
+                current_analyst = f"{analyst_type.capitalize()} Analyst"
+                current_tools = f"tools_{analyst_type}"
+                current_clear = f"Msg Clear {analyst_type.capitalize()}"
+
+                # Add conditional edges for current analyst
+                workflow.add_conditional_edges(
+                    current_analyst,
+                    getattr(self.conditional_logic, f"should_continue_{analyst_type}"),
+                    [current_tools, current_clear],
+                )
+                workflow.add_edge(current_tools, current_analyst)
+
+                # Connect to next analyst or to Bull Researcher if this is the last analyst
+                if i < len(selected_analysts) - 1:
+                    next_analyst = f"{selected_analysts[i+1].capitalize()} Analyst"
+                    workflow.add_edge(current_clear, next_analyst)
+                else:
+                    workflow.add_edge(current_clear, "Bull Researcher")
 
         # Add remaining edges
         workflow.add_conditional_edges(
@@ -246,4 +364,4 @@ class GraphSetup:
         workflow.add_edge("Risk Judge", END)
 
         # Compile and return
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
@@ -0,0 +1,121 @@
+# TradingAgents/graph/state_log.py
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class StateLog:
+    """Append-only, line-delimited log of final graph states for one ticker.
+
+    Each run is appended as one JSON line to ``full_states_log.jsonl``; a
+    sidecar ``full_states_log.idx`` maps trade dates to byte ranges so a
+    single date can be read without parsing the whole history. Appending is
+    constant time, and re-running a date appends a new record that shadows
+    the previous one.
+    """
+
+    DATA_FILE = "full_states_log.jsonl"
+    INDEX_FILE = "full_states_log.idx"
+    LEGACY_FILE = "full_states_log.json"
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.data_path = self.directory / self.DATA_FILE
+        self.index_path = self.directory / self.INDEX_FILE
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int]] = self._load_index()
+        self._migrate_legacy()
+
+    def append(self, trade_date, entry: Dict[str, Any]) -> None:
+        """Append the state for ``trade_date``."""
+        trade_date = str(trade_date)
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            with open(self.data_path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(f"{trade_date}\t{offset}\t{len(line)}\n")
+            self._index[trade_date] = (offset, len(line))
+
+    def read(self, trade_date) -> Optional[Dict[str, Any]]:
+        """Return the latest state logged for ``trade_date`` or None."""
+        location = self._index.get(str(trade_date))
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.data_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length).decode("utf-8"))
+
+    def dates(self) -> List[str]:
+        """Return all logged trade dates in sorted order."""
+        return sorted(self._index)
+
+    def __contains__(self, trade_date) -> bool:
+        return str(trade_date) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def iter_states(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(trade_date, state)`` for every logged date, oldest date first."""
+        for trade_date in self.dates():
+            yield trade_date, self.read(trade_date)
+
+    def _load_index(self) -> Dict[str, Tuple[int, int]]:
+        index: Dict[str, Tuple[int, int]] = {}
+        data_size = self.data_path.stat().st_size if self.data_path.exists() else 0
+        end = 0
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        continue
+                    offset, length = int(parts[1]), int(parts[2])
+                    index[parts[0]] = (offset, length)
+                    end = max(end, offset + length)
+
+        # 索引缺失或落后于数据文件（例如写入中途进程退出）时重建索引
+        if end != data_size:
+            index = self._rebuild_index()
+        return index
+
+    def _rebuild_index(self) -> Dict[str, Tuple[int, int]]:
+        index: Dict[str, Tuple[int, int]] = {}
+        if self.data_path.exists():
+            print(f"🔧 [状态日志] 重建索引: {self.index_path}")
+            offset = 0
+            with open(self.data_path, "rb") as f:
+                for line in f:
+                    if line.endswith(b"\n"):
+                        try:
+                            trade_date = str(json.loads(line)["trade_date"])
+                            index[trade_date] = (offset, len(line))
+                        except (ValueError, KeyError):
+                            pass
+                    offset += len(line)
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            for trade_date, (offset, length) in index.items():
+                f.write(f"{trade_date}\t{offset}\t{length}\n")
+        return index
+
+    def _migrate_legacy(self) -> None:
+        """Import an old whole-file ``full_states_log.json`` once."""
+        legacy_path = self.directory / self.LEGACY_FILE
+        if self._index or not legacy_path.exists():
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy_states = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ [状态日志] 旧版日志读取失败，跳过迁移: {e}")
+            return
+        for trade_date, entry in legacy_states.items():
+            self.append(trade_date, entry)
+        print(f"✅ [状态日志] 已迁移旧版日志 {len(legacy_states)} 条: {legacy_path}")
@@ -1,8 +1,11 @@
 # TradingAgents/graph/trading_graph.py
 
+import asyncio
 import os
 from pathlib import Path
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 from typing import Dict, Any, Tuple, List, Optional
 
@@ -23,9 +26,11 @@ from tradingagents.agents.utils.agent_states import (
 )
 from tradingagents.dataflows.interface import set_config
 
+from .checkpointer import SqliteCheckpointSaver, make_thread_id
 from .conditional_logic import ConditionalLogic
 from .setup import GraphSetup
 from .propagation import Propagator
+from .state_log import StateLog
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
 
@@ -172,10 +177,14 @@ class TradingAgentsGraph:
         # State tracking
         self.curr_state = None
         self.ticker = None
-        self.log_states_dict = {}  # date to full state dict
+        self._state_logs = {}  # ticker to StateLog
+        self._log_lock = threading.Lock()
 
         # Set up the graph
-        self.graph = self.graph_setup.setup_graph(selected_analysts)
+        self.checkpointer = self._create_checkpointer()
+        self.graph = self.graph_setup.setup_graph(
+            selected_analysts, checkpointer=self.checkpointer
+        )
 
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources."""
@@ -224,8 +233,13 @@ class TradingAgentsGraph:
             ),
         }
 
-    def propagate(self, company_name, trade_date):
-        """Run the trading agents graph for a company on a specific date."""
+    def propagate(self, company_name, trade_date, run_id=None):
+        """Run the trading agents graph for a company on a specific date.
+
+        With ``config["checkpoint_enabled"]`` every node is checkpointed under
+        (company_name, trade_date, run_id); calling ``propagate`` again with the
+        same key resumes an interrupted run from its last completed node.
+        """
 
         # 添加详细的接收日志
         print(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
@@ -235,6 +249,105 @@ class TradingAgentsGraph:
         self.ticker = company_name
         print(f"🔍 [GRAPH DEBUG] 设置self.ticker: '{self.ticker}'")
 
+        final_state = self._run_graph(company_name, trade_date, run_id)
+
+        # Store current state for reflection
+        self.curr_state = final_state
+
+        # Log state
+        self._log_state(trade_date, final_state)
+
+        # Return decision and processed signal
+        return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
+
+    async def apropagate(self, company_name, trade_date, run_id=None):
+        """Async version of ``propagate`` built on the graph's ``ainvoke``/``astream``.
+
+        Many tickers can share one event loop, e.g.
+        ``await asyncio.gather(*(ta.apropagate(t, d) for t in tickers))``.
+        ``self.curr_state`` holds the state of the most recently finished run.
+        Agent nodes await the LLMs' async APIs and tools run through their
+        coroutines (blocking data SDKs are moved to worker threads), so runs for
+        different tickers overlap on the event loop instead of holding threads.
+        """
+        print(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.apropagate 接收参数 =====")
+        print(f"🔍 [GRAPH DEBUG] 接收到的company_name: '{company_name}', trade_date: '{trade_date}'")
+
+        self.ticker = company_name
+
+        final_state = await self._arun_graph(company_name, trade_date, run_id)
+
+        # Store current state for reflection
+        self.curr_state = final_state
+
+        # Log state and process signal off the event loop (file I/O and a blocking LLM call)
+        await asyncio.to_thread(self._log_state, trade_date, final_state, company_name)
+        decision = await asyncio.to_thread(
+            self.process_signal, final_state["final_trade_decision"], company_name
+        )
+        return final_state, decision
+
+    def propagate_batch(self, tickers, trade_date, max_concurrency=4, run_id=None):
+        """Run the graph for many tickers on the same date with a bounded worker pool.
+
+        The compiled graph, LLM clients and memories are shared by all workers.
+        Results are yielded as each ticker completes, and a failure only affects
+        its own ticker. ``self.curr_state`` is not updated by batch runs; use the
+        yielded ``state`` instead.
+
+        Args:
+            tickers: Iterable of ticker symbols
+            trade_date: Trade date shared by all tickers
+            max_concurrency: Maximum number of tickers analysed at the same time
+            run_id: Checkpoint run id shared by all tickers (see ``propagate``)
+
+        Yields:
+            dict: ``{"ticker", "trade_date", "success", "state", "decision", "error"}``
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return
+
+        max_workers = max(1, min(max_concurrency, len(tickers)))
+        print(f"📦 [批量分析] {len(tickers)} 只股票, 日期: {trade_date}, 并发数: {max_workers}")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_ticker = {
+                executor.submit(self._propagate_one, ticker, trade_date, run_id): ticker
+                for ticker in tickers
+            }
+            for future in as_completed(future_to_ticker):
+                ticker = future_to_ticker[future]
+                try:
+                    final_state, decision = future.result()
+                    print(f"✅ [批量分析] {ticker} 完成")
+                    yield {
+                        "ticker": ticker,
+                        "trade_date": str(trade_date),
+                        "success": True,
+                        "state": final_state,
+                        "decision": decision,
+                        "error": None,
+                    }
+                except Exception as e:
+                    print(f"❌ [批量分析] {ticker} 失败: {e}")
+                    yield {
+                        "ticker": ticker,
+                        "trade_date": str(trade_date),
+                        "success": False,
+                        "state": None,
+                        "decision": None,
+                        "error": str(e),
+                    }
+
+    def _propagate_one(self, company_name, trade_date, run_id=None):
+        """Run and log a single ticker without touching per-instance run state."""
+        final_state = self._run_graph(company_name, trade_date, run_id)
+        self._log_state(trade_date, final_state, ticker=company_name)
+        return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
+
+    def _run_graph(self, company_name, trade_date, run_id=None):
+        """Invoke the compiled graph for one ticker and return the final state."""
         # Initialize state
         print(f"🔍 [GRAPH DEBUG] 创建初始状态，传递参数: company_name='{company_name}', trade_date='{trade_date}'")
         init_agent_state = self.propagator.create_initial_state(
@@ -242,35 +355,88 @@ class TradingAgentsGraph:
         )
         print(f"🔍 [GRAPH DEBUG] 初始状态中的company_of_interest: '{init_agent_state.get('company_of_interest', 'NOT_FOUND')}'")
         print(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}')")
-        args = self.propagator.get_graph_args()
+        graph_input = init_agent_state
+        thread_id = None
+        if self.checkpointer is not None:
+            thread_id = make_thread_id(company_name, trade_date, run_id)
+        args = self.propagator.get_graph_args(thread_id)
+        if thread_id is not None:
+            snapshot = self.graph.get_state(args["config"])
+            graph_input = self._checkpoint_input(thread_id, snapshot, init_agent_state)
 
         if self.debug:
             # Debug mode with tracing
             trace = []
-            for chunk in self.graph.stream(init_agent_state, **args):
+            for chunk in self.graph.stream(graph_input, **args):
                 if len(chunk["messages"]) == 0:
                     pass
                 else:
                     chunk["messages"][-1].pretty_print()
                     trace.append(chunk)
 
-            final_state = trace[-1]
-        else:
-            # Standard mode without tracing
-            final_state = self.graph.invoke(init_agent_state, **args)
+            return trace[-1]
 
-        # Store current state for reflection
-        self.curr_state = final_state
+        # Standard mode without tracing
+        return self.graph.invoke(graph_input, **args)
 
-        # Log state
-        self._log_state(trade_date, final_state)
+    async def _arun_graph(self, company_name, trade_date, run_id=None):
+        """Async counterpart of ``_run_graph`` using ``ainvoke``/``astream``."""
+        init_agent_state = self.propagator.create_initial_state(
+            company_name, trade_date
+        )
+        graph_input = init_agent_state
+        thread_id = None
+        if self.checkpointer is not None:
+            thread_id = make_thread_id(company_name, trade_date, run_id)
+        args = self.propagator.get_graph_args(thread_id)
+        if thread_id is not None:
+            snapshot = await self.graph.aget_state(args["config"])
+            graph_input = self._checkpoint_input(thread_id, snapshot, init_agent_state)
 
-        # Return decision and processed signal
-        return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
+        if self.debug:
+            # Debug mode with tracing
+            trace = []
+            async for chunk in self.graph.astream(graph_input, **args):
+                if len(chunk["messages"]) == 0:
+                    pass
+                else:
+                    chunk["messages"][-1].pretty_print()
+                    trace.append(chunk)
 
-    def _log_state(self, trade_date, final_state):
-        """Log the final state to a JSON file."""
-        self.log_states_dict[str(trade_date)] = {
+            return trace[-1]
+
+        # Standard mode without tracing
+        return await self.graph.ainvoke(graph_input, **args)
+
+    def _checkpoint_input(self, thread_id, snapshot, init_agent_state):
+        """Pick the graph input for a checkpointed run.
+
+        An unfinished checkpoint is resumed (``None`` input); a finished one is
+        discarded so the same key starts a fresh run.
+        """
+        if snapshot.next:
+            print(f"🔄 [检查点] 从断点恢复运行: {thread_id}, 待执行节点: {list(snapshot.next)}")
+            return None
+        if snapshot.values:
+            print(f"🧹 [检查点] 上次运行已完成，重新开始: {thread_id}")
+            self.checkpointer.delete_thread(thread_id)
+        return init_agent_state
+
+    def _create_checkpointer(self):
+        """Create the durable checkpoint saver when checkpointing is enabled."""
+        if not self.config.get("checkpoint_enabled", False):
+            return None
+        checkpoint_dir = self.config.get("checkpoint_dir") or os.path.join(
+            self.config["results_dir"], "checkpoints"
+        )
+        db_path = os.path.join(checkpoint_dir, "graph_checkpoints.sqlite")
+        print(f"💾 [检查点] 已启用, 存储位置: {db_path}")
+        return SqliteCheckpointSaver(db_path)
+
+    def _log_state(self, trade_date, final_state, ticker=None):
+        """Log the final state to the ticker's append-only state log."""
+        ticker = ticker or self.ticker
+        state_entry = {
             "company_of_interest": final_state["company_of_interest"],
             "trade_date": final_state["trade_date"],
             "market_report": final_state["market_report"],
@@ -300,15 +466,17 @@ class TradingAgentsGraph:
             "final_trade_decision": final_state["final_trade_decision"],
         }
 
-        # Save to file
-        directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
-        directory.mkdir(parents=True, exist_ok=True)
-
-        with open(
-            f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/full_states_log.json",
-            "w",
-        ) as f:
-            json.dump(self.log_states_dict, f, indent=4)
+        # Append to the ticker's line-delimited log
+        self.get_state_log(ticker).append(trade_date, state_entry)
+
+    def get_state_log(self, ticker):
+        """Return the append-only state log for a ticker (one date readable on its own)."""
+        with self._log_lock:
+            state_log = self._state_logs.get(ticker)
+            if state_log is None:
+                state_log = StateLog(Path(f"eval_results/{ticker}/TradingAgentsStrategy_logs/"))
+                self._state_logs[ticker] = state_log
+            return state_log
 
     def reflect_and_remember(self, returns_losses):
         """Reflect on decisions and update memory based on returns."""
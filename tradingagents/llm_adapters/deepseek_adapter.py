@@ -8,7 +8,7 @@ from typing import Any, Dict, List, Optional, Union
 from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
 from langchain_core.outputs import ChatGeneration, ChatResult
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
 
 # 导入token跟踪器
 try:
@@ -87,57 +87,36 @@ class ChatDeepSeek(ChatOpenAI):
             # 调用父类方法生成响应
             result = super()._generate(messages, stop, run_manager, **kwargs)
             
-            # 提取token使用量
-            input_tokens = 0
-            output_tokens = 0
+            # 记录token使用量
+            self._record_token_usage(messages, result, session_id, analysis_type)
             
-            # 尝试从响应中提取token使用量
-            if hasattr(result, 'llm_output') and result.llm_output:
-                token_usage = result.llm_output.get('token_usage', {})
-                if token_usage:
-                    input_tokens = token_usage.get('prompt_tokens', 0)
-                    output_tokens = token_usage.get('completion_tokens', 0)
+            return result
             
-            # 如果没有获取到token使用量，进行估算
-            if input_tokens == 0 and output_tokens == 0:
-                input_tokens = self._estimate_input_tokens(messages)
-                output_tokens = self._estimate_output_tokens(result)
-                print(f"🔍 [DeepSeek] 使用估算token: 输入={input_tokens}, 输出={output_tokens}")
-            else:
-                print(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
+        except Exception as e:
+            print(f"❌ [DeepSeek] 调用失败: {e}")
+            raise
+    
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        异步生成聊天响应（使用父类的原生异步客户端），并记录token使用量
+        """
+
+        # 提取并移除自定义参数，避免传递给父类
+        session_id = kwargs.pop('session_id', None)
+        analysis_type = kwargs.pop('analysis_type', None)
+
+        try:
+            # 调用父类异步方法生成响应
+            result = await super()._agenerate(messages, stop, run_manager, **kwargs)
             
             # 记录token使用量
-            if TOKEN_TRACKING_ENABLED and (input_tokens > 0 or output_tokens > 0):
-                try:
-                    # 使用提取的参数或生成默认值
-                    if session_id is None:
-                        session_id = f"deepseek_{hash(str(messages))%10000}"
-                    if analysis_type is None:
-                        analysis_type = 'stock_analysis'
-
-                    # 记录使用量
-                    usage_record = token_tracker.track_usage(
-                        provider="deepseek",
-                        model_name=self.model_name,
-                        input_tokens=input_tokens,
-                        output_tokens=output_tokens,
-                        session_id=session_id,
-                        analysis_type=analysis_type
-                    )
-
-                    if usage_record:
-                        if usage_record.cost == 0.0:
-                            print(f"⚠️ [DeepSeek] 成本计算为0，可能配置有问题")
-                        else:
-                            print(f"💰 [DeepSeek] 本次调用成本: ¥{usage_record.cost:.6f}")
-                        print(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
-                    else:
-                        print(f"⚠️ [DeepSeek] 未创建使用记录")
-
-                except Exception as track_error:
-                    print(f"⚠️ [DeepSeek] Token统计失败: {track_error}")
-                    import traceback
-                    traceback.print_exc()
+            self._record_token_usage(messages, result, session_id, analysis_type)
             
             return result
             
@@ -145,6 +124,67 @@ class ChatDeepSeek(ChatOpenAI):
             print(f"❌ [DeepSeek] 调用失败: {e}")
             raise
     
+    def _record_token_usage(
+        self,
+        messages: List[BaseMessage],
+        result: ChatResult,
+        session_id: Optional[str],
+        analysis_type: Optional[str],
+    ):
+        """提取（或估算）token使用量并记录"""
+
+        # 提取token使用量
+        input_tokens = 0
+        output_tokens = 0
+        
+        # 尝试从响应中提取token使用量
+        if hasattr(result, 'llm_output') and result.llm_output:
+            token_usage = result.llm_output.get('token_usage', {})
+            if token_usage:
+                input_tokens = token_usage.get('prompt_tokens', 0)
+                output_tokens = token_usage.get('completion_tokens', 0)
+        
+        # 如果没有获取到token使用量，进行估算
+        if input_tokens == 0 and output_tokens == 0:
+            input_tokens = self._estimate_input_tokens(messages)
+            output_tokens = self._estimate_output_tokens(result)
+            print(f"🔍 [DeepSeek] 使用估算token: 输入={input_tokens}, 输出={output_tokens}")
+        else:
+            print(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
+        
+        # 记录token使用量
+        if TOKEN_TRACKING_ENABLED and (input_tokens > 0 or output_tokens > 0):
+            try:
+                # 使用提取的参数或生成默认值
+                if session_id is None:
+                    session_id = f"deepseek_{hash(str(messages))%10000}"
+                if analysis_type is None:
+                    analysis_type = 'stock_analysis'
+
+                # 记录使用量
+                usage_record = token_tracker.track_usage(
+                    provider="deepseek",
+                    model_name=self.model_name,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    session_id=session_id,
+                    analysis_type=analysis_type
+                )
+
+                if usage_record:
+                    if usage_record.cost == 0.0:
+                        print(f"⚠️ [DeepSeek] 成本计算为0，可能配置有问题")
+                    else:
+                        print(f"💰 [DeepSeek] 本次调用成本: ¥{usage_record.cost:.6f}")
+                    print(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
+                else:
+                    print(f"⚠️ [DeepSeek] 未创建使用记录")
+
+            except Exception as track_error:
+                print(f"⚠️ [DeepSeek] Token统计失败: {track_error}")
+                import traceback
+                traceback.print_exc()
+    
     def _estimate_input_tokens(self, messages: List[BaseMessage]) -> int:
         """
         估算输入token数量
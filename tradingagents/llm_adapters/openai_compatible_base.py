@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Optional, Union
 from langchain_core.messages import BaseMessage
 from langchain_core.outputs import ChatResult
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
 
 # 导入token跟踪器
 try:
@@ -117,6 +117,32 @@ class OpenAICompatibleBase(ChatOpenAI):
         
         return result
     
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        异步生成聊天响应（使用父类的原生异步客户端），并记录token使用量
+        """
+        
+        # 记录开始时间
+        start_time = time.time()
+        
+        # 调用父类异步生成方法
+        result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        
+        # 记录token使用量
+        if TOKEN_TRACKING_ENABLED:
+            try:
+                self._track_token_usage(result, kwargs, start_time)
+            except Exception as e:
+                print(f"⚠️ {self.provider_name} Token追踪失败: {e}")
+        
+        return result
+    
     def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
         """追踪token使用量"""
         
@@ -21,6 +21,9 @@ try:
     from tradingagents.dataflows.cache_manager import get_cache
     from tradingagents.dataflows.optimized_us_data import get_optimized_us_data_provider
     from tradingagents.dataflows.optimized_china_data import get_optimized_china_data_provider
+    from tradingagents.dataflows.cache_metrics import (
+        default_snapshot_dir, get_cache_metrics, load_metrics_snapshot
+    )
     CACHE_AVAILABLE = True
     OPTIMIZED_PROVIDERS_AVAILABLE = True
 except ImportError as e:
@@ -153,6 +156,10 @@ def main():
         else:
             st.warning("缓存配置信息不可用")
 
+    # 命中率与延迟
+    st.markdown("---")
+    render_cache_metrics()
+
     # 缓存测试功能
     st.markdown("---")
     st.subheader("🧪 缓存测试")
@@ -256,28 +263,23 @@ def main():
     
     # 显示缓存文件列表
     try:
-        metadata_files = list(cache.metadata_dir.glob("*_meta.json"))
+        entries = cache.find_cache_entries(data_type=data_type)
         
-        if metadata_files:
-            import json
+        if entries:
             from datetime import datetime
             
             cache_items = []
-            for metadata_file in metadata_files:
+            for metadata in entries:
                 try:
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    if metadata.get('data_type') == data_type:
-                        cached_at = datetime.fromisoformat(metadata['cached_at'])
-                        cache_items.append({
-                            'symbol': metadata.get('symbol', 'N/A'),
-                            'data_source': metadata.get('data_source', 'N/A'),
-                            'cached_at': cached_at.strftime('%Y-%m-%d %H:%M:%S'),
-                            'start_date': metadata.get('start_date', 'N/A'),
-                            'end_date': metadata.get('end_date', 'N/A'),
-                            'file_path': metadata.get('file_path', 'N/A')
-                        })
+                    cached_at = datetime.fromisoformat(metadata['cached_at'])
+                    cache_items.append({
+                        'symbol': metadata.get('symbol') or 'N/A',
+                        'data_source': metadata.get('data_source') or 'N/A',
+                        'cached_at': cached_at.strftime('%Y-%m-%d %H:%M:%S'),
+                        'start_date': metadata.get('start_date') or 'N/A',
+                        'end_date': metadata.get('end_date') or 'N/A',
+                        'file_path': metadata.get('file_path') or 'N/A'
+                    })
                 except Exception:
                     continue
             
@@ -321,5 +323,64 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+def render_cache_metrics():
+    """展示各缓存层和数据源的命中率、读写量和延迟（合并所有进程的指标快照）"""
+    st.subheader("📈 缓存命中率与延迟")
+
+    try:
+        # 先写入本进程的最新快照，再合并其他进程（如命令行分析任务）的快照
+        metrics = get_cache_metrics()
+        metrics.write_snapshot()
+        snapshot = load_metrics_snapshot(default_snapshot_dir())
+    except Exception as e:
+        st.error(f"读取缓存指标失败: {e}")
+        return
+
+    rows = snapshot.get('summary', [])
+    if not rows:
+        st.info("📭 暂无缓存指标，运行一次分析后再查看")
+        return
+
+    import pandas as pd
+    df = pd.DataFrame(rows).drop(columns=['latency_buckets'])
+    df['read_mb'] = (df.pop('bytes_read') / (1024 * 1024)).round(3)
+    df['written_mb'] = (df.pop('bytes_written') / (1024 * 1024)).round(3)
+
+    cache_rows = df[df['tier'] != 'source']
+    cache_lookups = cache_rows['hits'].sum() + cache_rows['misses'].sum() + cache_rows['stale'].sum()
+
+    metric_col1, metric_col2, metric_col3 = st.columns(3)
+    with metric_col1:
+        st.metric("整体命中率", f"{cache_rows['hits'].sum() / cache_lookups:.1%}" if cache_lookups else "N/A",
+                  help="所有缓存层的命中次数 / 查找次数")
+    with metric_col2:
+        st.metric("数据源调用", int(df.loc[df['tier'] == 'source', 'calls'].sum()),
+                  help="实际请求外部数据源的次数")
+    with metric_col3:
+        st.metric("统计进程数", snapshot.get('processes', 0),
+                  help=f"合并了多少个进程的指标快照（其中 {snapshot.get('archived_processes', 0)} 个已退出的进程来自归档）")
+
+    st.dataframe(
+        df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "tier": st.column_config.TextColumn("层级", width="small"),
+            "data_type": st.column_config.TextColumn("数据类型", width="small"),
+            "market": st.column_config.TextColumn("市场", width="small"),
+            "source": st.column_config.TextColumn("数据源", width="small"),
+            "hit_rate": st.column_config.NumberColumn("命中率", format="%.2f"),
+            "latency_avg_ms": st.column_config.NumberColumn("平均延迟(ms)", format="%.2f"),
+            "latency_p50_ms": st.column_config.NumberColumn("P50(ms)"),
+            "latency_p95_ms": st.column_config.NumberColumn("P95(ms)"),
+        }
+    )
+
+    if st.button("🔄 重置本进程指标", key="reset_cache_metrics"):
+        metrics.reset()
+        metrics.write_snapshot()
+        st.rerun()
+
+
 if __name__ == "__main__":
     main()